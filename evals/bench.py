@@ -0,0 +1,432 @@
+"""
+Benchmarks of the harness hot paths on synthetic Polish datasets.
+
+    python -m evals.bench                                  # 10k and 100k rows
+    python -m evals.bench --sizes 1m --only load_jsonl,collect
+    python -m evals.bench --baseline evals/reports/latest_bench.json
+
+Writes evals/reports/bench_<ts>.json (and latest_bench.json). With --baseline every
+benchmark is compared with the same size in the baseline file; one slower than
+baseline * (1 + tolerance) is a regression and the exit code is 1.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+ROOT = Path(__file__).resolve().parents[1]
+
+DEFAULT_SIZES = "10k,100k"
+DEFAULT_REPEAT = 3
+DEFAULT_TOLERANCE = 0.25
+# Benchmarks faster than this are too noisy to flag as regressions.
+MIN_COMPARABLE_S = 0.01
+# Share of rows per dataset kind.
+KIND_SHARES = {"rules": 0.5, "golden": 0.4, "judge": 0.1}
+TEST_FILES = [
+    "evals/tests/test_rules_all.py",
+    "evals/tests/test_golden_all.py",
+    "evals/tests/test_judge_all.py",
+]
+
+WORDS = (
+    "pociąg", "dworzec", "bilet", "parasol", "deszcz", "słońce", "herbata", "kawa",
+    "chleb", "mleko", "sklep", "paragon", "faktura", "urząd", "wniosek", "lekarz",
+    "recepta", "apteka", "szkoła", "nauczyciel", "książka", "zeszyt", "rower", "kask",
+    "zima", "lato", "mróz", "śnieg", "ogień", "dym", "woda", "łódź", "jezioro", "góry",
+    "szlak", "mapa", "telefon", "ładowarka", "bateria", "komputer", "hasło", "konto",
+    "przelew", "złoty", "gęś", "żółw", "źródło", "ćma", "więc", "ponieważ", "zawsze",
+    "szybko", "ostrożnie", "najpierw", "potem", "zadzwonić", "sprawdzić", "zapłacić",
+)
+QUESTIONS = (
+    "Co zrobić, gdy {a} i {b}? Odpowiedz krótko.",
+    "Dlaczego {a} wpływa na {b}? Odpowiedz w 1-2 zdaniach.",
+    "Podaj jedno słowo: {a} czy {b}?",
+    "Jak wyjaśnić dziecku, czym jest {a}?",
+)
+
+
+def parse_size(spec: str) -> int:
+    """10k -> 10000, 1m -> 1000000, 2500 -> 2500."""
+    raw = spec.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(raw[-1:], 1)
+    try:
+        return int(float(raw[:-1] if scale > 1 else raw) * scale)
+    except ValueError as e:
+        raise ValueError(f"Invalid size {spec!r}: expected e.g. 10k, 100k, 1m") from e
+
+
+def size_label(rows: int) -> str:
+    if rows % 1_000_000 == 0:
+        return f"{rows // 1_000_000}m"
+    if rows % 1_000 == 0:
+        return f"{rows // 1_000}k"
+    return str(rows)
+
+
+# --- synthetic data --------------------------------------------------------
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def synthetic_rows(kind: str, count: int, seed: int = 0) -> Iterator[dict[str, Any]]:
+    """Deterministic rows of one dataset kind in the repo's JSONL schema."""
+    rng = random.Random(f"{seed}:{kind}")
+    for i in range(count):
+        a, b, c, d = rng.sample(WORDS, 4)
+        row: dict[str, Any] = {
+            "id": f"syn_{kind}_{i:07d}",
+            "input": rng.choice(QUESTIONS).format(a=a, b=b),
+            "tags": [rng.choice(("pl", "common", "format"))],
+        }
+        if kind == "rules":
+            row["must_contain_any"] = [a, b]
+            row["must_not_contain_any"] = [c]
+            if i % 3 == 0:
+                row["must_contain_word"] = [d]
+        elif kind == "golden":
+            row["expected"] = _sentence(rng, 12)
+            row["f1_threshold"] = 0.2
+        elif i % 2 == 0:
+            row["notes"] = _sentence(rng, 8)
+        yield row
+
+
+def synthetic_outputs(count: int, seed: int = 0) -> list[str]:
+    """SUT-like answers to match the rows against."""
+    rng = random.Random(f"{seed}:outputs")
+    return [_sentence(rng, rng.randint(8, 30)) for _ in range(count)]
+
+
+def kind_counts(rows: int) -> dict[str, int]:
+    counts = {kind: int(rows * share) for kind, share in KIND_SHARES.items()}
+    counts["rules"] += rows - sum(counts.values())
+    return counts
+
+
+def write_synthetic(root: Path, rows: int, seed: int = 0) -> Path:
+    """Write a test set with `rows` rows in total under root; returns its directory."""
+    set_dir = root / f"synthetic_{size_label(rows)}"
+    set_dir.mkdir(parents=True, exist_ok=True)
+    for kind, count in kind_counts(rows).items():
+        path = set_dir / f"{kind}.jsonl"
+        if path.exists():
+            continue
+        tmp = path.with_suffix(".jsonl.tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            for row in synthetic_rows(kind, count, seed):
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        tmp.replace(path)
+    return set_dir
+
+
+# --- benchmarks --------------------------------------------------------------
+
+
+def _best(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+@contextlib.contextmanager
+def _env(**values: str) -> Iterator[None]:
+    old = {k: os.environ.get(k) for k in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for k, v in old.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+
+class Bench:
+    """Benchmarks of one dataset size; every bench_* method returns (seconds, ops)."""
+
+    def __init__(self, workdir: Path, rows: int, repeat: int) -> None:
+        self.rows = rows
+        self.repeat = repeat
+        self.datasets = workdir / f"datasets_{size_label(rows)}"
+        self.set_dir = write_synthetic(self.datasets, rows)
+        self.cache = workdir / f"cache_{size_label(rows)}"
+        self._rules: list[dict[str, Any]] | None = None
+        self._golden: list[dict[str, Any]] | None = None
+        self._outputs: list[str] | None = None
+
+    @property
+    def rules(self) -> list[dict[str, Any]]:
+        if self._rules is None:
+            self._rules = list(synthetic_rows("rules", kind_counts(self.rows)["rules"]))
+        return self._rules
+
+    @property
+    def golden(self) -> list[dict[str, Any]]:
+        if self._golden is None:
+            self._golden = list(synthetic_rows("golden", kind_counts(self.rows)["golden"]))
+        return self._golden
+
+    @property
+    def outputs(self) -> list[str]:
+        if self._outputs is None:
+            self._outputs = synthetic_outputs(self.rows)
+        return self._outputs
+
+    def bench_load_jsonl(self) -> tuple[float, int]:
+        from evals.datasets.loaders import load_jsonl
+
+        paths = sorted(self.set_dir.glob("*.jsonl"))
+        return _best(lambda: [load_jsonl(p) for p in paths], self.repeat), self.rows
+
+    def bench_iter_datasets(self) -> tuple[float, int]:
+        from evals.datasets import iter_datasets
+        from evals.datasets.loaders import iter_jsonl
+
+        def run() -> None:
+            for kind in KIND_SHARES:
+                for _, path in iter_datasets(f"{kind}.jsonl"):
+                    for _ in iter_jsonl(path):
+                        pass
+
+        with _env(EVAL_DATASETS_DIR=str(self.datasets)):
+            return _best(run, self.repeat), self.rows
+
+    def _collect(self) -> float:
+        env = {
+            **os.environ,
+            "EVAL_DATASETS_DIR": str(self.datasets),
+            "EVAL_CACHE_DIR": str(self.cache),
+            "PYTEST_DISABLE_PLUGIN_AUTOLOAD": "1",
+        }
+        cmd = [
+            sys.executable, "-m", "pytest", "--collect-only", "-q", "-p", "no:cacheprovider",
+            "-m", "rules or golden or judge", *TEST_FILES,
+        ]
+        t0 = time.perf_counter()
+        proc = subprocess.run(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        elapsed = time.perf_counter() - t0
+        if proc.returncode != 0:
+            raise RuntimeError(f"pytest collection failed: {proc.stderr.strip()[-500:]}")
+        return elapsed
+
+    def bench_collect_cold(self) -> tuple[float, int]:
+        """pytest collection of the three test modules, dataset index built from scratch."""
+        best = float("inf")
+        for _ in range(self.repeat):
+            shutil.rmtree(self.cache, ignore_errors=True)
+            best = min(best, self._collect())
+        return best, self.rows
+
+    def bench_collect(self) -> tuple[float, int]:
+        """pytest collection with the dataset index already cached."""
+        self._collect()
+        return min(self._collect() for _ in range(self.repeat)), self.rows
+
+    def bench_rules_normalize(self) -> tuple[float, int]:
+        from evals.rules import normalize
+
+        outputs = self.outputs
+        return _best(lambda: [normalize(o) for o in outputs], self.repeat), len(outputs)
+
+    def bench_contains_any(self) -> tuple[float, int]:
+        from evals.rules import contains_any, normalize
+
+        pairs = [(normalize(o), r["must_contain_any"]) for o, r in zip(self.outputs, self.rules)]
+        return _best(lambda: [contains_any(h, n) for h, n in pairs], self.repeat), len(pairs)
+
+    def bench_contains_word(self) -> tuple[float, int]:
+        from evals.rules import contains_word, normalize
+
+        pairs = [
+            (normalize(o), r["must_contain_word"])
+            for o, r in zip(self.outputs, self.rules)
+            if r.get("must_contain_word")
+        ]
+        return _best(lambda: [contains_word(h, n) for h, n in pairs], self.repeat), len(pairs)
+
+    def bench_golden_normalize(self) -> tuple[float, int]:
+        from evals.golden import normalize
+
+        outputs = self.outputs
+        return _best(lambda: [normalize(o) for o in outputs], self.repeat), len(outputs)
+
+    def bench_token_f1(self) -> tuple[float, int]:
+        from evals.golden import token_f1
+
+        pairs = [(o, r["expected"]) for o, r in zip(self.outputs, self.golden)]
+        return _best(lambda: [token_f1(a, e) for a, e in pairs], self.repeat), len(pairs)
+
+    def bench_case_log(self) -> tuple[float, int]:
+        """Per-test case log records appended to the CaseLog file (conftest hook)."""
+        from evals.logging_utils import CaseLog, case_record
+
+        props = [
+            {
+                "case_id": r["id"],
+                "prompt": r["input"],
+                "output": o,
+                "extra": {"type": "rules", "test_set": "synthetic", "latency_s": 0.5},
+            }
+            for r, o in zip(self.rules, self.outputs)
+        ]
+
+        path = self.cache.parent / f"case_log_{size_label(self.rows)}.jsonl"
+
+        def run() -> None:
+            path.unlink(missing_ok=True)
+            with CaseLog(path) as log:
+                for i, p in enumerate(props):
+                    log.append(case_record(f"evals/tests/test_rules_all.py::test[{i}]", p))
+
+        return _best(run, self.repeat), len(props)
+
+    def bench_report(self) -> tuple[float, int]:
+        """JSON + HTML report from a results journal (native engine, --resume)."""
+        from evals.journal import write_report
+
+        out = self.cache.parent / f"report_{size_label(self.rows)}"
+        out.mkdir(parents=True, exist_ok=True)
+        journal = out / "journal.jsonl"
+        if not journal.exists():
+            with journal.open("w", encoding="utf-8") as f:
+                for i, (r, o) in enumerate(zip(self.rules, self.outputs)):
+                    passed = i % 4 != 0
+                    entry = {
+                        "nodeid": f"evals/tests/test_rules_all.py::test_rules_all[synthetic::rules::{r['id']}]",
+                        "outcome": "passed" if passed else "failed",
+                        "user_properties": [
+                            {"case_id": r["id"]},
+                            {"prompt": r["input"]},
+                            {"output": o},
+                            {"extra": {"type": "rules", "test_set": "synthetic", "latency_s": 0.5 + i % 7 / 10,
+                                       "completion_tokens": 20}},
+                        ],
+                        "call": {"duration": 0.5, "outcome": "passed" if passed else "failed"},
+                    }
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        header = {"created": time.time(), "duration": 1.0, "root": str(ROOT)}
+        count = len(self.rules)
+        return _best(
+            lambda: write_report(header, journal, out / "report.json", out / "report.html"), self.repeat
+        ), count
+
+
+BENCHMARKS = [name[len("bench_"):] for name in vars(Bench) if name.startswith("bench_")]
+
+
+def run_benchmarks(sizes: list[int], only: list[str], repeat: int, workdir: Path) -> dict[str, Any]:
+    results: dict[str, dict[str, Any]] = {}
+    for rows in sizes:
+        label = size_label(rows)
+        print(f"[{label}] generating synthetic datasets in {workdir}")
+        bench = Bench(workdir, rows, repeat)
+        results[label] = {}
+        for name in only:
+            seconds, ops = getattr(bench, f"bench_{name}")()
+            results[label][name] = {
+                "s": round(seconds, 6),
+                "ops": ops,
+                "ops_per_s": round(ops / seconds, 1) if seconds else None,
+            }
+            print(f"[{label}] {name:<16} {seconds:9.4f}s  {ops / seconds if seconds else 0:>12,.0f} ops/s")
+    return {
+        "created": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[dict[str, Any]]:
+    """Benchmarks slower than baseline * (1 + tolerance), for sizes/names present in both."""
+    regressions: list[dict[str, Any]] = []
+    for label, benches in current["results"].items():
+        base = baseline.get("results", {}).get(label, {})
+        for name, res in benches.items():
+            before = (base.get(name) or {}).get("s")
+            if not before or before < MIN_COMPARABLE_S:
+                continue
+            ratio = res["s"] / before
+            if ratio > 1 + tolerance:
+                regressions.append(
+                    {"size": label, "bench": name, "baseline_s": before, "s": res["s"], "ratio": round(ratio, 3)}
+                )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m evals.bench",
+        description="Benchmark harness hot paths on synthetic datasets.",
+    )
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"row counts, e.g. 10k,100k,1m (default {DEFAULT_SIZES})")
+    parser.add_argument("--only", default=None, help=f"comma separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="runs per benchmark, best is kept")
+    parser.add_argument("--reports-dir", default="evals/reports", help="default: evals/reports (as run_tests)")
+    parser.add_argument("--workdir", default=None, help="keep synthetic datasets here (reused by later runs)")
+    parser.add_argument("--baseline", default=None, help="previous bench JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed slowdown (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    try:
+        sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+    except ValueError as e:
+        raise SystemExit(str(e))
+    only = [s.strip() for s in args.only.split(",")] if args.only else BENCHMARKS
+    unknown = sorted(set(only) - set(BENCHMARKS))
+    if unknown:
+        raise SystemExit(f"Unknown benchmarks: {', '.join(unknown)} (available: {', '.join(BENCHMARKS)})")
+
+    with contextlib.ExitStack() as stack:
+        if args.workdir:
+            workdir = Path(args.workdir).resolve()
+            workdir.mkdir(parents=True, exist_ok=True)
+        else:
+            workdir = Path(stack.enter_context(tempfile.TemporaryDirectory(prefix="evals-bench-")))
+        report = run_benchmarks(sizes, only, max(1, args.repeat), workdir)
+
+    code = 0
+    if args.baseline:
+        baseline = json.loads((ROOT / args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(report, baseline, args.tolerance)
+        report["baseline"] = str(args.baseline)
+        report["regressions"] = regressions
+        for r in regressions:
+            print(f"REGRESSION [{r['size']}] {r['bench']}: {r['baseline_s']:.4f}s -> {r['s']:.4f}s (x{r['ratio']})")
+        if regressions:
+            code = 1
+        else:
+            print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+    reports = ROOT / args.reports_dir
+    reports.mkdir(parents=True, exist_ok=True)
+    ts = datetime.now().strftime("%Y-%m-%d_%H%M%S")
+    out = reports / f"bench_{ts}.json"
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    shutil.copyfile(out, reports / "latest_bench.json")
+    print(f"\nSaved JSON:  {out}")
+    return code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+CACHE_DIR = Path(__file__).resolve().parent / ".cache"
+
+CACHE_MODES = ("off", "record", "replay")
+JUDGE_CACHE_MODES = ("off", "on", "refresh")
+
+
+class CacheMissError(RuntimeError):
+    """Raised in replay mode when a response is not in the cache."""
+
+
+def cache_dir() -> Path:
+    raw = os.getenv("EVAL_CACHE_DIR", "").strip()
+    return Path(raw) if raw else CACHE_DIR
+
+
+def cache_key(*parts: Any) -> str:
+    """Stable sha256 key of JSON-serializable parts."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _env_float(name: str) -> float | None:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return None
+    try:
+        return float(raw)
+    except ValueError as e:
+        raise ValueError(f"Invalid {name}={raw!r}: expected number") from e
+
+
+class SqliteCache:
+    """
+    Small key -> JSON value store in a SQLite file.
+
+    Entries older than max_age_s are dropped and, above max_entries, the least
+    recently used ones are evicted. Eviction runs when the cache is opened.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        table: str,
+        *,
+        max_entries: int | None = None,
+        max_age_s: float | None = None,
+    ) -> None:
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self.max_age_s = max_age_s
+        self._lock = threading.Lock()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_used_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self.evict()
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            now = time.time()
+            if self.max_age_s is not None and now - created_at > self.max_age_s:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                f"UPDATE {self.table} SET last_used_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+        return json.loads(value)
+
+    def put(self, key: str, value: Any) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created_at, last_used_at)"
+                " VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now),
+            )
+            self._conn.commit()
+
+    def evict(self) -> int:
+        """Drop expired and least recently used entries. Returns number of removed rows."""
+        removed = 0
+        with self._lock:
+            if self.max_age_s is not None:
+                cur = self._conn.execute(
+                    f"DELETE FROM {self.table} WHERE created_at < ?",
+                    (time.time() - self.max_age_s,),
+                )
+                removed += cur.rowcount
+            if self.max_entries is not None:
+                cur = self._conn.execute(
+                    f"DELETE FROM {self.table} WHERE key NOT IN ("
+                    f" SELECT key FROM {self.table} ORDER BY last_used_at DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+                removed += cur.rowcount
+            self._conn.commit()
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def response_cache_mode() -> str:
+    """
+    Return SUT response cache mode from EVAL_CACHE_MODE env var:
+    - off (default): always call the model,
+    - record: serve cached responses, call the model and store on miss,
+    - replay: serve cached responses only, a miss raises CacheMissError.
+    """
+    mode = os.getenv("EVAL_CACHE_MODE", "").strip().lower() or "off"
+    if mode not in CACHE_MODES:
+        raise ValueError(f"Invalid EVAL_CACHE_MODE={mode!r}: expected one of {CACHE_MODES}")
+    return mode
+
+
+_caches: dict[str, SqliteCache] = {}
+_caches_lock = threading.Lock()
+
+
+def _open_cache(filename: str, table: str) -> SqliteCache:
+    with _caches_lock:
+        cache = _caches.get(table)
+        if cache is None:
+            max_entries = _env_float("EVAL_CACHE_MAX_ENTRIES")
+            max_age_days = _env_float("EVAL_CACHE_MAX_AGE_DAYS")
+            cache = SqliteCache(
+                cache_dir() / filename,
+                table,
+                max_entries=int(max_entries) if max_entries is not None else None,
+                max_age_s=max_age_days * 86400 if max_age_days is not None else None,
+            )
+            _caches[table] = cache
+        return cache
+
+
+def response_cache() -> SqliteCache:
+    """Process-wide SUT response cache (opened on first use)."""
+    return _open_cache("responses.sqlite", "responses")
+
+
+def judge_cache_mode() -> str:
+    """
+    Return judge verdict cache mode from EVAL_JUDGE_CACHE env var:
+    - off (default): always run the judge metric,
+    - on: reuse stored score/reason, run the metric and store on miss,
+    - refresh: ignore stored verdicts, run the metric and overwrite them.
+    """
+    mode = os.getenv("EVAL_JUDGE_CACHE", "").strip().lower() or "off"
+    if mode not in JUDGE_CACHE_MODES:
+        raise ValueError(f"Invalid EVAL_JUDGE_CACHE={mode!r}: expected one of {JUDGE_CACHE_MODES}")
+    return mode
+
+
+def judge_cache() -> SqliteCache:
+    """Process-wide judge verdict cache (opened on first use)."""
+    return _open_cache("judge.sqlite", "judge_verdicts")
@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import statistics
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from evals.datasets.index import iter_cases
+from evals.datasets.loaders import read_row
+from evals.generation import generate_samples, prefetch, prefetching, samples, streaming, submit, warm
+from evals.golden import token_f1
+from evals.incremental import fingerprint, previous_report, record_reuse, reusable
+from evals.judge import JUDGE_METRIC, evaluate
+from evals.local_bielik import Endpoint, Generation
+from evals.prefix import prefix_order
+from evals.rules import EarlyStop, compile_rules, early_stop_for
+from evals.shard import select_shard
+
+DEFAULT_F1_THRESHOLD = 0.40
+DEFAULT_JUDGE_THRESHOLD = 0.60
+
+TEST_TYPES = ("rules", "golden", "judge")
+# extra key with the numeric score of a sample, per test type
+SCORE_KEYS = {"golden": "f1", "judge": "judge_score"}
+
+
+@dataclass
+class CaseResult:
+    """Outcome of one eval case: extra for the report and first failure message (None = pass)."""
+    extra: dict[str, Any]
+    failure: str | None = None
+    output: str | None = None
+    fingerprint: str | None = None
+
+
+def load_cases(test_type: str) -> list[dict]:
+    """
+    Collect cases of one test type (rules/golden/judge) from all allowed test sets.
+
+    Cases come from the cached dataset index (see evals.datasets.index) and keep
+    only a lightweight reference (file, byte offset, line, id); use case_row() to
+    read the row itself. Rules cases also carry their pre-validated rule spec.
+    With EVAL_SHARD set only this shard's cases are returned.
+    """
+    cases: list[dict] = []
+    for test_set, path, entry in iter_cases(test_type):
+        case = {
+            "test_set": test_set,
+            "dataset": path.name,
+            "path": str(path),
+            "offset": entry.offset,
+            "line": entry.line,
+            "id": entry.id,
+        }
+        if entry.rules is not None:
+            case["rules"] = entry.rules
+        cases.append(case)
+    return select_shard(cases, [case_id(case, test_type) for case in cases])
+
+
+# rows read by prefetch workers, handed over to case_row() when the case runs
+_prefetched: dict[tuple[str, int], Future[dict]] = {}
+_prefetched_lock = threading.Lock()
+
+
+def case_row(case: dict) -> dict:
+    """Dataset row of a case reference (from its prefetch worker, if any)."""
+    with _prefetched_lock:
+        fut = _prefetched.pop((case["path"], case["line"]), None)
+    if fut is not None:
+        return fut.result()
+    return read_row(Path(case["path"]), case["offset"], case["line"])
+
+
+def case_early_stop(test_type: str, row: dict) -> EarlyStop | None:
+    """Early stop spec of a case when rules outputs are streamed (EVAL_STREAMING)."""
+    return early_stop_for(row) if test_type == "rules" and streaming() else None
+
+
+def case_requests(plan: Iterable[tuple[str, dict]], judge_model: str | None = None) -> Iterator[tuple[str, EarlyStop | None]]:
+    """
+    (prompt, early_stop) of the planned (test type, case) pairs that need a
+    generation; rows are read one at a time and not kept. Judge cases are
+    skipped without a judge model.
+    """
+    for test_type, case in plan:
+        if test_type == "judge" and not judge_model:
+            continue
+        row = case_row(case)
+        early_stop = case_early_stop(test_type, row)
+        case_judge = judge_model if test_type == "judge" else None
+        if row.get("input") and not is_carried_forward(test_type, case, row, early_stop, case_judge):
+            yield row["input"], early_stop
+
+
+def _prefetch_case(test_type: str, case: dict, judge_model: str | None) -> dict:
+    row = read_row(Path(case["path"]), case["offset"], case["line"])
+    early_stop = case_early_stop(test_type, row)
+    case_judge = judge_model if test_type == "judge" else None
+    if row.get("input") and not is_carried_forward(test_type, case, row, early_stop, case_judge):
+        warm(row["input"], early_stop)
+    return row
+
+
+def prefetch_cases(plan: list[tuple[str, dict]], judge_model: str | None = None) -> int:
+    """
+    Generate the outputs of the planned (test type, case) pairs ahead of the
+    cases (EVAL_CONCURRENCY > 1 or EVAL_PREFIX_ORDER). Without prefetching nothing
+    is read and 0 is returned. Each worker reads its case's row and passes it to
+    case_row(); prefix order needs every prompt to sort them, so those rows are
+    read up front. Returns the number of submitted cases.
+    """
+    if not plan or not prefetching():
+        return 0
+    if prefix_order():
+        return prefetch(case_requests(plan, judge_model))
+    plan = [(t, c) for t, c in plan if t != "judge" or judge_model]
+    for test_type, case in plan:
+        fut = submit(_prefetch_case, test_type, case, judge_model)
+        with _prefetched_lock:
+            _prefetched[(case["path"], case["line"])] = fut
+    return len(plan)
+
+
+def case_id(case: dict, test_type: str) -> str:
+    return f"{case['test_set']}::{test_type}::{case['id']}"
+
+
+def check_rules(
+    case: dict,
+    row: dict,
+    gen: Generation,
+    early_stop: EarlyStop | None = None,
+) -> CaseResult:
+    out = gen.text
+    extra = {
+        "test_set": case["test_set"],
+        "dataset": case["dataset"],
+        "type": "rules",
+        "must_contain_any": row.get("must_contain_any", []),
+        "must_not_contain_any": row.get("must_not_contain_any", []),
+        "must_contain_word": row.get("must_contain_word", []),
+        "must_not_contain_word": row.get("must_not_contain_word", []),
+        "must_match_regex": row.get("must_match_regex"),
+        "max_length": row.get("max_length"),
+        # Set when the streamed output was (or would have been) cut short
+        # because this rule already failed.
+        "stopped_early": early_stop.check(out) if early_stop else None,
+        **gen.metrics(),
+    }
+    rules = case.get("rules") or compile_rules(row)
+    return CaseResult(extra, rules.check(out, extra["stopped_early"]))
+
+
+def check_golden(case: dict, row: dict, gen: Generation) -> CaseResult:
+    out = gen.text
+    expected = row["expected"]
+    threshold = float(row.get("f1_threshold", DEFAULT_F1_THRESHOLD))
+    f1, p, r = token_f1(out, expected)
+
+    extra = {
+        "test_set": case["test_set"],
+        "dataset": case["dataset"],
+        "type": "golden",
+        "expected": expected,
+        "f1": round(f1, 4),
+        "precision": round(p, 4),
+        "recall": round(r, 4),
+        "threshold": threshold,
+        **gen.metrics(),
+    }
+    if not out.strip():
+        return CaseResult(extra, "Model returned empty output")
+    if f1 < threshold:
+        return CaseResult(extra, f"Golden mismatch: f1={f1:.3f} < threshold={threshold:.3f}")
+    return CaseResult(extra)
+
+
+def check_judge(case: dict, row: dict, gen: Generation, judge_model: str) -> CaseResult:
+    out = gen.text
+    notes = row.get("notes")
+    threshold = float(row.get("threshold", DEFAULT_JUDGE_THRESHOLD))
+    verdict = evaluate(row["input"], out, notes=notes, threshold=threshold, model_name=judge_model)
+
+    extra = {
+        "test_set": case["test_set"],
+        "dataset": case["dataset"],
+        "type": "judge",
+        "notes": notes,
+        "judge_model": judge_model,
+        "judge_metric": JUDGE_METRIC,
+        "judge_score": round(verdict.score, 4),
+        "judge_threshold": verdict.threshold,
+        "judge_reason": verdict.reason,
+        "judge_cached": verdict.cached,
+        "judge_latency_s": round(verdict.wall_s, 4) if verdict.wall_s is not None else None,
+        **gen.metrics(),
+    }
+    if verdict.score < verdict.threshold:
+        return CaseResult(extra, str(verdict.reason))
+    return CaseResult(extra)
+
+
+def is_carried_forward(
+    test_type: str,
+    case: dict,
+    row: dict,
+    early_stop: EarlyStop | None = None,
+    judge_model: str | None = None,
+    endpoint: Endpoint | None = None,
+) -> bool:
+    """True if an incremental run will reuse the previous result (no generation needed)."""
+    fp = fingerprint(test_type, row, early_stop, judge_model, endpoint, samples())
+    return reusable(case_id(case, test_type), fp) is not None
+
+
+def _check(
+    test_type: str,
+    case: dict,
+    row: dict,
+    gen: Generation,
+    early_stop: EarlyStop | None,
+    judge_model: str | None,
+) -> CaseResult:
+    if test_type == "rules":
+        result = check_rules(case, row, gen, early_stop)
+    elif test_type == "golden":
+        result = check_golden(case, row, gen)
+    else:
+        result = check_judge(case, row, gen, judge_model)
+    return replace(result, output=gen.text)
+
+
+def combine_samples(cid: str, test_type: str, results: list[CaseResult]) -> CaseResult:
+    """
+    One result from the results of k sampled outputs: the first sample's verdict,
+    output and extra plus a "samples" summary (pass@k, pass rate, outcome variance,
+    score stats, flaky). The other samples are reported, they do not change the verdict.
+    """
+    k = len(results)
+    passed = sum(r.failure is None for r in results)
+    rate = passed / k
+    summary: dict[str, Any] = {
+        "case_id": cid,
+        "k": k,
+        "passed": passed,
+        "pass_rate": round(rate, 4),
+        "pass_at_k": 1.0 if passed else 0.0,
+        "variance": round(rate * (1 - rate), 4),
+        "flaky": 0 < passed < k,
+        "outputs": [r.output for r in results],
+        "failures": [r.failure for r in results],
+    }
+    key = SCORE_KEYS.get(test_type)
+    scores = [r.extra[key] for r in results if key and isinstance(r.extra.get(key), (int, float))]
+    if scores:
+        summary["scores"] = scores
+        summary["score_mean"] = round(statistics.fmean(scores), 4)
+        summary["score_variance"] = round(statistics.pvariance(scores), 4)
+
+    first = results[0]
+    return CaseResult({**first.extra, "samples": summary}, first.failure, first.output)
+
+
+def evaluate_case(
+    test_type: str,
+    case: dict,
+    row: dict,
+    early_stop: EarlyStop | None = None,
+    judge_model: str | None = None,
+    endpoint: Endpoint | None = None,
+) -> CaseResult:
+    """
+    Generate the SUT output for a case (default SUT, or endpoint) and check it.
+    With EVAL_SAMPLES=k > 1 every one of the k outputs is checked, see combine_samples().
+    In an incremental run (EVAL_INCREMENTAL) a case with an unchanged fingerprint
+    gets its previous result instead, marked with carried_forward=True in extra.
+    """
+    k = samples()
+    fp = fingerprint(test_type, row, early_stop, judge_model, endpoint, k)
+    if previous_report() is not None:
+        prior = reusable(case_id(case, test_type), fp)
+        record_reuse(prior is not None)
+        if prior is not None:
+            extra = {**prior.extra, "carried_forward": True}
+            return CaseResult(extra, prior.failure, prior.output, fp)
+
+    gens = generate_samples(row["input"], early_stop, endpoint)
+    results = [_check(test_type, case, row, gen, early_stop, judge_model) for gen in gens]
+    result = results[0] if len(results) == 1 else combine_samples(case_id(case, test_type), test_type, results)
+    return replace(result, fingerprint=fp)
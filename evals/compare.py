@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import json
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+from evals.checks import SCORE_KEYS, case_early_stop, case_id, case_row, evaluate_case, load_cases
+from evals.generation import shutdown
+from evals.html_report import write_comparison_html
+from evals.judge import judge_model_name
+from evals.local_bielik import Endpoint
+from evals.perf import perf_summary, record_startup
+from evals.phases import run_sut_phase, start_judge_phase, unload
+from evals.rules import EarlyStop
+from evals.run_stats import snapshot
+
+EXIT_OK = 0
+EXIT_ERRORS = 1
+EXIT_NO_TESTS = 5
+
+
+def _pass_rate(counts: Counter[str]) -> float | None:
+    decided = counts["passed"] + counts["failed"]
+    return round(counts["passed"] / decided, 4) if decided else None
+
+
+def _delta(value: float | None, base: float | None) -> float | None:
+    if value is None or base is None:
+        return None
+    return round(value - base, 4)
+
+
+def _rates(groups: dict[str, Counter[str]], base: dict[str, Counter[str]]) -> dict[str, Any]:
+    out: dict[str, Any] = {}
+    for key, counts in sorted(groups.items()):
+        rate = _pass_rate(counts)
+        out[key] = {"pass_rate": rate, "delta": _delta(rate, _pass_rate(base.get(key, Counter())))}
+    return out
+
+
+def compare_case(
+    test_type: str,
+    case: dict,
+    row: dict,
+    early_stop: EarlyStop | None,
+    endpoint: Endpoint,
+    judge_model: str | None,
+) -> dict[str, Any]:
+    """Verdict of one case for one model (outcome, failure, output, score, extra)."""
+    if test_type == "judge" and not judge_model:
+        return {"outcome": "skipped", "failure": None, "output": None, "score": None, "extra": None}
+    try:
+        result = evaluate_case(test_type, case, row, early_stop, judge_model, endpoint)
+    except Exception as e:
+        return {"outcome": "error", "failure": repr(e), "output": None, "score": None, "extra": None}
+    return {
+        "outcome": "passed" if result.failure is None else "failed",
+        "failure": result.failure,
+        "output": result.output,
+        "score": result.extra.get(SCORE_KEYS.get(test_type, ""), None),
+        "extra": result.extra,
+    }
+
+
+def run_compare(
+    test_types: list[str],
+    endpoints: list[Endpoint],
+    json_path: Path,
+    html_path: Path,
+) -> int:
+    """
+    Run the selected suites against several SUT models in one pass over the datasets.
+
+    Cases are loaded once; generations are scheduled model by model (load, generate
+    everything, unload) so Ollama never swaps models between cases; the judge runs
+    once at the end. Writes one comparison report (JSON + HTML) with per-case
+    side-by-side verdicts, pass rates and their deltas against the first model, and
+    latency/throughput per model.
+    """
+    started = time.time()
+    judge_model = judge_model_name()
+    labels = [e.label for e in endpoints]
+
+    plan = [(test_type, case) for test_type in test_types for case in load_cases(test_type)]
+    print(f"collected {len(plan)} cases x {len(endpoints)} models")
+    record_startup()
+
+    # prompts only: rows are read again, one at a time, when the cases are checked
+    requests = []
+    for test_type, case in plan:
+        if test_type != "judge" or judge_model:
+            row = case_row(case)
+            requests.append((row["input"], case_early_stop(test_type, row)))
+    generation_s: dict[str, float] = {}
+    for endpoint in endpoints:
+        print(f"SUT phase [{endpoint.label}]: generating {len(requests)} outputs")
+        t0 = time.perf_counter()
+        run_sut_phase(requests, endpoint)
+        generation_s[endpoint.label] = time.perf_counter() - t0
+        unload(endpoint)
+    if judge_model and "judge" in test_types:
+        print(f"Judge phase: loading {judge_model}")
+        start_judge_phase(judge_model, endpoints[-1])
+
+    cases: list[dict[str, Any]] = []
+    counts: dict[str, Counter[str]] = {label: Counter() for label in labels}
+    by_type: dict[str, dict[str, Counter[str]]] = {label: {} for label in labels}
+    by_set: dict[str, dict[str, Counter[str]]] = {label: {} for label in labels}
+    samples: dict[str, list[dict[str, Any]]] = {label: [] for label in labels}
+    try:
+        for test_type, case in plan:
+            row = case_row(case)
+            early_stop = case_early_stop(test_type, row)
+            results: dict[str, dict[str, Any]] = {}
+            for endpoint in endpoints:
+                res = compare_case(test_type, case, row, early_stop, endpoint, judge_model)
+                label = endpoint.label
+                counts[label][res["outcome"]] += 1
+                by_type[label].setdefault(test_type, Counter())[res["outcome"]] += 1
+                by_set[label].setdefault(case["test_set"], Counter())[res["outcome"]] += 1
+                if res["extra"] is not None:
+                    samples[label].append(res["extra"])
+                results[label] = {k: v for k, v in res.items() if k != "extra"}
+            outcomes = {r["outcome"] for r in results.values()}
+            cases.append(
+                {
+                    "case_id": case_id(case, test_type),
+                    "type": test_type,
+                    "test_set": case["test_set"],
+                    "prompt": row.get("input"),
+                    "agree": len(outcomes) == 1,
+                    "results": results,
+                }
+            )
+    finally:
+        shutdown()
+
+    base = labels[0]
+    models: dict[str, Any] = {}
+    for endpoint in endpoints:
+        label = endpoint.label
+        perf = perf_summary(samples[label])["overall"]
+        gen_s = generation_s[label]
+        rate = _pass_rate(counts[label])
+        flips: Counter[str] = Counter()
+        for c in cases:
+            before, after = c["results"][base]["outcome"], c["results"][label]["outcome"]
+            if before == "passed" and after == "failed":
+                flips["regressions"] += 1
+            elif before == "failed" and after == "passed":
+                flips["improvements"] += 1
+        models[label] = {
+            "model": endpoint.model,
+            "base_url": endpoint.base_url,
+            "summary": dict(counts[label]),
+            "pass_rate": rate,
+            "pass_rate_delta": _delta(rate, _pass_rate(counts[base])),
+            "by_type": _rates(by_type[label], by_type[base]),
+            "by_set": _rates(by_set[label], by_set[base]),
+            "regressions_vs_baseline": flips["regressions"],
+            "improvements_vs_baseline": flips["improvements"],
+            "generation_s": round(gen_s, 3),
+            "generation_tokens_per_s": (
+                round(perf["completion_tokens"] / gen_s, 2) if gen_s and perf["completion_tokens"] else None
+            ),
+            "perf": perf,
+        }
+
+    report = {
+        "created": started,
+        "duration": time.time() - started,
+        "baseline": base,
+        "models": models,
+        "disagreements": sum(1 for c in cases if not c["agree"]),
+        "eval_stats": snapshot(),
+        "cases": cases,
+    }
+    json_path.write_text(json.dumps(report, ensure_ascii=False, default=str), encoding="utf-8")
+    write_comparison_html(report, html_path)
+
+    for label, m in models.items():
+        delta = m["pass_rate_delta"]
+        print(
+            f"{label}: pass_rate={m['pass_rate']}"
+            + (f" ({delta:+.4f} vs {base})" if delta is not None and label != base else "")
+            + f", p50 latency={(m['perf']['latency_s'] or {}).get('p50')}s"
+            + f", tokens/s={m['generation_tokens_per_s']}"
+        )
+    print(f"{report['disagreements']} case(s) with different verdicts")
+
+    if not plan:
+        return EXIT_NO_TESTS
+    if any(c["error"] for c in counts.values()):
+        return EXIT_ERRORS
+    return EXIT_OK
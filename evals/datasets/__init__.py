@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import fnmatch
 import os
 from pathlib import Path
 from typing import Iterator
@@ -18,19 +19,76 @@ def allowed_sets() -> set[str] | None:
     return {s.strip() for s in raw.split(",") if s.strip()}
 
 
-def iter_datasets(filename: str) -> Iterator[tuple[str, Path]]:
+def _env_list(name: str) -> list[str]:
+    raw = os.getenv(name, "").strip()
+    return [s.strip() for s in raw.split(",") if s.strip()]
+
+
+def case_id_globs() -> list[str]:
+    """Case id glob patterns from EVAL_CASE_IDS (e.g. "pl_rules_*,cs_golden_0?"); empty = all."""
+    return _env_list("EVAL_CASE_IDS")
+
+
+def selected_tags() -> set[str]:
+    """Tags from EVAL_TAGS; a case is selected if it has any of them. Empty = all."""
+    return set(_env_list("EVAL_TAGS"))
+
+
+def case_selected(case_id: str, tags: tuple[str, ...] | list[str]) -> bool:
+    """Apply EVAL_CASE_IDS / EVAL_TAGS filters to one case."""
+    globs = case_id_globs()
+    if globs and not any(fnmatch.fnmatchcase(case_id, g) for g in globs):
+        return False
+    wanted = selected_tags()
+    if wanted and wanted.isdisjoint(tags):
+        return False
+    return True
+
+
+COMPRESSION_SUFFIXES = ("", ".gz", ".zst")
+
+
+def dataset_files(test_set_dir: Path, filename: str) -> list[Path]:
     """
-    Iterate over dataset directories yielding (test_set_name, file_path)
-    for each directory that contains the specified file.
+    Files of one dataset in a test set directory, e.g. for "rules.jsonl":
+    rules.jsonl, rules.jsonl.gz, rules.jsonl.zst and shards rules-*.jsonl[.gz|.zst].
     """
+    stem, _, ext = filename.partition(".")
+    files: list[Path] = []
+    for comp in COMPRESSION_SUFFIXES:
+        path = test_set_dir / f"{filename}{comp}"
+        if path.exists():
+            files.append(path)
+    for comp in COMPRESSION_SUFFIXES:
+        files.extend(sorted(test_set_dir.glob(f"{stem}-*.{ext}{comp}")))
+    return files
+
+
+def datasets_dir() -> Path:
+    """Root with one directory per test set (EVAL_DATASETS_DIR, default evals/datasets)."""
+    raw = os.getenv("EVAL_DATASETS_DIR", "").strip()
+    return Path(raw) if raw else DATASETS_DIR
+
+
+def iter_set_dirs() -> Iterator[Path]:
+    """Dataset directories (sorted by name) allowed by EVAL_SETS."""
     allowed = allowed_sets()
-    if not DATASETS_DIR.exists():
+    root = datasets_dir()
+    if not root.exists():
         return
-    for test_set_dir in DATASETS_DIR.iterdir():
-        if not test_set_dir.is_dir():
+    for test_set_dir in sorted(root.iterdir()):
+        if not test_set_dir.is_dir() or test_set_dir.name.startswith(("_", ".")):
             continue
         if allowed is not None and test_set_dir.name not in allowed:
             continue
-        path = test_set_dir / filename
-        if path.exists():
+        yield test_set_dir
+
+
+def iter_datasets(filename: str) -> Iterator[tuple[str, Path]]:
+    """
+    Iterate over dataset directories (sorted by name) yielding
+    (test_set_name, file_path) for each file of the dataset, see dataset_files().
+    """
+    for test_set_dir in iter_set_dirs():
+        for path in dataset_files(test_set_dir, filename):
             yield test_set_dir.name, path
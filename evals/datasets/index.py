@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+from evals.cache import cache_dir
+from evals.datasets import case_id_globs, case_selected, dataset_files, iter_set_dirs, selected_tags
+from evals.datasets.loaders import iter_jsonl_offsets
+from evals.rules import CompiledRules, compile_rules
+
+# Bump when IndexEntry (or anything else pickled in the index) changes.
+# CompiledRules pickle as raw specs and are compiled again on load.
+INDEX_VERSION = 2
+
+DATASET_KINDS = ("rules", "golden", "judge")
+
+
+@dataclass(frozen=True)
+class IndexEntry:
+    """Reference to one dataset row plus what collection/filtering needs from it."""
+    line: int
+    offset: int
+    id: str
+    tags: tuple[str, ...] = ()
+    rules: CompiledRules | None = None
+
+
+@dataclass
+class FileIndex:
+    mtime_ns: int
+    size: int
+    sha256: str
+    entries: list[IndexEntry]
+
+
+def use_index() -> bool:
+    """EVAL_INDEX=0 disables the on-disk index (rows are scanned on every run)."""
+    return os.getenv("EVAL_INDEX", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def index_path(test_set_dir: Path) -> Path:
+    where = hashlib.sha256(str(test_set_dir.resolve()).encode("utf-8")).hexdigest()[:12]
+    return cache_dir() / "index" / f"{test_set_dir.name}-{where}.pkl"
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _row_tags(row: dict, path: Path, line: int) -> tuple[str, ...]:
+    tags = row.get("tags") or []
+    if isinstance(tags, str):
+        tags = [tags]
+    if not isinstance(tags, list) or not all(isinstance(t, str) for t in tags):
+        raise ValueError(f"{path} line {line}: 'tags' must be a list of strings")
+    return tuple(tags)
+
+
+def _build_entries(path: Path, kind: str) -> list[IndexEntry]:
+    """Scan one dataset file; rules specs are validated (and compiled) here."""
+    entries: list[IndexEntry] = []
+    for line, offset, row in iter_jsonl_offsets(path):
+        entries.append(
+            IndexEntry(
+                line=line,
+                offset=offset,
+                id=str(row.get("id", "no_id")),
+                tags=_row_tags(row, path, line),
+                rules=compile_rules(row) if kind == "rules" else None,
+            )
+        )
+    return entries
+
+
+def _load(path: Path) -> dict[str, FileIndex]:
+    try:
+        with path.open("rb") as f:
+            data = pickle.load(f)
+    except Exception:
+        return {}
+    if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+        return {}
+    return data.get("files", {})
+
+
+def _save(path: Path, files: dict[str, FileIndex]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with tmp.open("wb") as f:
+        pickle.dump({"version": INDEX_VERSION, "files": files}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+_memo: dict[Path, dict[str, FileIndex]] = {}
+
+
+def directory_index(test_set_dir: Path) -> dict[str, FileIndex]:
+    """
+    Index of all rules/golden/judge files of one test set directory, keyed by file name.
+
+    Loaded from the cached index file; a file is re-scanned only when its mtime/size
+    changed and its content hash no longer matches. The index file is rewritten when
+    anything changed.
+    """
+    if test_set_dir in _memo:
+        return _memo[test_set_dir]
+
+    enabled = use_index()
+    path = index_path(test_set_dir)
+    cached = _load(path) if enabled else {}
+    files: dict[str, FileIndex] = {}
+    changed = False
+    for kind in DATASET_KINDS:
+        for file in dataset_files(test_set_dir, f"{kind}.jsonl"):
+            st = file.stat()
+            old = cached.get(file.name)
+            if old is not None and (old.mtime_ns, old.size) == (st.st_mtime_ns, st.st_size):
+                files[file.name] = old
+                continue
+            digest = _sha256(file)
+            if old is not None and old.sha256 == digest:
+                entries = old.entries
+            else:
+                entries = _build_entries(file, kind)
+            files[file.name] = FileIndex(st.st_mtime_ns, st.st_size, digest, entries)
+            changed = True
+    if set(files) != set(cached):
+        changed = True
+
+    if enabled and changed:
+        try:
+            _save(path, files)
+        except OSError as e:
+            print(f"Warning: could not write dataset index {path}: {e}")
+    _memo[test_set_dir] = files
+    return files
+
+
+def indexed_files(test_set_dir: Path, kind: str) -> list[tuple[Path, list[IndexEntry]]]:
+    """(file, entries) for each file of one dataset kind, in dataset_files() order."""
+    files = directory_index(test_set_dir)
+    return [
+        (file, files[file.name].entries)
+        for file in dataset_files(test_set_dir, f"{kind}.jsonl")
+        if file.name in files
+    ]
+
+
+def iter_cases(kind: str) -> Iterator[tuple[str, Path, IndexEntry]]:
+    """(test_set, file, entry) for every case of one kind selected by EVAL_SETS/EVAL_CASE_IDS/EVAL_TAGS."""
+    filtered = bool(case_id_globs() or selected_tags())
+    for test_set_dir in iter_set_dirs():
+        for file, entries in indexed_files(test_set_dir, kind):
+            for entry in entries:
+                if not filtered or case_selected(entry.id, entry.tags):
+                    yield test_set_dir.name, file, entry
@@ -1,16 +1,110 @@
+import gzip
+import io
 import json
+import threading
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import IO, Any, Dict, Iterator, List, Tuple
 
-def load_jsonl(path: Path) -> List[Dict[str, Any]]:
-    rows: List[Dict[str, Any]] = []
-    text = path.read_text(encoding="utf-8")
-    for i, line in enumerate(text.splitlines(), start=1):
-        line = line.strip()
-        if not line or line.startswith("#"):
-            continue
+COMPRESSED_SUFFIXES = (".gz", ".zst")
+# decompressed streams kept open by read_row
+MAX_OPEN_STREAMS = 8
+
+
+def _open_binary(path: Path) -> IO[bytes]:
+    """Open plain, .gz or .zst file for binary reading (decompressed stream)."""
+    if path.suffix == ".gz":
+        return gzip.open(path, "rb")
+    if path.suffix == ".zst":
         try:
-            rows.append(json.loads(line))
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid JSONL at {path} line {i}: {e}") from e
-    return rows
+            import zstandard
+        except ImportError as e:
+            raise ImportError(f"Reading {path} requires the 'zstandard' package") from e
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(path.open("rb")))
+    return path.open("rb")
+
+
+def _parse(raw: bytes, path: Path, line_no: int) -> Dict[str, Any] | None:
+    line = raw.decode("utf-8").strip()
+    if not line or line.startswith("#"):
+        return None
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSONL at {path} line {line_no}: {e}") from e
+
+
+def iter_jsonl_offsets(path: Path) -> Iterator[Tuple[int, int, Dict[str, Any]]]:
+    """
+    Stream rows of a JSONL file (.jsonl, .jsonl.gz, .jsonl.zst) line by line.
+    Yields (line_no, byte_offset, row); offsets are in the decompressed stream.
+    """
+    offset = 0
+    with _open_binary(path) as f:
+        for line_no, raw in enumerate(f, start=1):
+            row = _parse(raw, path, line_no)
+            if row is not None:
+                yield line_no, offset, row
+            offset += len(raw)
+
+
+def iter_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
+    for _, _, row in iter_jsonl_offsets(path):
+        yield row
+
+
+def load_jsonl(path: Path) -> List[Dict[str, Any]]:
+    return list(iter_jsonl(path))
+
+
+class _Cursor:
+    """Open decompressed stream of a compressed file and the line it is at."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.f = _open_binary(path)
+        self.line = 1
+
+    def readline(self, line_no: int) -> bytes:
+        if line_no < self.line:
+            # compressed streams only go forward: start over
+            self.f.close()
+            self.f = _open_binary(self.path)
+            self.line = 1
+        while self.line < line_no and self.f.readline():
+            self.line += 1
+        raw = self.f.readline()
+        self.line += 1
+        return raw
+
+
+_cursors: Dict[Path, _Cursor] = {}
+_cursors_lock = threading.Lock()
+
+
+def _read_compressed(path: Path, line_no: int) -> bytes:
+    """
+    Line of a .gz/.zst file from a stream kept open between calls, so reading rows
+    in file order decompresses the file once instead of once per row.
+    """
+    with _cursors_lock:
+        cursor = _cursors.pop(path, None)
+        if cursor is None:
+            if len(_cursors) >= MAX_OPEN_STREAMS:
+                _cursors.pop(next(iter(_cursors))).f.close()
+            cursor = _Cursor(path)
+        _cursors[path] = cursor  # most recently used last
+        return cursor.readline(line_no)
+
+
+def read_row(path: Path, offset: int, line_no: int) -> Dict[str, Any]:
+    """Read a single row back from its (offset, line_no) reference."""
+    if path.suffix in COMPRESSED_SUFFIXES:
+        raw = _read_compressed(path, line_no)
+    else:
+        with path.open("rb") as f:
+            f.seek(offset)
+            raw = f.readline()
+    row = _parse(raw, path, line_no)
+    if row is None:
+        raise ValueError(f"No JSONL row at {path} line {line_no}")
+    return row
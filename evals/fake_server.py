@@ -0,0 +1,485 @@
+"""
+Stand-in for an OpenAI-compatible model server (Ollama, llama.cpp, vLLM).
+
+Serves /v1/chat/completions (plain and streamed, with usage), /v1/models and
+Ollama's /api/generate (keep_alive load/unload), with configurable latency,
+token rate, error injection and canned responses. Point OPENAI_BASE_URL at it
+to measure the harness's own overhead (scheduler, cache, reports) without a GPU
+or to reproduce server misbehaviour deterministically:
+
+    python -m evals.fake_server --port 11435 --latency uniform:0.05:0.3 --error-rate 0.05
+    python -m evals.run_tests --fast --fake-server
+"""
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Iterator
+
+DEFAULT_RESPONSE = "To jest odpowiedź testowa."
+# fixed, so the response cache (keyed by base_url) replays across --fake-server runs
+DEFAULT_PORT = 11435
+LATENCY_KINDS = ("fixed", "uniform", "lognormal")
+
+
+@dataclasses.dataclass(frozen=True)
+class Latency:
+    """
+    Time before the first token.
+
+    fixed:A (always A s), uniform:A:B (between A and B s), lognormal:A:S (median A s,
+    shape S – a long right tail like a loaded GPU).
+    """
+    kind: str = "fixed"
+    a: float = 0.0
+    b: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> Latency:
+        parts = spec.strip().split(":")
+        if len(parts) == 1:
+            parts = ["fixed", parts[0]]
+        kind, *values = parts
+        if kind not in LATENCY_KINDS or len(values) != (1 if kind == "fixed" else 2):
+            raise ValueError(
+                f"Invalid latency {spec!r}: expected A, fixed:A, uniform:A:B or lognormal:MEDIAN:SIGMA"
+            )
+        try:
+            numbers = [float(v) for v in values]
+        except ValueError as e:
+            raise ValueError(f"Invalid latency {spec!r}: {e}") from e
+        return cls(kind, numbers[0], numbers[1] if len(numbers) > 1 else 0.0)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "uniform":
+            return rng.uniform(self.a, self.b)
+        if self.kind == "lognormal":
+            return self.a * math.exp(rng.gauss(0.0, self.b)) if self.a > 0 else 0.0
+        return self.a
+
+
+@dataclasses.dataclass(frozen=True)
+class FakeConfig:
+    latency: Latency = Latency()
+    # completion speed; 0 = the whole completion right after the first-token latency
+    tokens_per_s: float = 0.0
+    # fraction of requests answered with error_status / left hanging for hang_s
+    error_rate: float = 0.0
+    error_status: int = 500
+    timeout_rate: float = 0.0
+    hang_s: float = 600.0
+    # the first fail_first completion requests fail (server still starting up, ...)
+    fail_first: int = 0
+    # JSON {key: output} or JSONL rows {"id"|"input": ..., "output": ...}; keys are
+    # case ids (set::type::id), row ids or prompts. "golden" answers with the
+    # dataset row's expected answer.
+    responses: str | None = None
+    default_response: str = DEFAULT_RESPONSE
+    # fraction of choices answered with default_response instead of the canned
+    # response: sampling noise for multi-sample (n > 1) runs
+    miss_rate: float = 0.0
+    # llama.cpp-like prompt cache: each of `slots` slots keeps the last prompt and
+    # only the new suffix is prefilled, at prefill_tokens_per_s (0 = instant)
+    slots: int = 1
+    prefill_tokens_per_s: float = 0.0
+    seed: int = 0
+
+    @classmethod
+    def from_env(cls) -> FakeConfig:
+        """Config from EVAL_FAKE_* env vars (see README)."""
+        env = os.environ
+        return cls(
+            latency=Latency.parse(env.get("EVAL_FAKE_LATENCY", "0")),
+            tokens_per_s=float(env.get("EVAL_FAKE_TOKENS_PER_S", 0)),
+            error_rate=float(env.get("EVAL_FAKE_ERROR_RATE", 0)),
+            error_status=int(env.get("EVAL_FAKE_ERROR_STATUS", 500)),
+            timeout_rate=float(env.get("EVAL_FAKE_TIMEOUT_RATE", 0)),
+            hang_s=float(env.get("EVAL_FAKE_HANG_S", 600)),
+            fail_first=int(env.get("EVAL_FAKE_FAIL_FIRST", 0)),
+            responses=env.get("EVAL_FAKE_RESPONSES") or None,
+            default_response=env.get("EVAL_FAKE_DEFAULT_RESPONSE", DEFAULT_RESPONSE),
+            miss_rate=float(env.get("EVAL_FAKE_MISS_RATE", 0)),
+            slots=int(env.get("EVAL_FAKE_SLOTS", 1)),
+            prefill_tokens_per_s=float(env.get("EVAL_FAKE_PREFILL_TOKENS_PER_S", 0)),
+            seed=int(env.get("EVAL_FAKE_SEED", 0)),
+        )
+
+
+def fake_port() -> int:
+    """Port of the fake server (EVAL_FAKE_PORT, default 11435)."""
+    raw = os.getenv("EVAL_FAKE_PORT", "").strip()
+    try:
+        return int(raw) if raw else DEFAULT_PORT
+    except ValueError as e:
+        raise ValueError(f"Invalid EVAL_FAKE_PORT={raw!r}: expected integer") from e
+
+
+def _dataset_prompts() -> Iterator[tuple[str, list[str], dict[str, Any]]]:
+    """(prompt, [case id, row id], row) of every dataset row."""
+    from evals.datasets import iter_datasets
+    from evals.datasets.index import DATASET_KINDS
+    from evals.datasets.loaders import iter_jsonl
+
+    for kind in DATASET_KINDS:
+        for test_set, path in iter_datasets(f"{kind}.jsonl"):
+            for row in iter_jsonl(path):
+                prompt = row.get("input")
+                if isinstance(prompt, str):
+                    yield prompt, [f"{test_set}::{kind}::{row.get('id')}", str(row.get("id"))], row
+
+
+def load_responses(spec: str | None) -> dict[str, str]:
+    """{prompt: canned output} from a responses file or "golden"."""
+    if not spec:
+        return {}
+    by_prompt: dict[str, str] = {}
+    if spec == "golden":
+        for prompt, _, row in _dataset_prompts():
+            if isinstance(row.get("expected"), str):
+                by_prompt.setdefault(prompt, row["expected"])
+        return by_prompt
+
+    path = Path(spec)
+    text = path.read_text(encoding="utf-8")
+    by_key: dict[str, str] = {}
+    if path.suffix == ".jsonl":
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            key = row.get("id", row.get("input"))
+            if key is not None and "output" in row:
+                by_key[str(key)] = str(row["output"])
+    else:
+        by_key = {str(k): str(v) for k, v in json.loads(text).items()}
+
+    for prompt, keys, _ in _dataset_prompts():
+        for key in keys:
+            if key in by_key:
+                by_prompt.setdefault(prompt, by_key[key])
+                break
+    # keys that are not dataset ids are taken as literal prompts
+    for key, output in by_key.items():
+        by_prompt.setdefault(key, output)
+    return by_prompt
+
+
+def _judge_reply(prompt: str) -> str | None:
+    """Well-formed JSON for the judge's (deepeval) structured prompts, None otherwise."""
+    lowered = prompt.lower()
+    # checked from the most specific prompt: the reason prompt also quotes verdicts
+    # and statements, the verdicts prompt also quotes statements
+    if "reason" in lowered and "score" in lowered:
+        return json.dumps({"reason": "Fake judge."})
+    if "verdicts" in lowered:
+        return json.dumps({"verdicts": [{"verdict": "yes", "reason": None}]})
+    if "statements" in lowered and "json" in lowered:
+        return json.dumps({"statements": ["Odpowiedź testowa."]})
+    return None
+
+
+def _prompt_text(body: dict[str, Any]) -> str:
+    messages = body.get("messages") or []
+    content = messages[-1].get("content", "") if messages else ""
+    if isinstance(content, list):
+        content = " ".join(p.get("text", "") for p in content if isinstance(p, dict))
+    return str(content)
+
+
+def _tokens(text: str) -> list[str]:
+    """Completion split into "tokens" (words with their trailing space)."""
+    words = text.split(" ")
+    return [w + " " for w in words[:-1]] + [words[-1]] if words else []
+
+
+class FakeServer:
+    """
+    Threaded fake model server; use as a context manager or start()/stop().
+
+    Every random decision (latency, injected errors) is drawn from a generator
+    seeded by (seed, prompt, how many times the prompt was seen), so a run with
+    the same config misbehaves the same way regardless of request interleaving.
+    """
+
+    def __init__(self, config: FakeConfig | None = None, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.config = config or FakeConfig()
+        self._responses = load_responses(self.config.responses)
+        self._lock = threading.Lock()
+        self._seen: dict[str, int] = {}
+        self._slot_prompts: list[list[str]] = [[] for _ in range(max(self.config.slots, 1))]
+        self.stats: dict[str, int] = {"requests": 0, "completions": 0, "errors": 0, "timeouts": 0}
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> FakeServer:
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve in the calling thread (CLI)."""
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> FakeServer:
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
+
+    def _count(self, key: str) -> int:
+        with self._lock:
+            self.stats[key] += 1
+            return self.stats[key]
+
+    def _rng(self, prompt: str) -> random.Random:
+        with self._lock:
+            nth = self._seen.get(prompt, 0)
+            self._seen[prompt] = nth + 1
+        digest = hashlib.sha256(f"{self.config.seed}\0{nth}\0{prompt}".encode("utf-8")).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+
+    def _prompt_cache(self, words: list[str], body: dict[str, Any]) -> int:
+        """
+        Prompt tokens served from the simulated KV cache: the slot given by id_slot,
+        else (like llama.cpp) the slot whose last prompt shares the longest prefix.
+        """
+        with self._lock:
+            slots = self._slot_prompts
+
+            def shared(i: int) -> int:
+                n = 0
+                for a, b in zip(slots[i], words):
+                    if a != b:
+                        break
+                    n += 1
+                return n
+
+            slot = body.get("id_slot")
+            if not isinstance(slot, int) or slot < 0:
+                slot = max(range(len(slots)), key=shared)
+            slot %= len(slots)
+            cached = shared(slot) if body.get("cache_prompt", True) else 0
+            slots[slot] = words
+        return cached
+
+    def reply(self, prompt: str) -> str:
+        return _judge_reply(prompt) or self._responses.get(prompt, self.config.default_response)
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # HTTP/1.0: one request per connection. deepeval runs each metric in a
+            # fresh event loop and a pooled keep-alive connection from a closed loop
+            # hangs until the client timeout.
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def _json(self, status: int, payload: dict[str, Any]) -> None:
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self) -> None:
+                server._count("requests")
+                if self.path.rstrip("/").endswith("/models"):
+                    self._json(200, {"object": "list", "data": [{"id": "fake", "object": "model"}]})
+                elif self.path.rstrip("/").endswith("/stats"):
+                    self._json(200, dict(server.stats))
+                else:
+                    self._json(404, {"error": {"message": f"unknown path {self.path}"}})
+
+            def do_POST(self) -> None:
+                server._count("requests")
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except json.JSONDecodeError:
+                    self._json(400, {"error": {"message": "invalid JSON"}})
+                    return
+                if self.path.endswith("/api/generate"):
+                    self._json(200, {"model": body.get("model"), "response": "", "done": True})
+                elif self.path.endswith("/chat/completions"):
+                    self._completion(body)
+                else:
+                    self._json(404, {"error": {"message": f"unknown path {self.path}"}})
+
+            def _completion(self, body: dict[str, Any]) -> None:
+                cfg = server.config
+                nth = server._count("completions")
+                prompt = _prompt_text(body)
+                rng = server._rng(prompt)
+
+                roll = rng.random()
+                if nth <= cfg.fail_first or roll < cfg.error_rate:
+                    server._count("errors")
+                    self._json(cfg.error_status, {"error": {"message": "injected error", "type": "server_error"}})
+                    return
+                if roll < cfg.error_rate + cfg.timeout_rate:
+                    server._count("timeouts")
+                    time.sleep(cfg.hang_s)
+                    return
+
+                tokens = _tokens(server.reply(prompt))
+                max_tokens = body.get("max_tokens")
+                if isinstance(max_tokens, int) and max_tokens > 0:
+                    tokens = tokens[:max_tokens]
+                words = prompt.split()
+                cached = server._prompt_cache(words, body)
+                prefill_s = 0.0
+                if cfg.prefill_tokens_per_s > 0:
+                    prefill_s = (len(words) - cached) / cfg.prefill_tokens_per_s
+                    time.sleep(prefill_s)
+                timings = {"cache_n": cached, "prompt_n": len(words) - cached, "prompt_ms": prefill_s * 1000}
+                n = int(body.get("n") or 1)
+                texts = ["".join(tokens)] * n
+                if cfg.miss_rate > 0:
+                    miss = "".join(_tokens(cfg.default_response))
+                    texts = [miss if rng.random() < cfg.miss_rate else t for t in texts]
+                completion_tokens = sum(len(_tokens(t)) for t in texts)
+                usage = {
+                    "prompt_tokens": len(words),
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": len(words) + completion_tokens,
+                    "prompt_tokens_details": {"cached_tokens": cached},
+                }
+                time.sleep(cfg.latency.sample(rng))
+                if body.get("stream"):
+                    self._stream(body, tokens, usage, timings)
+                    return
+                if cfg.tokens_per_s > 0:
+                    time.sleep(len(tokens) / cfg.tokens_per_s)
+                self._json(200, {
+                    "id": f"fake-{nth}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model"),
+                    "choices": [
+                        {"index": i, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}
+                        for i, text in enumerate(texts)
+                    ],
+                    "usage": usage,
+                    "timings": timings,
+                })
+
+            def _stream(
+                self, body: dict[str, Any], tokens: list[str], usage: dict[str, Any], timings: dict[str, Any]
+            ) -> None:
+                cfg = server.config
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+
+                def chunk(delta: dict[str, Any], finish: str | None, **extra: Any) -> bytes:
+                    payload = {
+                        "id": "fake",
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": body.get("model"),
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+                        **extra,
+                    }
+                    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8")
+
+                try:
+                    for token in tokens:
+                        self.wfile.write(chunk({"content": token}, None))
+                        self.wfile.flush()
+                        if cfg.tokens_per_s > 0:
+                            time.sleep(1 / cfg.tokens_per_s)
+                    self.wfile.write(chunk({}, "stop", timings=timings))
+                    if (body.get("stream_options") or {}).get("include_usage"):
+                        payload = {"id": "fake", "object": "chat.completion.chunk", "choices": [], "usage": usage}
+                        self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    # the client stopped reading (early stop)
+                    pass
+
+        return Handler
+
+
+def main(argv: list[str] | None = None) -> int:
+    env = FakeConfig.from_env()
+    parser = argparse.ArgumentParser(
+        prog="python -m evals.fake_server",
+        description="Fake OpenAI-compatible model server for load and throughput testing.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None, help="default: EVAL_FAKE_PORT or 11435")
+    parser.add_argument("--latency", default=None, help="A | fixed:A | uniform:A:B | lognormal:MEDIAN:SIGMA (s)")
+    parser.add_argument("--tokens-per-s", type=float, default=env.tokens_per_s)
+    parser.add_argument("--error-rate", type=float, default=env.error_rate)
+    parser.add_argument("--error-status", type=int, default=env.error_status)
+    parser.add_argument("--timeout-rate", type=float, default=env.timeout_rate)
+    parser.add_argument("--hang-s", type=float, default=env.hang_s)
+    parser.add_argument("--fail-first", type=int, default=env.fail_first)
+    parser.add_argument("--responses", default=env.responses, help='responses file (.json/.jsonl) or "golden"')
+    parser.add_argument("--miss-rate", type=float, default=env.miss_rate)
+    parser.add_argument("--slots", type=int, default=env.slots)
+    parser.add_argument("--prefill-tokens-per-s", type=float, default=env.prefill_tokens_per_s)
+    parser.add_argument("--seed", type=int, default=env.seed)
+    args = parser.parse_args(argv)
+
+    try:
+        latency = Latency.parse(args.latency) if args.latency is not None else env.latency
+    except ValueError as e:
+        raise SystemExit(str(e))
+    config = dataclasses.replace(
+        env,
+        latency=latency,
+        tokens_per_s=args.tokens_per_s,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        timeout_rate=args.timeout_rate,
+        hang_s=args.hang_s,
+        fail_first=args.fail_first,
+        responses=args.responses,
+        miss_rate=args.miss_rate,
+        slots=args.slots,
+        prefill_tokens_per_s=args.prefill_tokens_per_s,
+        seed=args.seed,
+    )
+    try:
+        port = args.port if args.port is not None else fake_port()
+    except ValueError as e:
+        raise SystemExit(str(e))
+    server = FakeServer(config, args.host, port)
+    print(f"Fake model server on {server.base_url} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
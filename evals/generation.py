@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import dataclasses
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Iterable, TypeVar
+
+from evals.cache import cache_key
+from evals.local_bielik import (
+    DEFAULT_ENDPOINT,
+    GENERATION_PARAMS,
+    Endpoint,
+    Generation,
+    call_bielik_samples,
+    call_bielik_timed,
+)
+from evals.prefix import order_requests, prefix_order
+from evals.rules import EarlyStop
+from evals.run_stats import record_stat
+
+T = TypeVar("T")
+
+DEFAULT_CONCURRENCY = 1
+
+
+def concurrency() -> int:
+    """
+    Return max number of in-flight SUT requests from EVAL_CONCURRENCY env var.
+    1 (default) keeps the old behaviour: every test generates its own output.
+    """
+    raw = os.getenv("EVAL_CONCURRENCY", "").strip()
+    if not raw:
+        return DEFAULT_CONCURRENCY
+    try:
+        value = int(raw)
+    except ValueError as e:
+        raise ValueError(f"Invalid EVAL_CONCURRENCY={raw!r}: expected integer") from e
+    return max(value, 1)
+
+
+def max_concurrency() -> int:
+    """
+    Ceiling of the adaptive in-flight limit, which starts at EVAL_CONCURRENCY
+    (EVAL_MAX_CONCURRENCY, default 2 x EVAL_CONCURRENCY; never below it).
+    """
+    raw = os.getenv("EVAL_MAX_CONCURRENCY", "").strip()
+    if not raw:
+        return 2 * concurrency()
+    try:
+        value = int(raw)
+    except ValueError as e:
+        raise ValueError(f"Invalid EVAL_MAX_CONCURRENCY={raw!r}: expected integer") from e
+    return max(value, concurrency())
+
+
+def prefetching() -> bool:
+    """True if prefetch() generates ahead of the tests: EVAL_CONCURRENCY > 1 or EVAL_PREFIX_ORDER."""
+    return concurrency() > 1 or prefix_order()
+
+
+def streaming() -> bool:
+    """
+    Return True if EVAL_STREAMING env var enables streamed generation with early
+    termination for rules cases that have max_length / forbidden phrase constraints.
+    """
+    return os.getenv("EVAL_STREAMING", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def samples() -> int:
+    """Outputs generated and checked per case (EVAL_SAMPLES, default 1)."""
+    raw = os.getenv("EVAL_SAMPLES", "").strip()
+    if not raw:
+        return 1
+    try:
+        value = int(raw)
+    except ValueError as e:
+        raise ValueError(f"Invalid EVAL_SAMPLES={raw!r}: expected integer") from e
+    return max(value, 1)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Normalize prompt for deduplication: line endings and surrounding whitespace."""
+    lines = prompt.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+
+def request_key(
+    prompt: str,
+    early_stop: EarlyStop | None = None,
+    endpoint: Endpoint | None = None,
+) -> str:
+    endpoint = endpoint or DEFAULT_ENDPOINT
+    parts: list = [endpoint.model, endpoint.base_url, normalize_prompt(prompt), GENERATION_PARAMS, early_stop]
+    k = samples()
+    if k > 1:
+        parts.append({"samples": k})
+    return cache_key(*parts)
+
+
+def _produce(prompt: str, early_stop: EarlyStop | None, endpoint: Endpoint | None) -> list[Generation]:
+    k = samples()
+    if k > 1:
+        return call_bielik_samples(prompt, k, endpoint)
+    return [call_bielik_timed(prompt, early_stop, endpoint)]
+
+
+_lock = threading.Lock()
+_executor: ThreadPoolExecutor | None = None
+# Run-scoped results: one future per unique (normalized prompt, params) key,
+# holding EVAL_SAMPLES outputs.
+_results: dict[str, Future[list[Generation]]] = {}
+# Keys whose output was already handed to a test (later tests get reused=True).
+_consumed: set[str] = set()
+_requests = 0
+
+
+def _record_dedup() -> None:
+    unique = len(_results)
+    record_stat(
+        "dedup",
+        requests=_requests,
+        unique_generations=unique,
+        dedup_ratio=round(1 - unique / _requests, 4) if _requests else 0.0,
+    )
+
+
+def prefetch(
+    requests: Iterable[tuple[str, EarlyStop | None]],
+    max_workers: int | None = None,
+    endpoint: Endpoint | None = None,
+) -> int:
+    """
+    Submit SUT generations for all (prompt, early_stop) requests to a thread pool.
+
+    Identical prompts (after normalize_prompt) are generated once per run.
+    Requests are started in the given order, so with N workers the pool acts
+    as a prefetch window of N cases ahead of the test that is currently running.
+    With EVAL_PREFIX_ORDER they are started in prompt-prefix order instead (see
+    evals.prefix), also in serial runs, where one worker generates ahead.
+    Returns number of submitted requests (0 if concurrency is 1 and max_workers
+    is not given explicitly). endpoint selects a non-default SUT model/server.
+    """
+    global _executor
+    workers = max_workers or max_concurrency()
+    if max_workers is None and not prefetching():
+        return 0
+    if prefix_order():
+        requests = order_requests(list(requests))
+
+    submitted = 0
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sut")
+        for prompt, early_stop in requests:
+            key = request_key(prompt, early_stop, endpoint)
+            if key in _results:
+                continue
+            _results[key] = _executor.submit(_produce, prompt, early_stop, endpoint)
+            submitted += 1
+    return submitted
+
+
+def submit(fn: Callable[..., T], *args: Any) -> Future[T]:
+    """Run fn(*args) on the prefetch pool (EVAL_CONCURRENCY workers)."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_concurrency(), thread_name_prefix="sut")
+        return _executor.submit(fn, *args)
+
+
+def _fill(fut: Future[list[Generation]], prompt: str, early_stop: EarlyStop | None, endpoint: Endpoint | None) -> None:
+    try:
+        fut.set_result(_produce(prompt, early_stop, endpoint))
+    except BaseException as e:
+        fut.set_exception(e)
+
+
+def warm(prompt: str, early_stop: EarlyStop | None = None, endpoint: Endpoint | None = None) -> None:
+    """
+    Generate the outputs for prompt on the calling thread (a prefetch worker),
+    unless they are already generated or in flight. Errors stay in the result
+    and are raised to the test that asks for it.
+    """
+    key = request_key(prompt, early_stop, endpoint)
+    with _lock:
+        if key in _results:
+            return
+        fut: Future[list[Generation]] = Future()
+        _results[key] = fut
+    _fill(fut, prompt, early_stop, endpoint)
+
+
+def generate_samples(
+    prompt: str,
+    early_stop: EarlyStop | None = None,
+    endpoint: Endpoint | None = None,
+) -> list[Generation]:
+    """
+    Return the EVAL_SAMPLES SUT outputs for prompt. The first request for a given
+    prompt generates them (or waits for its prefetch), later ones reuse the same
+    outputs and are marked with reused=True.
+    """
+    global _requests
+    key = request_key(prompt, early_stop, endpoint)
+    with _lock:
+        _requests += 1
+        fut = _results.get(key)
+        owner = fut is None
+        if owner:
+            fut = Future()
+            _results[key] = fut
+        reused = key in _consumed
+        _consumed.add(key)
+        _record_dedup()
+
+    if owner:
+        _fill(fut, prompt, early_stop, endpoint)
+    gens = fut.result()
+    return [dataclasses.replace(gen, reused=True) for gen in gens] if reused else gens
+
+
+def generate(
+    prompt: str,
+    early_stop: EarlyStop | None = None,
+    endpoint: Endpoint | None = None,
+) -> Generation:
+    """Return SUT output for prompt (the first sample with EVAL_SAMPLES > 1)."""
+    return generate_samples(prompt, early_stop, endpoint)[0]
+
+
+def wait_all() -> None:
+    """Block until every submitted generation has finished (errors stay in futures)."""
+    with _lock:
+        futures = list(_results.values())
+    wait(futures)
+
+
+def shutdown() -> None:
+    """Cancel not yet started generations and stop worker threads."""
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+        _results.clear()
+        _consumed.clear()
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -1,39 +1,72 @@
+import bisect
+import functools
 import re
 import unicodedata
-from typing import List, Tuple
+from collections import Counter
+from typing import Iterable, List, Sequence, Tuple
+
+# Any run of non-word characters (whitespace or punctuation) becomes one space.
+_NON_WORD = re.compile(r"\W+")
 
 def strip_accents(s: str) -> str:
+    if s.isascii():
+        return s
     return "".join(
         ch for ch in unicodedata.normalize("NFD", s)
         if unicodedata.category(ch) != "Mn"
     )
 
 def normalize(s: str) -> str:
-    s = s.lower().strip()
-    s = strip_accents(s)
-    s = re.sub(r"\s+", " ", s)
-    s = re.sub(r"[^\w\s]", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+    s = strip_accents(s.lower())
+    return _NON_WORD.sub(" ", s).strip()
 
 def tokens(s: str) -> List[str]:
-    n = normalize(s)
-    return [t for t in n.split(" ") if t]
+    return normalize(s).split()
 
-def token_f1(actual: str, expected: str) -> Tuple[float, float, float]:
-    a = tokens(actual)
-    e = tokens(expected)
-    if not a or not e:
+def _f1(a: Sequence[str], e_counts: Counter, e_len: int) -> Tuple[float, float, float]:
+    if not a or not e_len:
         return 0.0, 0.0, 0.0
 
-    e_remaining = e[:]
-    inter = 0
-    for t in a:
-        if t in e_remaining:
-            inter += 1
-            e_remaining.remove(t)
+    inter = sum((Counter(a) & e_counts).values())
 
     precision = inter / max(len(a), 1)
-    recall = inter / max(len(e), 1)
+    recall = inter / max(e_len, 1)
     f1 = 0.0 if (precision + recall) == 0 else (2 * precision * recall / (precision + recall))
     return f1, precision, recall
+
+def token_f1(actual: str, expected: str) -> Tuple[float, float, float]:
+    e = tokens(expected)
+    return _f1(tokens(actual), Counter(e), len(e))
+
+
+@functools.lru_cache(maxsize=65536)
+def _expected_counts(expected: str) -> Tuple[Counter, int]:
+    e = tokens(expected)
+    return Counter(e), len(e)
+
+
+def token_f1_batch(
+    pairs: Iterable[Tuple[str, str]],
+) -> Tuple[List[float], List[float], List[float]]:
+    """
+    Score many (actual, expected) pairs. Returns parallel lists (f1, precision, recall),
+    identical to calling token_f1 per pair. Tokenization of each expected string is
+    cached, so re-scoring many outputs against the same references is cheap.
+    """
+    f1s: List[float] = []
+    precisions: List[float] = []
+    recalls: List[float] = []
+    for actual, expected in pairs:
+        e_counts, e_len = _expected_counts(expected)
+        f1, p, r = _f1(tokens(actual), e_counts, e_len)
+        f1s.append(f1)
+        precisions.append(p)
+        recalls.append(r)
+    return f1s, precisions, recalls
+
+
+def pass_rates(f1s: Sequence[float], thresholds: Iterable[float]) -> dict:
+    """Fraction of scores >= threshold for each threshold (f1_threshold sweep)."""
+    xs = sorted(f1s)
+    n = len(xs)
+    return {t: (n - bisect.bisect_left(xs, t)) / n if n else 0.0 for t in thresholds}
@@ -0,0 +1,398 @@
+"""
+SQLite store of past results for trend queries across runs (stored next to the
+reports, <reports dir>/history.sqlite):
+
+    python -m evals.history ingest evals/reports
+    python -m evals.history trend polish_context::golden::pl_golden_01_PESEL --last 50
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from evals.checks import SCORE_KEYS
+from evals.perf import PERCENTILES, percentile
+from evals.shard import case_id_from_nodeid
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_REPORTS_DIR = "evals/reports"
+DB_NAME = "history.sqlite"
+# runs.kind: a normal run, or one model of a --models comparison (outcome/score only)
+KINDS = ("run", "comparison")
+
+METRICS = ("score", "latency_s", "ttft_s", "tokens_per_s", "prompt_tokens", "completion_tokens")
+# query groups: column of results (res) or runs (r)
+GROUPS = {"set": "res.test_set", "type": "res.type", "model": "r.model"}
+
+# pytest_report_<label>_<YYYY-mm-dd_HHMMSS>.json / comparison_<label>_<ts>.json
+_REPORT_NAME = re.compile(r"^(?:pytest_report|comparison)_(?P<label>.+?)_+\d{4}-\d{2}-\d{2}_\d{6}\.json$")
+# partial runs: shards are stored once merged, sequential runs sample cases
+_PARTIAL_LABEL = re.compile(r"__shard\d+of\d+|__seq[_.]")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    label TEXT,
+    model TEXT NOT NULL,
+    judge_model TEXT,
+    source TEXT,
+    kind TEXT NOT NULL DEFAULT 'run',
+    duration_s REAL,
+    passed INTEGER NOT NULL,
+    failed INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    UNIQUE (created, model)
+);
+CREATE INDEX IF NOT EXISTS runs_created ON runs (created);
+CREATE INDEX IF NOT EXISTS runs_model ON runs (model, created);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    case_id TEXT NOT NULL,
+    test_set TEXT,
+    type TEXT,
+    created REAL NOT NULL,
+    outcome TEXT NOT NULL,
+    score REAL,
+    latency_s REAL,
+    ttft_s REAL,
+    tokens_per_s REAL,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    -- 1 = generated in this run (not cached, reused or carried forward)
+    fresh INTEGER NOT NULL,
+    PRIMARY KEY (run_id, case_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_case ON results (case_id, created);
+CREATE INDEX IF NOT EXISTS results_set ON results (test_set, created);
+CREATE INDEX IF NOT EXISTS results_type ON results (type, created);
+"""
+
+
+def history_db(reports_dir: Path | None = None) -> Path:
+    """Results store: EVAL_HISTORY_DB, else history.sqlite in reports_dir (default evals/reports)."""
+    raw = os.getenv("EVAL_HISTORY_DB", "").strip()
+    if raw:
+        return Path(raw)
+    return (reports_dir or ROOT / DEFAULT_REPORTS_DIR) / DB_NAME
+
+
+def connect(path: Path | None = None) -> sqlite3.Connection:
+    path = path or history_db()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    # stores created before runs.kind existed hold normal runs only
+    if "kind" not in {row[1] for row in conn.execute("PRAGMA table_info(runs)")}:
+        with conn:
+            conn.execute("ALTER TABLE runs ADD COLUMN kind TEXT NOT NULL DEFAULT 'run'")
+    return conn
+
+
+def partial_report(path: Path, report: dict[str, Any] | None = None) -> bool:
+    """Shard or sequential (sampled) report; these are not stored."""
+    if _PARTIAL_LABEL.search(path.name):
+        return True
+    return report is not None and "sequential" in report
+
+
+def record_run(json_path: Path) -> None:
+    """
+    Add a finished run's report to the store of its reports directory (or
+    EVAL_HISTORY_DB); failures only print a warning.
+    """
+    from evals.local_bielik import MODEL
+
+    db = history_db(json_path.parent)
+    try:
+        conn = connect(db)
+        try:
+            ingest_report(conn, json_path, MODEL)
+        finally:
+            conn.close()
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"Warning: could not add the run to {db}: {e}")
+        return
+    print(f"History:     {db}")
+
+
+def _props(test: dict[str, Any]) -> dict[str, Any]:
+    props: dict[str, Any] = {}
+    for prop in test.get("user_properties", []):
+        if isinstance(prop, dict):
+            props.update(prop)
+    return props
+
+
+def _fresh(extra: dict[str, Any]) -> bool:
+    return not (extra.get("cached") or extra.get("reused") or extra.get("carried_forward"))
+
+
+def _result(case_id: str, outcome: str, extra: dict[str, Any] | None, score: float | None = None) -> dict[str, Any]:
+    extra = extra if isinstance(extra, dict) else {}
+    parts = case_id.split("::")
+    test_type = extra.get("type") or (parts[1] if len(parts) == 3 else None)
+    return {
+        "case_id": case_id,
+        "test_set": extra.get("test_set") or (parts[0] if len(parts) == 3 else None),
+        "type": test_type,
+        "outcome": outcome,
+        "score": extra.get(SCORE_KEYS.get(test_type or "", ""), score),
+        **{m: extra.get(m) for m in METRICS if m != "score"},
+        "fresh": int(bool(extra) and _fresh(extra)),
+    }
+
+
+def _report_runs(report: dict[str, Any], default_model: str) -> Iterator[tuple[str, str, list[dict[str, Any]]]]:
+    """
+    (kind, model, results) of every run in a report. A comparison report has one
+    "comparison" run per model; it keeps only outcome and score per case, no latency.
+    """
+    if isinstance(report.get("models"), dict) and "cases" in report:
+        for label, info in report["models"].items():
+            model = info.get("model") or label
+            results = []
+            for case in report["cases"]:
+                res = case.get("results", {}).get(label)
+                if res is not None:
+                    results.append(_result(case["case_id"], res["outcome"], None, res.get("score")))
+            yield "comparison", model, results
+        return
+
+    model = (report.get("eval_stats", {}).get("run") or {}).get("sut_model") or default_model
+    results = []
+    for test in report.get("tests", []):
+        cid = case_id_from_nodeid(test.get("nodeid", ""))
+        if cid is None:
+            continue
+        results.append(_result(cid, test.get("outcome", ""), _props(test).get("extra")))
+    yield "run", model, results
+
+
+def ingest_report(conn: sqlite3.Connection, path: Path, default_model: str) -> int:
+    """Add the runs of a JSON report; returns the number of new runs (0 = already stored)."""
+    report = json.loads(path.read_text(encoding="utf-8"))
+    created = report.get("created")
+    if not isinstance(created, (int, float)) or partial_report(path, report):
+        return 0
+    m = _REPORT_NAME.match(path.name)
+    label = m.group("label") if m else path.stem
+    judge_model = (report.get("eval_stats", {}).get("run") or {}).get("judge_model")
+
+    added = 0
+    with conn:
+        for kind, model, results in _report_runs(report, default_model):
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO runs (created, label, model, judge_model, source, kind, duration_s,"
+                " passed, failed, total) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    created,
+                    label,
+                    model,
+                    judge_model,
+                    path.name,
+                    kind,
+                    report.get("duration"),
+                    sum(r["outcome"] == "passed" for r in results),
+                    sum(r["outcome"] in ("failed", "error") for r in results),
+                    len(results),
+                ),
+            )
+            if not cur.rowcount:
+                continue
+            run_id = cur.lastrowid
+            conn.executemany(
+                "INSERT OR REPLACE INTO results (run_id, case_id, test_set, type, created, outcome,"
+                " score, latency_s, ttft_s, tokens_per_s, prompt_tokens, completion_tokens, fresh)"
+                " VALUES (:run_id, :case_id, :test_set, :type, :created, :outcome, :score,"
+                " :latency_s, :ttft_s, :tokens_per_s, :prompt_tokens, :completion_tokens, :fresh)",
+                ({**r, "run_id": run_id, "created": created} for r in results),
+            )
+            added += 1
+    return added
+
+
+def report_files(paths: Iterable[Path]) -> list[Path]:
+    """
+    JSON reports among paths (directories are searched; latest_* copies, benchmarks,
+    shard and sequential reports are skipped).
+    """
+    files: list[Path] = []
+    for path in paths:
+        if path.is_dir():
+            files.extend(
+                p for p in sorted(path.glob("*.json"))
+                if not p.name.startswith(("latest_", "bench_")) and not partial_report(p)
+            )
+        else:
+            files.append(path)
+    return files
+
+
+def _when(created: float) -> str:
+    return datetime.fromtimestamp(created).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _last_runs(conn: sqlite3.Connection, last: int, model: str | None, kind: str = "run") -> str:
+    """SQL condition selecting the results of the last `last` runs of a kind (and model)."""
+    where = "WHERE kind = ?" + (" AND model = ?" if model else "")
+    ids = conn.execute(
+        f"SELECT id FROM runs {where} ORDER BY created DESC LIMIT ?", (kind, *([model] if model else []), last)
+    ).fetchall()
+    return f"res.run_id IN ({','.join(str(i) for (i,) in ids) or 'NULL'})"
+
+
+def trend(
+    conn: sqlite3.Connection, case_id: str, metric: str, last: int, model: str | None, kind: str = "run"
+) -> list[dict[str, Any]]:
+    """metric and outcome of one case in its last `last` runs (of a kind), oldest first."""
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric {metric!r}: expected one of {METRICS}")
+    sql = (
+        f"SELECT res.created, r.model, res.outcome, res.{metric} FROM results res"
+        " JOIN runs r ON r.id = res.run_id WHERE res.case_id = ? AND r.kind = ?"
+    )
+    params: list[Any] = [case_id, kind]
+    if model:
+        sql += " AND r.model = ?"
+        params.append(model)
+    sql += " ORDER BY res.created DESC LIMIT ?"
+    rows = conn.execute(sql, (*params, last)).fetchall()
+    return [
+        {"when": _when(created), "model": m, "outcome": outcome, metric: value}
+        for created, m, outcome, value in reversed(rows)
+    ]
+
+
+def pass_rates(
+    conn: sqlite3.Connection, by: str, last: int, model: str | None, kind: str = "run"
+) -> list[dict[str, Any]]:
+    """Pass rate per run and group (set / type / model) over the last `last` runs (of a kind)."""
+    col = GROUPS[by]
+    rows = conn.execute(
+        f"SELECT r.created, r.model, {col}, SUM(res.outcome = 'passed'),"
+        " SUM(res.outcome IN ('passed', 'failed', 'error'))"
+        f" FROM results res JOIN runs r ON r.id = res.run_id WHERE {_last_runs(conn, last, model, kind)}"
+        f" GROUP BY res.run_id, {col} ORDER BY r.created, r.model, {col}"
+    ).fetchall()
+    return [
+        {"when": _when(created), "model": m, by: group, "passed": passed, "total": total,
+         "pass_rate": round(passed / total, 4) if total else None}
+        for created, m, group, passed, total in rows
+    ]
+
+
+def latency(
+    conn: sqlite3.Connection, by: str, last: int, model: str | None, per_run: bool = False, kind: str = "run"
+) -> list[dict[str, Any]]:
+    """
+    Latency percentiles of fresh generations per group over the last `last` runs,
+    or per run and group with per_run.
+    """
+    col = GROUPS[by]
+    rows = conn.execute(
+        f"SELECT r.created, r.model, {col}, res.latency_s FROM results res JOIN runs r ON r.id = res.run_id"
+        f" WHERE {_last_runs(conn, last, model, kind)} AND res.fresh = 1 AND res.latency_s IS NOT NULL"
+    ).fetchall()
+    groups: dict[tuple, list[float]] = {}
+    for created, m, group, value in rows:
+        groups.setdefault((created, m, group) if per_run else (group,), []).append(value)
+    out = []
+    for key in sorted(groups, key=lambda k: tuple("" if v is None else v for v in k)):
+        values = groups[key]
+        row: dict[str, Any] = {"when": _when(key[0]), "model": key[1]} if per_run else {}
+        row[by] = key[-1]
+        row["n"] = len(values)
+        row.update({f"p{p}": round(percentile(values, p), 4) for p in PERCENTILES})
+        out.append(row)
+    return out
+
+
+def _print_table(rows: list[dict[str, Any]], as_json: bool) -> None:
+    if as_json:
+        print(json.dumps(rows, ensure_ascii=False))
+        return
+    if not rows:
+        print("(no results)")
+        return
+    cols = list(rows[0])
+    cells = [[("" if r.get(c) is None else str(r.get(c))) for c in cols] for r in rows]
+    widths = [max(len(c), *(len(row[i]) for row in cells)) for i, c in enumerate(cols)]
+    print("  ".join(c.ljust(w) for c, w in zip(cols, widths)))
+    for row in cells:
+        print("  ".join(v.ljust(w) for v, w in zip(row, widths)))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m evals.history",
+        description=(
+            "Results store across runs (SQLite, <reports dir>/history.sqlite or EVAL_HISTORY_DB).\n\n"
+            "Examples:\n"
+            "  python -m evals.history ingest evals/reports\n"
+            "  python -m evals.history trend polish_context::golden::pl_golden_01_PESEL --metric score\n"
+            "  python -m evals.history pass-rate --by set --last 20\n"
+            "  python -m evals.history latency --by type --last 50 --per-run\n"
+        ),
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        "--reports-dir", default=DEFAULT_REPORTS_DIR, help=f"Reports directory (default: {DEFAULT_REPORTS_DIR})."
+    )
+    common.add_argument(
+        "--db", default=None, help=f"SQLite file (default: EVAL_HISTORY_DB or <reports dir>/{DB_NAME})."
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("ingest", parents=[common], help="Add JSON reports (files or directories) to the store.")
+    p.add_argument("paths", nargs="*", help="Reports or directories (default: the reports directory).")
+    p.add_argument("--model", default=None, help="SUT model of reports that do not record it (default: OLLAMA_MODEL).")
+
+    p_trend = sub.add_parser("trend", parents=[common], help="A metric of one case over its last runs.")
+    p_trend.add_argument("case_id", help="set::type::id")
+    p_trend.add_argument("--metric", default="score", choices=METRICS, help="score = f1 (golden) / judge_score (judge)")
+
+    p_rate = sub.add_parser("pass-rate", parents=[common], help="Pass rate per run and group.")
+    p_lat = sub.add_parser("latency", parents=[common], help="Latency percentiles of fresh generations per group.")
+    p_lat.add_argument("--per-run", action="store_true", help="One row per run and group.")
+    for p_q in (p_rate, p_lat):
+        p_q.add_argument("--by", default="type", choices=sorted(GROUPS))
+    for p_q in (p_trend, p_rate, p_lat):
+        p_q.add_argument("--last", type=int, default=50, help="Number of most recent runs (default 50).")
+        p_q.add_argument("--model", default=None, help="Only runs of this SUT model.")
+        p_q.add_argument("--json", action="store_true", help="Print the rows as JSON.")
+        p_q.add_argument(
+            "--kind", default="run", choices=KINDS, help="Normal runs or --models comparison runs (default: run)."
+        )
+    args = parser.parse_args(argv)
+
+    reports_dir = ROOT / args.reports_dir
+    conn = connect(Path(args.db) if args.db else history_db(reports_dir))
+    try:
+        if args.command == "ingest":
+            from evals.local_bielik import MODEL
+
+            files = report_files([ROOT / p for p in args.paths] if args.paths else [reports_dir])
+            added = sum(ingest_report(conn, f, args.model or MODEL) for f in files)
+            print(f"Ingested {added} new run(s) from {len(files)} report(s)")
+        elif args.command == "trend":
+            _print_table(trend(conn, args.case_id, args.metric, args.last, args.model, args.kind), args.json)
+        elif args.command == "pass-rate":
+            _print_table(pass_rates(conn, args.by, args.last, args.model, args.kind), args.json)
+        else:
+            _print_table(latency(conn, args.by, args.last, args.model, args.per_run, args.kind), args.json)
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import html
+import json
+from pathlib import Path
+from typing import Any, Iterable, Mapping
+
+_STYLE = """
+body { font-family: Helvetica, Arial, sans-serif; font-size: 13px; margin: 16px; }
+table { border-collapse: collapse; width: 100%; }
+th, td { border: 1px solid #ddd; padding: 4px 8px; text-align: left; vertical-align: top; }
+th { background: #f3f3f3; }
+.passed { color: #1a7f37; } .failed { color: #cf222e; } .skipped { color: #9a6700; }
+.error { color: #8250df; } tr.differs { background: #fff8c5; }
+pre { white-space: pre-wrap; margin: 4px 0; }
+"""
+
+
+def _props(test: Mapping[str, Any]) -> dict[str, Any]:
+    props: dict[str, Any] = {}
+    for item in test.get("user_properties", []):
+        props.update(item)
+    return props
+
+
+def _details(test: Mapping[str, Any]) -> str:
+    props = _props(test)
+    parts = []
+    for key in ("case_id", "prompt", "output"):
+        if props.get(key) is not None:
+            parts.append(f"<b>{key.upper()}:</b><pre>{html.escape(str(props[key]))}</pre>")
+    if props.get("extra") is not None:
+        extra = json.dumps(props["extra"], ensure_ascii=False, indent=2, default=str)
+        parts.append(f"<b>EXTRA:</b><pre>{html.escape(extra)}</pre>")
+    longrepr = test.get("call", {}).get("longrepr")
+    if longrepr:
+        parts.append(f"<b>FAILURE:</b><pre>{html.escape(str(longrepr))}</pre>")
+    return "".join(parts)
+
+
+def write_html(header: Mapping[str, Any], tests: Iterable[Mapping[str, Any]], path: Path) -> None:
+    """
+    Write a self-contained HTML report for a JSON report header (summary, created,
+    duration, ...) and its tests. Tests are consumed as an iterable, so they can be
+    streamed from a JSONL file.
+    """
+    summary = header.get("summary", {})
+    summary_line = ", ".join(f"{k}: {v}" for k, v in summary.items())
+    with path.open("w", encoding="utf-8") as f:
+        f.write("<!DOCTYPE html><html><head><meta charset='utf-8'>")
+        f.write(f"<title>{html.escape(path.name)}</title><style>{_STYLE}</style></head><body>")
+        f.write(f"<h1>{html.escape(path.name)}</h1>")
+        f.write(f"<p>{html.escape(summary_line)} &mdash; {header.get('duration', 0):.2f}s</p>")
+        f.write("<table><tr><th>Result</th><th>Test</th><th>Duration</th><th>Details</th></tr>")
+        for test in tests:
+            outcome = test.get("outcome", "")
+            duration = sum(
+                test.get(stage, {}).get("duration", 0.0) for stage in ("setup", "call", "teardown")
+            )
+            f.write(
+                f"<tr><td class='{outcome}'>{outcome}</td>"
+                f"<td>{html.escape(test.get('nodeid', ''))}</td>"
+                f"<td>{duration:.2f}s</td>"
+                f"<td><details><summary>log</summary>{_details(test)}</details></td></tr>"
+            )
+        f.write("</table></body></html>")
+
+
+def _fmt(value: Any, signed: bool = False) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:+.4f}" if signed else f"{value:.4f}"
+    return str(value)
+
+
+def write_comparison_html(report: Mapping[str, Any], path: Path) -> None:
+    """Write a multi-model comparison report: per-model summary and side-by-side verdicts."""
+    models: Mapping[str, Any] = report.get("models", {})
+    labels = list(models)
+    with path.open("w", encoding="utf-8") as f:
+        f.write("<!DOCTYPE html><html><head><meta charset='utf-8'>")
+        f.write(f"<title>{html.escape(path.name)}</title><style>{_STYLE}</style></head><body>")
+        f.write(f"<h1>{html.escape(path.name)}</h1>")
+        f.write(
+            f"<p>baseline: {html.escape(str(report.get('baseline')))} &mdash; "
+            f"{report.get('disagreements', 0)} case(s) with different verdicts &mdash; "
+            f"{report.get('duration', 0):.2f}s</p>"
+        )
+        f.write(
+            "<table><tr><th>Model</th><th>Pass rate</th><th>&Delta; vs baseline</th>"
+            "<th>Regressions</th><th>Improvements</th><th>Latency p50 / p95</th>"
+            "<th>Tokens/s</th><th>Summary</th></tr>"
+        )
+        for label, m in models.items():
+            latency = m.get("perf", {}).get("latency_s") or {}
+            f.write(
+                f"<tr><td>{html.escape(label)}</td><td>{_fmt(m.get('pass_rate'))}</td>"
+                f"<td>{_fmt(m.get('pass_rate_delta'), signed=True)}</td>"
+                f"<td>{m.get('regressions_vs_baseline', 0)}</td>"
+                f"<td>{m.get('improvements_vs_baseline', 0)}</td>"
+                f"<td>{_fmt(latency.get('p50'))} / {_fmt(latency.get('p95'))}</td>"
+                f"<td>{_fmt(m.get('generation_tokens_per_s'))}</td>"
+                f"<td>{html.escape(json.dumps(m.get('summary', {})))}</td></tr>"
+            )
+        f.write("</table><h2>Cases</h2><table><tr><th>Case</th>")
+        for label in labels:
+            f.write(f"<th>{html.escape(label)}</th>")
+        f.write("</tr>")
+        for case in report.get("cases", []):
+            cls = "" if case.get("agree") else " class='differs'"
+            f.write(f"<tr{cls}><td>{html.escape(case.get('case_id', ''))}</td>")
+            for label in labels:
+                r = case.get("results", {}).get(label, {})
+                outcome = r.get("outcome", "")
+                score = "" if r.get("score") is None else f" ({_fmt(r['score'])})"
+                body = "".join(
+                    f"<b>{k.upper()}:</b><pre>{html.escape(str(r[k]))}</pre>"
+                    for k in ("output", "failure")
+                    if r.get(k)
+                )
+                f.write(
+                    f"<td><span class='{outcome}'>{outcome}{score}</span>"
+                    f"<details><summary>log</summary>{body}</details></td>"
+                )
+            f.write("</tr>")
+        f.write("</table></body></html>")
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import dataclasses
+import functools
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+from evals.cache import cache_key
+from evals.local_bielik import DEFAULT_ENDPOINT, GENERATION_PARAMS, Endpoint
+from evals.rules import EarlyStop
+from evals.run_stats import add_stat
+from evals.shard import case_id_from_nodeid
+
+EVALS_DIR = Path(__file__).resolve().parent
+
+# Source files whose code produces the SUT output of a case (request, sampling).
+GENERATION_SOURCES = ("local_bielik.py", "generation.py")
+# Source files whose code decides the verdict of a case, per test type.
+CHECKER_SOURCES = {
+    "rules": ("checks.py", "rules.py"),
+    "golden": ("checks.py", "golden.py"),
+    "judge": ("checks.py", "judge.py"),
+}
+
+
+@dataclasses.dataclass
+class PriorResult:
+    """Result of a case carried forward from the previous report."""
+    output: str
+    extra: dict[str, Any]
+    failure: str | None
+
+
+def previous_report() -> Path | None:
+    """Report to carry unchanged cases forward from (EVAL_INCREMENTAL); None = rerun all."""
+    raw = os.getenv("EVAL_INCREMENTAL", "").strip()
+    return Path(raw) if raw else None
+
+
+@functools.lru_cache(maxsize=None)
+def checker_version(test_type: str) -> str:
+    h = hashlib.sha256()
+    for name in (*GENERATION_SOURCES, *CHECKER_SOURCES[test_type]):
+        h.update((EVALS_DIR / name).read_bytes())
+    return h.hexdigest()[:16]
+
+
+def fingerprint(
+    test_type: str,
+    row: dict[str, Any],
+    early_stop: EarlyStop | None = None,
+    judge_model: str | None = None,
+    endpoint: Endpoint | None = None,
+    samples: int = 1,
+) -> str:
+    """
+    Everything that can change the result of a case: row content (input, expectations,
+    thresholds), SUT endpoint (model and base_url, default OLLAMA_MODEL at
+    OPENAI_BASE_URL) and generation params, early stop spec, judge model, samples
+    per case and the generation and checker source code.
+    """
+    endpoint = endpoint or DEFAULT_ENDPOINT
+    parts: list[Any] = [
+        test_type,
+        row,
+        endpoint.model,
+        endpoint.base_url,
+        GENERATION_PARAMS,
+        dataclasses.asdict(early_stop) if early_stop else None,
+        judge_model,
+        checker_version(test_type),
+    ]
+    if samples > 1:
+        parts.append({"samples": samples})
+    return cache_key(*parts)
+
+
+@functools.lru_cache(maxsize=1)
+def _load(path: Path) -> dict[str, tuple[str, PriorResult]]:
+    """{case id: (fingerprint, result)} of the reusable cases of a report."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        print(f"Warning: incremental run without previous results ({path}: {e})")
+        return {}
+
+    prior: dict[str, tuple[str, PriorResult]] = {}
+    for test in data.get("tests", []):
+        props: dict[str, Any] = {}
+        for prop in test.get("user_properties", []):
+            if isinstance(prop, dict):
+                props.update(prop)
+        fp = props.get("fingerprint")
+        outcome = test.get("outcome")
+        # Failures from exceptions (no recorded failure message) are always rerun.
+        if not fp or outcome not in ("passed", "failed") or "failure" not in props:
+            continue
+        if (outcome == "failed") != (props["failure"] is not None):
+            continue
+        cid = case_id_from_nodeid(test.get("nodeid", ""))
+        if cid is None or not isinstance(props.get("extra"), dict):
+            continue
+        prior[cid] = (fp, PriorResult(str(props.get("output") or ""), props["extra"], props["failure"]))
+    return prior
+
+
+def reusable(cid: str, fp: str) -> PriorResult | None:
+    """Previous result of a case if its fingerprint is unchanged."""
+    path = previous_report()
+    if path is None:
+        return None
+    hit = _load(path).get(cid)
+    if hit is None or hit[0] != fp:
+        return None
+    return hit[1]
+
+
+def record_reuse(reused: bool) -> None:
+    add_stat("incremental", "carried_forward" if reused else "rerun", 1)
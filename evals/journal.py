@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Iterator
+
+from evals.html_report import write_html
+from evals.perf import perf_summary
+
+# pytest exit codes, also used for reports built from a journal
+EXIT_OK = 0
+EXIT_TESTS_FAILED = 1
+EXIT_NO_TESTS = 5
+
+DEFAULT_FSYNC_EVERY = 16
+DEFAULT_FSYNC_INTERVAL_S = 5.0
+
+
+def journal_path() -> Path | None:
+    """Results journal of the current run (EVAL_JOURNAL); None = no journal."""
+    raw = os.getenv("EVAL_JOURNAL", "").strip()
+    return Path(raw) if raw else None
+
+
+def resuming() -> bool:
+    """EVAL_RESUME=1: skip cases that already have a result in the journal."""
+    return os.getenv("EVAL_RESUME", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+class Journal:
+    """
+    Append-only JSONL file with one finished case (pytest-json-report test entry)
+    per line. Every line is flushed right away; fsync is batched every `fsync_every`
+    entries or `fsync_interval_s` seconds, whichever comes first.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        fsync_every: int | None = None,
+        fsync_interval_s: float | None = None,
+    ) -> None:
+        self.path = path
+        self.fsync_every = fsync_every or int(
+            os.getenv("EVAL_JOURNAL_FSYNC_EVERY", DEFAULT_FSYNC_EVERY)
+        )
+        self.fsync_interval_s = (
+            fsync_interval_s if fsync_interval_s is not None else DEFAULT_FSYNC_INTERVAL_S
+        )
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # A crash can leave a half-written last line; start on a fresh one.
+        needs_newline = False
+        if path.exists() and path.stat().st_size:
+            with path.open("rb") as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b"\n"
+        self._f = path.open("a", encoding="utf-8")
+        if needs_newline:
+            self._f.write("\n")
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def append(self, entry: dict[str, Any]) -> None:
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with self._lock:
+            self._f.write(line + "\n")
+            self._f.flush()
+            self._pending += 1
+            if (
+                self._pending >= self.fsync_every
+                or time.monotonic() - self._last_sync >= self.fsync_interval_s
+            ):
+                self._sync()
+
+    def _sync(self) -> None:
+        os.fsync(self._f.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._f.closed:
+                return
+            self._f.flush()
+            self._sync()
+            self._f.close()
+
+    def __enter__(self) -> Journal:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def read_journal(path: Path) -> Iterator[dict[str, Any]]:
+    """Entries of a journal; lines cut short by a crash are skipped."""
+    if not path.exists():
+        return
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(entry, dict) and "nodeid" in entry:
+                yield entry
+
+
+def latest_entries(path: Path) -> list[dict[str, Any]]:
+    """Journal entries with the last one per nodeid (a resumed run appends reruns)."""
+    latest: dict[str, dict[str, Any]] = {}
+    for entry in read_journal(path):
+        latest.pop(entry["nodeid"], None)
+        latest[entry["nodeid"]] = entry
+    return list(latest.values())
+
+
+def _props(entry: dict[str, Any]) -> dict[str, Any]:
+    props: dict[str, Any] = {}
+    for prop in entry.get("user_properties", []):
+        if isinstance(prop, dict):
+            props.update(prop)
+    return props
+
+
+def is_completed(entry: dict[str, Any]) -> bool:
+    """
+    Case with a real eval result: passed, or failed with a recorded eval failure.
+    Errors, skips and exceptions (e.g. the model server being down) are rerun.
+    """
+    outcome = entry.get("outcome")
+    if outcome == "passed":
+        return True
+    return outcome == "failed" and _props(entry).get("failure") is not None
+
+
+def completed(path: Path) -> dict[str, str]:
+    """{nodeid: outcome} of the cases a resumed run does not run again."""
+    return {e["nodeid"]: e["outcome"] for e in latest_entries(path) if is_completed(e)}
+
+
+def completed_nodeids(path: Path) -> set[str]:
+    return set(completed(path))
+
+
+def _extra(entry: dict[str, Any]) -> dict[str, Any] | None:
+    for prop in entry.get("user_properties", []):
+        if isinstance(prop, dict) and isinstance(prop.get("extra"), dict):
+            return prop["extra"]
+    return None
+
+
+def write_report(header: dict[str, Any], journal: Path, json_path: Path, html_path: Path) -> int:
+    """
+    Build the JSON report (pytest-json-report schema) and the HTML report from a
+    journal. Summary, exit code and eval_perf are computed from the journal, so a
+    resumed run reports all of its cases (the last result of a rerun case).
+    Returns the exit code.
+    """
+    entries = latest_entries(journal)
+    counts: Counter[str] = Counter()
+    samples: list[dict[str, Any]] = []
+    for entry in entries:
+        counts[entry.get("outcome", "failed")] += 1
+        extra = _extra(entry)
+        if extra is not None:
+            samples.append(extra)
+    total = sum(counts.values())
+
+    if not total:
+        exitcode = EXIT_NO_TESTS
+    elif counts["failed"] or counts["error"]:
+        exitcode = EXIT_TESTS_FAILED
+    else:
+        exitcode = EXIT_OK
+
+    summary = {k: v for k, v in counts.items() if v}
+    summary["total"] = total
+    summary["collected"] = total
+    perf = perf_summary(samples)
+    for key in ("run_wall_s", "run_tokens_per_s"):
+        if key in header.get("eval_perf", {}):
+            perf[key] = header["eval_perf"][key]
+    header = {
+        **header,
+        "exitcode": exitcode,
+        "summary": summary,
+        "eval_perf": perf,
+    }
+    header.pop("tests", None)
+
+    head = json.dumps(header, ensure_ascii=False, default=str)
+    with json_path.open("w", encoding="utf-8") as out:
+        out.write(head[:-1])
+        out.write(', "tests": [')
+        for i, entry in enumerate(entries):
+            if i:
+                out.write(", ")
+            out.write(json.dumps(entry, ensure_ascii=False, default=str))
+        out.write("]}")
+    write_html(header, entries, html_path)
+    return exitcode
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import os
+import time
+from dataclasses import dataclass
+
+from evals.cache import cache_key, judge_cache, judge_cache_mode
+from evals.run_stats import add_stat
+from evals.scheduler import get_scheduler
+
+JUDGE_METRIC = "AnswerRelevancyMetric"
+
+
+@dataclass
+class JudgeResult:
+    score: float
+    reason: str | None
+    threshold: float
+    cached: bool = False
+    wall_s: float | None = None
+
+
+def judge_model_name() -> str | None:
+    return os.getenv("OLLAMA_JUDGE_MODEL") or os.getenv("OLLAMA_MODEL")
+
+
+def build_judge_input(prompt: str, notes: str | None) -> str:
+    if not notes:
+        return prompt
+    return (
+        f"{prompt}\n\n"
+        f"[NOTES FOR EVALUATION]\n"
+        f"{notes}"
+    )
+
+
+def evaluate(
+    prompt: str,
+    output: str,
+    *,
+    notes: str | None,
+    threshold: float,
+    model_name: str,
+) -> JudgeResult:
+    """
+    Score output with the judge metric.
+
+    With EVAL_JUDGE_CACHE=on a stored verdict for the same (judge model, metric,
+    threshold, judge input incl. notes, output) is returned before deepeval is
+    imported or any judge model or metric is constructed.
+    """
+    judge_input = build_judge_input(prompt, notes)
+    mode = judge_cache_mode()
+    key = cache_key(model_name, JUDGE_METRIC, threshold, judge_input, output)
+
+    if mode == "on":
+        hit = judge_cache().get(key)
+        if hit is not None:
+            return JudgeResult(
+                score=hit["score"], reason=hit["reason"], threshold=threshold, cached=True
+            )
+
+    # deepeval takes ~2 s to import; load it only when a verdict is really needed.
+    from deepeval.metrics import AnswerRelevancyMetric
+    from deepeval.models import GPTModel
+    from deepeval.test_case import LLMTestCase
+
+    t0 = time.perf_counter()
+    judge = GPTModel(model=model_name)
+    tc = LLMTestCase(input=judge_input, actual_output=output)
+    metric = AnswerRelevancyMetric(threshold=threshold, model=judge)
+    get_scheduler("judge").call(lambda: metric.measure(tc))
+    wall_s = time.perf_counter() - t0
+    add_stat("phases", "judge_evals", 1)
+    add_stat("phases", "judge_eval_s", wall_s)
+
+    result = JudgeResult(
+        score=metric.score, reason=metric.reason, threshold=metric.threshold, wall_s=wall_s
+    )
+    if mode != "off":
+        judge_cache().put(key, {"score": result.score, "reason": result.reason})
+    return result
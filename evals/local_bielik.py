@@ -1,18 +1,359 @@
+from __future__ import annotations
+
+import dataclasses
+import json
 import os
-from openai import OpenAI
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from evals.cache import CacheMissError, cache_key, response_cache, response_cache_mode
+from evals.prefix import request_options
+from evals.rules import EarlyStop
+from evals.run_stats import add_stat
+from evals.scheduler import get_scheduler, request_timeout
+
+if TYPE_CHECKING:
+    from openai import OpenAI
 
 MODEL = os.getenv("OLLAMA_MODEL", "SpeakLeash/bielik-11b-v3.0-instruct:Q8_0")
+BASE_URL = os.getenv("OPENAI_BASE_URL", "http://localhost:11434/v1")
+
+# Sampling params sent with every SUT request (also part of the cache key).
+GENERATION_PARAMS = {"temperature": 0.2}
+
+
+def _make_client(base_url: str) -> OpenAI:
+    # Imported here: the openai package costs ~0.7 s of startup and fully
+    # cached/replayed runs never need it.
+    from openai import OpenAI
+
+    # Retries, backoff and the circuit breaker live in evals.scheduler.
+    return OpenAI(
+        base_url=base_url,
+        api_key=os.getenv("OPENAI_API_KEY", "ollama"),
+        timeout=request_timeout(),
+        max_retries=0,
+    )
+
+
+_clients: dict[str, OpenAI] = {}
+
+
+def client_for(base_url: str) -> OpenAI:
+    """OpenAI client of a server (one per base_url, created on first use)."""
+    c = _clients.get(base_url)
+    if c is None:
+        c = _clients.setdefault(base_url, _make_client(base_url))
+    return c
+
+
+@dataclasses.dataclass(frozen=True)
+class Endpoint:
+    """SUT model and the OpenAI-compatible server it is served from."""
+    model: str
+    base_url: str = BASE_URL
+
+    @property
+    def label(self) -> str:
+        return self.model if self.base_url == BASE_URL else f"{self.model}@{self.base_url}"
 
-client = OpenAI(
-    base_url=os.getenv("OPENAI_BASE_URL", "http://localhost:11434/v1"),
-    api_key=os.getenv("OPENAI_API_KEY", "ollama"),
-    timeout=180.0,
-)
 
-def call_bielik(prompt: str) -> str:
-    resp = client.chat.completions.create(
-        model=MODEL,
+DEFAULT_ENDPOINT = Endpoint(MODEL, BASE_URL)
+
+
+def parse_endpoints(spec: str) -> list[Endpoint]:
+    """Parse "model_a,model_b@http://host:11434/v1" (base_url defaults to OPENAI_BASE_URL)."""
+    endpoints: list[Endpoint] = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        model, _, base_url = item.partition("@")
+        endpoints.append(Endpoint(model.strip(), base_url.strip().rstrip("/") or BASE_URL))
+    if not endpoints:
+        raise ValueError(f"No models in {spec!r}")
+    return endpoints
+
+
+@dataclasses.dataclass
+class Generation:
+    """SUT output together with timing and token usage of the request that produced it."""
+    text: str
+    wall_s: float | None = None
+    ttft_s: float | None = None
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
+    # server-side prompt cache: prompt tokens served from the KV cache and the
+    # prefill time of the rest (reported by llama.cpp / vLLM, not by Ollama)
+    cached_prompt_tokens: int | None = None
+    prefill_s: float | None = None
+    cached: bool = False
+    reused: bool = False
+
+    @property
+    def tokens_per_s(self) -> float | None:
+        if not self.completion_tokens or not self.wall_s:
+            return None
+        return self.completion_tokens / self.wall_s
+
+    def metrics(self) -> dict:
+        """Flat dict for the case's extra."""
+        tps = self.tokens_per_s
+        out = {
+            "latency_s": round(self.wall_s, 4) if self.wall_s is not None else None,
+            "ttft_s": round(self.ttft_s, 4) if self.ttft_s is not None else None,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "tokens_per_s": round(tps, 2) if tps is not None else None,
+            "cached": self.cached,
+            "reused": self.reused,
+        }
+        if self.cached_prompt_tokens is not None:
+            out["cached_prompt_tokens"] = self.cached_prompt_tokens
+        if self.prefill_s is not None:
+            out["prefill_s"] = round(self.prefill_s, 4)
+        return out
+
+
+def _prompt_cache(usage, timings) -> dict:
+    """
+    cached_prompt_tokens / prefill_s from the usage (OpenAI prompt_tokens_details)
+    and llama.cpp's non-standard "timings" of a response.
+    """
+    out: dict = {}
+    details = getattr(usage, "prompt_tokens_details", None) if usage else None
+    if details is not None and getattr(details, "cached_tokens", None) is not None:
+        out["cached_prompt_tokens"] = details.cached_tokens
+    if isinstance(timings, dict):
+        if "cached_prompt_tokens" not in out and timings.get("cache_n") is not None:
+            out["cached_prompt_tokens"] = timings["cache_n"]
+        if timings.get("prompt_ms") is not None:
+            out["prefill_s"] = timings["prompt_ms"] / 1000
+    return out
+
+
+def _scheduler(endpoint: Endpoint):
+    # one scheduler per server: models served from the same GPU share its capacity
+    return get_scheduler("sut" if endpoint.base_url == BASE_URL else f"sut@{endpoint.base_url}")
+
+
+def _generate(prompt: str, endpoint: Endpoint) -> Generation:
+    t0 = time.perf_counter()
+    resp = client_for(endpoint.base_url).chat.completions.create(
+        model=endpoint.model,
         messages=[{"role": "user", "content": prompt}],
-        temperature=0.2,
+        **GENERATION_PARAMS,
+        **request_options(prompt),
     )
-    return (resp.choices[0].message.content or "").strip()
+    wall_s = time.perf_counter() - t0
+    usage = resp.usage
+    return Generation(
+        text=(resp.choices[0].message.content or "").strip(),
+        wall_s=wall_s,
+        prompt_tokens=usage.prompt_tokens if usage else None,
+        completion_tokens=usage.completion_tokens if usage else None,
+        **_prompt_cache(usage, getattr(resp, "timings", None)),
+    )
+
+
+def _generate_stream(prompt: str, early_stop: EarlyStop, endpoint: Endpoint) -> Generation:
+    """Stream the completion and stop reading as soon as early_stop says the case fails."""
+    t0 = time.perf_counter()
+    stream = client_for(endpoint.base_url).chat.completions.create(
+        model=endpoint.model,
+        messages=[{"role": "user", "content": prompt}],
+        max_tokens=early_stop.max_tokens(),
+        stream=True,
+        stream_options={"include_usage": True},
+        **GENERATION_PARAMS,
+        **request_options(prompt),
+    )
+    parts: list[str] = []
+    ttft_s = None
+    usage = None
+    timings = None
+    try:
+        for chunk in stream:
+            if chunk.usage is not None:
+                usage = chunk.usage
+            timings = getattr(chunk, "timings", None) or timings
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            if ttft_s is None:
+                ttft_s = time.perf_counter() - t0
+            parts.append(delta)
+            if early_stop.check("".join(parts)) is not None:
+                break
+    finally:
+        stream.close()
+    wall_s = time.perf_counter() - t0
+    # An aborted stream never sends the usage chunk; one chunk ~ one token then.
+    return Generation(
+        text="".join(parts).strip(),
+        wall_s=wall_s,
+        ttft_s=ttft_s,
+        prompt_tokens=usage.prompt_tokens if usage else None,
+        completion_tokens=usage.completion_tokens if usage else len(parts),
+        **_prompt_cache(usage, timings),
+    )
+
+
+def call_bielik_timed(
+    prompt: str,
+    early_stop: EarlyStop | None = None,
+    endpoint: Endpoint | None = None,
+) -> Generation:
+    """
+    Generate SUT output with timing/usage. With early_stop the completion is
+    streamed and may be cut short once the output is certain to fail the row's rules.
+    endpoint selects another model/server than OLLAMA_MODEL / OPENAI_BASE_URL.
+    """
+    endpoint = endpoint or DEFAULT_ENDPOINT
+
+    def request() -> Generation:
+        if early_stop is None:
+            return _generate(prompt, endpoint)
+        return _generate_stream(prompt, early_stop, endpoint)
+
+    def generate() -> Generation:
+        return _scheduler(endpoint).call(request)
+
+    mode = response_cache_mode()
+    if mode == "off":
+        return generate()
+
+    cache = response_cache()
+    key_parts: list = [endpoint.base_url, endpoint.model, prompt, GENERATION_PARAMS]
+    if early_stop is not None:
+        key_parts.append(dataclasses.asdict(early_stop))
+    key = cache_key(*key_parts)
+    hit = cache.get(key)
+    if hit is not None:
+        return Generation(text=hit["output"], **hit.get("metrics", {}), cached=True)
+    if mode == "replay":
+        raise CacheMissError(f"No cached response for model={endpoint.model!r} (EVAL_CACHE_MODE=replay)")
+
+    gen = generate()
+    metrics = dataclasses.asdict(gen)
+    del metrics["text"], metrics["cached"], metrics["reused"]
+    cache.put(key, {"output": gen.text, "metrics": metrics})
+    return gen
+
+
+def _generate_n(prompt: str, n: int, endpoint: Endpoint) -> list[Generation]:
+    """
+    n samples from one request (API n parameter): the prompt is processed once.
+    Servers that ignore n (Ollama) return a single choice.
+    """
+    t0 = time.perf_counter()
+    resp = client_for(endpoint.base_url).chat.completions.create(
+        model=endpoint.model,
+        messages=[{"role": "user", "content": prompt}],
+        n=n,
+        **GENERATION_PARAMS,
+        **request_options(prompt),
+    )
+    wall_s = time.perf_counter() - t0
+    usage = resp.usage
+    choices = resp.choices[:n]
+    per_sample = usage.completion_tokens // len(choices) if usage and choices else None
+    return [
+        Generation(
+            text=(choice.message.content or "").strip(),
+            wall_s=wall_s,
+            prompt_tokens=usage.prompt_tokens if usage else None,
+            completion_tokens=per_sample,
+            **_prompt_cache(usage, getattr(resp, "timings", None)),
+        )
+        for choice in choices
+    ]
+
+
+def call_bielik_samples(prompt: str, k: int, endpoint: Endpoint | None = None) -> list[Generation]:
+    """
+    k sampled outputs for prompt: one request with n=k, topped up with concurrent
+    single requests when the server returns fewer choices. Samples are never
+    streamed (no early stop). Cached as one entry per (prompt, k).
+    """
+    endpoint = endpoint or DEFAULT_ENDPOINT
+    sched = _scheduler(endpoint)
+
+    def generate() -> list[Generation]:
+        gens = sched.call(lambda: _generate_n(prompt, k, endpoint))
+        add_stat("samples", "n_requests", 1)
+        missing = k - len(gens)
+        if missing > 0:
+            add_stat("samples", "topup_requests", missing)
+            with ThreadPoolExecutor(max_workers=missing, thread_name_prefix="sample") as pool:
+                gens += pool.map(lambda _: sched.call(lambda: _generate(prompt, endpoint)), range(missing))
+        return gens
+
+    mode = response_cache_mode()
+    if mode == "off":
+        return generate()
+
+    cache = response_cache()
+    key = cache_key(endpoint.base_url, endpoint.model, prompt, GENERATION_PARAMS, {"samples": k})
+    hit = cache.get(key)
+    if hit is not None:
+        return [Generation(text=h["output"], **h.get("metrics", {}), cached=True) for h in hit["samples"]]
+    if mode == "replay":
+        raise CacheMissError(f"No cached samples for model={endpoint.model!r} (EVAL_CACHE_MODE=replay)")
+
+    gens = generate()
+    stored = []
+    for gen in gens:
+        metrics = dataclasses.asdict(gen)
+        del metrics["text"], metrics["cached"], metrics["reused"]
+        stored.append({"output": gen.text, "metrics": metrics})
+    cache.put(key, {"samples": stored})
+    return gens
+
+
+def call_bielik(prompt: str, early_stop: EarlyStop | None = None) -> str:
+    return call_bielik_timed(prompt, early_stop).text
+
+
+def _ollama_root(base_url: str = BASE_URL) -> str:
+    root = base_url.rstrip("/")
+    return root[: -len("/v1")] if root.endswith("/v1") else root
+
+
+def set_keep_alive(model: str, keep_alive: str | int, base_url: str = BASE_URL) -> bool:
+    """
+    Load a model (or unload it with keep_alive=0) through Ollama's native API.
+    Returns False when the endpoint is not Ollama or is not reachable.
+    """
+    body = json.dumps({"model": model, "keep_alive": keep_alive}).encode("utf-8")
+    req = urllib.request.Request(
+        f"{_ollama_root(base_url)}/api/generate",
+        data=body,
+        headers={"Content-Type": "application/json"},
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=request_timeout()) as resp:
+            resp.read()
+    except (urllib.error.URLError, OSError):
+        return False
+    return True
+
+
+def warm_up(model: str, keep_alive: str | int, base_url: str = BASE_URL) -> float:
+    """
+    Make sure model is loaded before timed work starts. Returns load time in seconds.
+    Falls back to a one-token completion on non-Ollama backends.
+    """
+    t0 = time.perf_counter()
+    if not set_keep_alive(model, keep_alive, base_url):
+        client_for(base_url).chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": "ok"}],
+            max_tokens=1,
+        )
+    return time.perf_counter() - t0
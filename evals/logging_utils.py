@@ -1,3 +1,82 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+# case log records are written through a buffer of this many bytes
+CASE_LOG_BUFFER = 1 << 16
+
+
+def case_log_path() -> Path | None:
+    """Structured case log of the current run (EVAL_CASE_LOG, .gz = gzip); None = no log."""
+    raw = os.getenv("EVAL_CASE_LOG", "").strip()
+    return Path(raw) if raw else None
+
+
+def case_print() -> bool:
+    """EVAL_CASE_PRINT=1: also print the old multi-line case block to stdout."""
+    return os.getenv("EVAL_CASE_PRINT", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def case_record(nodeid: str, props: dict[str, Any]) -> dict[str, Any] | None:
+    """Case log record of a finished test from its user properties; None = nothing recorded."""
+    record = {key: props.get(key) for key in ("case_id", "prompt", "output", "extra")}
+    if not any(v is not None for v in record.values()):
+        return None
+    return {"nodeid": nodeid, **record}
+
+
+class CaseLog:
+    """
+    Append-only JSONL file with one compact record per case (case_id, prompt,
+    output, extra), written through a buffer; gzip-compressed if the path ends in
+    .gz. Unlike the results journal it is not flushed per line: it is a log, not
+    the source of truth for --resume.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # numbering continues in a resumed run (gzip members can be appended)
+        self.lines = 0
+        if path.exists():
+            try:
+                with self._open("rt") as f:
+                    self.lines = sum(1 for _ in f)
+            except (OSError, EOFError):
+                # truncated by a crash; numbering may be off, the records are intact
+                pass
+        self._f = self._open("at")
+
+    def _open(self, mode: str):
+        if self.path.suffix == ".gz":
+            return gzip.open(self.path, mode, encoding="utf-8")
+        return self.path.open(mode, encoding="utf-8", buffering=CASE_LOG_BUFFER)
+
+    def append(self, record: dict[str, Any]) -> int:
+        """Write a record; returns its line number in the file (1-based)."""
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str)
+        with self._lock:
+            self._f.write(line + "\n")
+            self.lines += 1
+            return self.lines
+
+    def close(self) -> None:
+        with self._lock:
+            self._f.close()
+
+    def __enter__(self) -> CaseLog:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
 def print_case(case_id: str, prompt: str, output: str, extra: dict | None = None) -> None:
     print("\n" + "=" * 100)
     print(f"CASE: {case_id}")
@@ -13,3 +92,42 @@ def print_case(case_id: str, prompt: str, output: str, extra: dict | None = None
         for k, v in extra.items():
             print(f"{k}: {v}")
     print("=" * 100 + "\n")
+
+
+def format_case_log(nodeid: str, props: dict[str, Any]) -> str | None:
+    """Case log block of a finished test from its user properties; None = nothing recorded."""
+    case_id = props.get("case_id")
+    prompt = props.get("prompt")
+    output = props.get("output")
+    extra = props.get("extra")
+
+    if not (case_id or prompt or output or extra):
+        return None
+
+    lines = []
+    lines.append("=" * 100)
+    lines.append(f"TEST: {nodeid}")
+    if case_id:
+        lines.append(f"CASE: {case_id}")
+    lines.append("-" * 100)
+
+    if prompt is not None:
+        lines.append("PROMPT:")
+        lines.append(str(prompt))
+        lines.append("-" * 100)
+
+    if output is not None:
+        lines.append("OUTPUT:")
+        lines.append(str(output))
+        lines.append("-" * 100)
+
+    if extra is not None:
+        lines.append("EXTRA:")
+        if isinstance(extra, dict):
+            for k, v in extra.items():
+                lines.append(f"{k}: {v}")
+        else:
+            lines.append(str(extra))
+
+    lines.append("=" * 100)
+    return "\n".join(lines)
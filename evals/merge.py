@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import shutil
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from evals.html_report import write_html
+from evals.perf import perf_summary
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# latest_<label>__shard<i>of<N>[<suffix>].json written by `run_tests --shard i/N`;
+# a suffix (__seq: --sequential) marks a sampled run, which is not merged
+_SHARD_REPORT = re.compile(
+    r"^latest_(?P<label>.+)__shard(?P<index>\d+)of(?P<count>\d+)(?P<suffix>__\w+)?\.json$"
+)
+
+
+def _extra(test: dict[str, Any]) -> dict[str, Any] | None:
+    for prop in test.get("user_properties", []):
+        if isinstance(prop, dict) and isinstance(prop.get("extra"), dict):
+            return prop["extra"]
+    return None
+
+
+def _merge_stats(stats: list[dict[str, dict[str, Any]]]) -> dict[str, dict[str, Any]]:
+    """Sum numeric run stats over shards; other values are kept when all shards agree."""
+    merged: dict[str, dict[str, Any]] = {}
+    conflicts: set[tuple[str, str]] = set()
+    for shard in stats:
+        for section, values in shard.items():
+            out = merged.setdefault(section, {})
+            for key, value in values.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    out[key] = out.get(key, 0) + value
+                elif key not in out:
+                    out[key] = value
+                elif out[key] != value:
+                    conflicts.add((section, key))
+    for section, key in conflicts:
+        merged[section].pop(key, None)
+    dedup = merged.get("dedup")
+    if dedup and dedup.get("requests"):
+        dedup["dedup_ratio"] = round(1 - dedup.get("unique_generations", 0) / dedup["requests"], 4)
+    return merged
+
+
+def merge_reports(reports: list[dict[str, Any]]) -> dict[str, Any]:
+    """Combine JSON reports of disjoint shards of one run into a single report."""
+    tests = sorted(
+        (test for report in reports for test in report.get("tests", [])),
+        key=lambda t: t.get("nodeid", ""),
+    )
+    summary: Counter[str] = Counter()
+    for report in reports:
+        for key, value in report.get("summary", {}).items():
+            if isinstance(value, int):
+                summary[key] += value
+
+    if summary["failed"] or summary["error"]:
+        exitcode = 1
+    elif not tests:
+        exitcode = 5
+    else:
+        exitcode = max((r.get("exitcode", 0) for r in reports), default=0)
+
+    perf = perf_summary(e for e in map(_extra, tests) if e is not None)
+    walls = [r.get("eval_perf", {}).get("run_wall_s") for r in reports]
+    walls = [w for w in walls if w is not None]
+    if walls:
+        # shards run in parallel: the run takes as long as the slowest shard
+        perf["run_wall_s"] = max(walls)
+        perf["run_tokens_per_s"] = (
+            round(perf["overall"]["completion_tokens"] / perf["run_wall_s"], 2)
+            if perf["run_wall_s"]
+            else None
+        )
+
+    first = reports[0] if reports else {}
+    return {
+        "created": min((r.get("created", 0) for r in reports), default=0),
+        "duration": max((r.get("duration", 0) for r in reports), default=0),
+        "exitcode": exitcode,
+        "root": first.get("root", str(ROOT)),
+        "environment": {**first.get("environment", {}), "merged_shards": len(reports)},
+        "summary": dict(summary),
+        "eval_stats": _merge_stats([r.get("eval_stats", {}) for r in reports]),
+        "eval_perf": perf,
+        "tests": tests,
+    }
+
+
+def find_shard_reports(reports_dir: Path) -> dict[str, dict[int, Path]]:
+    """latest_* shard reports in reports_dir grouped by run label: {label: {index: path}}."""
+    groups: dict[str, dict[int, Path]] = {}
+    counts: dict[str, int] = {}
+    for path in sorted(reports_dir.glob("latest_*__shard*of*.json")):
+        m = _SHARD_REPORT.match(path.name)
+        if not m:
+            continue
+        if m.group("suffix"):
+            print(f"Skipping {path.name}: sampled (--sequential) shard runs cannot be merged")
+            continue
+        label = m.group("label")
+        count = int(m.group("count"))
+        if counts.setdefault(label, count) != count:
+            raise SystemExit(f"Shard reports for {label} use different shard counts")
+        groups.setdefault(label, {})[int(m.group("index"))] = path
+    for label, shards in groups.items():
+        missing = sorted(set(range(1, counts[label] + 1)) - set(shards))
+        if missing:
+            print(f"Warning: {label}: missing shard(s) {missing} of {counts[label]}")
+    return groups
+
+
+def write_merged(paths: list[Path], label: str, reports_dir: Path, record: bool = True) -> int:
+    reports = [json.loads(p.read_text(encoding="utf-8")) for p in paths]
+    sampled = [p.name for p, r in zip(paths, reports) if "sequential" in r]
+    if sampled:
+        raise SystemExit(f"Sampled (--sequential) reports cannot be merged: {', '.join(sampled)}")
+    merged = merge_reports(reports)
+
+    ts = datetime.now().strftime("%Y-%m-%d_%H%M%S")
+    json_path = reports_dir / f"pytest_report_{label}_{ts}.json"
+    html_path = reports_dir / f"pytest_report_{label}_{ts}.html"
+    latest_json = reports_dir / f"latest_{label}.json"
+    latest_html = reports_dir / f"latest_{label}.html"
+
+    json_path.write_text(json.dumps(merged, ensure_ascii=False, default=str), encoding="utf-8")
+    header = {k: v for k, v in merged.items() if k != "tests"}
+    write_html(header, merged["tests"], html_path)
+    shutil.copyfile(json_path, latest_json)
+    shutil.copyfile(html_path, latest_html)
+
+    print(f"Merged {len(paths)} report(s): {', '.join(p.name for p in paths)}")
+    print(", ".join(f"{v} {k}" for k, v in merged["summary"].items() if k not in ("total", "collected")))
+    print(f"Saved JSON:  {json_path}")
+    print(f"Saved HTML:  {html_path}")
+    print(f"Latest JSON: {latest_json}")
+    print(f"Latest HTML: {latest_html}")
+    if record:
+        from evals.history import record_run
+
+        record_run(json_path)
+    return merged["exitcode"]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m evals.run_tests merge",
+        description=(
+            "Merge JSON reports of a sharded run (run_tests --shard i/N) into one\n"
+            "report and one latest_* pair.\n\n"
+            "Examples:\n"
+            "  python -m evals.run_tests merge\n"
+            "  python -m evals.run_tests merge --label allsets__rules+golden\n"
+            "  python -m evals.run_tests merge --label nightly a.json b.json\n"
+        ),
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+    parser.add_argument(
+        "reports",
+        nargs="*",
+        help="Report files to merge. If omitted => all latest_<label>__shard*of*.json in --reports-dir.",
+    )
+    parser.add_argument(
+        "--reports-dir",
+        default="evals/reports",
+        help="Directory with shard reports and for the merged report (default: evals/reports)",
+    )
+    parser.add_argument(
+        "--label",
+        default=None,
+        help="Run label of the merged report (required with explicit report files).",
+    )
+    parser.add_argument(
+        "--no-history",
+        action="store_true",
+        help="Do not add the merged run to the results store (see evals.history).",
+    )
+    args = parser.parse_args(argv)
+
+    reports_dir = ROOT / args.reports_dir
+    reports_dir.mkdir(parents=True, exist_ok=True)
+
+    if args.reports:
+        if not args.label:
+            raise SystemExit("--label is required when report files are given")
+        return write_merged([Path(p) for p in args.reports], args.label, reports_dir, not args.no_history)
+
+    groups = find_shard_reports(reports_dir)
+    if args.label:
+        groups = {k: v for k, v in groups.items() if k == args.label}
+    if not groups:
+        raise SystemExit(f"No shard reports (latest_*__shard*of*.json) found in {reports_dir}")
+
+    exitcode = 0
+    for label, shards in sorted(groups.items()):
+        paths = [shards[i] for i in sorted(shards)]
+        exitcode = max(exitcode, write_merged(paths, label, reports_dir, not args.no_history))
+    return exitcode
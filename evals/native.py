@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import time
+import traceback
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+from evals.checks import case_early_stop, case_id, case_requests, case_row, evaluate_case, load_cases, prefetch_cases
+from evals.generation import shutdown
+from evals.journal import Journal, completed_nodeids, journal_path, resuming, write_report
+from evals.judge import judge_model_name
+from evals.local_bielik import MODEL
+from evals.perf import add_sample, mark_run_start, perf_report, record_startup
+from evals.phases import phased, run_sut_phase, start_judge_phase
+from evals.run_stats import record_stat, snapshot
+
+ROOT = Path(__file__).resolve().parents[1]
+
+SKIP_NO_JUDGE = "Set OLLAMA_JUDGE_MODEL (recommended) or OLLAMA_MODEL in .env / environment"
+
+
+def nodeid(test_type: str, cid: str) -> str:
+    """Same node id pytest would give the case, so reports stay comparable."""
+    return f"evals/tests/test_{test_type}_all.py::test_{test_type}_all[{cid}]"
+
+
+def _stage(outcome: str = "passed", duration: float = 0.0) -> dict[str, Any]:
+    return {"duration": duration, "outcome": outcome}
+
+
+def run_case(test_type: str, case: dict) -> dict[str, Any]:
+    """Run one case and return its entry in pytest-json-report format."""
+    cid = case_id(case, test_type)
+    entry: dict[str, Any] = {
+        "nodeid": nodeid(test_type, cid),
+        "lineno": 0,
+        "outcome": "passed",
+        "keywords": [f"test_{test_type}_all[{cid}]", test_type, f"test_{test_type}_all.py"],
+        "setup": _stage(),
+        "teardown": _stage(),
+        "user_properties": [],
+    }
+
+    t0 = time.perf_counter()
+    call: dict[str, Any]
+    try:
+        judge_model = judge_model_name() if test_type == "judge" else None
+        if test_type == "judge" and not judge_model:
+            entry["outcome"] = "skipped"
+            call = {"outcome": "skipped", "longrepr": f"Skipped: {SKIP_NO_JUDGE}"}
+        else:
+            row = case_row(case)
+            result = evaluate_case(test_type, case, row, case_early_stop(test_type, row), judge_model)
+
+            add_sample(result.extra)
+            entry["user_properties"] = [
+                {"case_id": str(row.get("id", "no_id"))},
+                {"prompt": row.get("input")},
+                {"output": result.output},
+                {"extra": result.extra},
+                {"fingerprint": result.fingerprint},
+                {"failure": result.failure},
+            ]
+            if result.failure is None:
+                call = {"outcome": "passed"}
+            else:
+                entry["outcome"] = "failed"
+                message = f"AssertionError: {result.failure}"
+                call = {
+                    "outcome": "failed",
+                    "crash": {"path": entry["nodeid"].split("::")[0], "lineno": 0, "message": message},
+                    "longrepr": message,
+                }
+    except Exception as e:
+        entry["outcome"] = "failed"
+        call = {
+            "outcome": "failed",
+            "crash": {"path": entry["nodeid"].split("::")[0], "lineno": 0, "message": repr(e)},
+            "longrepr": traceback.format_exc(),
+        }
+    call["duration"] = time.perf_counter() - t0
+    entry["call"] = call
+    return entry
+
+
+def run_native(test_types: list[str], json_path: Path, html_path: Path) -> int:
+    """
+    Run selected eval suites in-process (no pytest). Each finished case is appended
+    to the results journal (EVAL_JOURNAL, default <json_path>.jsonl); the JSON report
+    (pytest-json-report schema) and the HTML report are built from it at the end.
+    With EVAL_RESUME=1 cases already in the journal are not run again.
+    """
+    mark_run_start()
+    started = time.time()
+    journal = journal_path() or json_path.with_suffix(".jsonl")
+    done = completed_nodeids(journal) if resuming() else set()
+
+    judge_model = judge_model_name()
+    record_stat("run", sut_model=MODEL, judge_model=judge_model)
+    # case references only: rows are read by prefetch workers or when the case runs
+    plan: list[tuple[str, dict]] = []
+    for test_type in test_types:
+        for case in load_cases(test_type):
+            if nodeid(test_type, case_id(case, test_type)) not in done:
+                plan.append((test_type, case))
+    print(f"collected {len(plan) + len(done)} items" + (f" ({len(done)} already in journal)" if done else ""))
+    record_startup()
+    if phased():
+        requests = list(case_requests(plan, judge_model))
+        if requests:
+            print(f"SUT phase: generating {len(requests)} outputs")
+            run_sut_phase(requests)
+            if judge_model and "judge" in test_types:
+                print(f"Judge phase: loading {judge_model}")
+                start_judge_phase(judge_model)
+    else:
+        prefetch_cases(plan, judge_model)
+
+    counts: Counter[str] = Counter()
+    try:
+        with Journal(journal) as results:
+            for test_type, case in plan:
+                entry = run_case(test_type, case)
+                counts[entry["outcome"]] += 1
+                results.append(entry)
+                print(f"{entry['nodeid']} {entry['outcome'].upper()}")
+    finally:
+        shutdown()
+
+    header = {
+        "created": started,
+        "duration": time.time() - started,
+        "root": str(ROOT),
+        "environment": {"engine": "native"},
+        "eval_stats": snapshot(),
+        "eval_perf": perf_report(),
+    }
+    exitcode = write_report(header, journal, json_path, html_path)
+
+    print(", ".join(f"{v} {k}" for k, v in counts.items() if v) or "no cases run")
+    return exitcode
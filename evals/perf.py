@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Iterable, Mapping
+
+from evals.run_stats import record_stat
+
+PERCENTILES = (50, 95, 99)
+DEFAULT_STARTUP_BUDGET_S = 1.0
+
+_lock = threading.Lock()
+_samples: list[dict[str, Any]] = []
+_run_started: float | None = None
+
+
+def percentile(values: list[float], p: float) -> float | None:
+    """Percentile with linear interpolation between closest ranks."""
+    if not values:
+        return None
+    xs = sorted(values)
+    pos = (len(xs) - 1) * p / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(xs) - 1)
+    return xs[lo] + (xs[hi] - xs[lo]) * (pos - lo)
+
+
+def distribution(values: list[float]) -> dict[str, float] | None:
+    if not values:
+        return None
+    out = {f"p{p}": round(percentile(values, p), 4) for p in PERCENTILES}
+    out["mean"] = round(sum(values) / len(values), 4)
+    out["max"] = round(max(values), 4)
+    return out
+
+
+def summarize(samples: Iterable[Mapping[str, Any]]) -> dict[str, Any]:
+    """
+    Aggregate per-case metrics. Latency/throughput only count fresh generations:
+    cache hits, outputs reused from another case and results carried forward from
+    a previous report (incremental runs) are reported but skipped.
+    """
+    samples = list(samples)
+    fresh = [
+        s for s in samples
+        if not s.get("cached") and not s.get("reused") and not s.get("carried_forward")
+    ]
+    latency = [s["latency_s"] for s in fresh if s.get("latency_s") is not None]
+    ttft = [s["ttft_s"] for s in fresh if s.get("ttft_s") is not None]
+    tps = [s["tokens_per_s"] for s in fresh if s.get("tokens_per_s") is not None]
+    completion_tokens = sum(s.get("completion_tokens") or 0 for s in fresh)
+    prompt_tokens = sum(s.get("prompt_tokens") or 0 for s in fresh)
+    judge_latency = [
+        s["judge_latency_s"]
+        for s in samples
+        if s.get("judge_latency_s") is not None
+        and not s.get("judge_cached")
+        and not s.get("carried_forward")
+    ]
+    busy_s = sum(latency)
+    out = {
+        "cases": len(samples),
+        "generations": len(fresh),
+        "latency_s": distribution(latency),
+        "ttft_s": distribution(ttft),
+        "tokens_per_s": distribution(tps),
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        # completion tokens per second of request time (sum over requests)
+        "throughput_tokens_per_s": round(completion_tokens / busy_s, 2) if busy_s else None,
+        "judge_latency_s": distribution(judge_latency),
+    }
+    reported = [s for s in fresh if s.get("cached_prompt_tokens") is not None]
+    if reported:
+        # server-side prompt (KV) cache, see evals.prefix
+        cached = sum(s["cached_prompt_tokens"] for s in reported)
+        prompt = sum(s.get("prompt_tokens") or 0 for s in reported)
+        out["cached_prompt_tokens"] = cached
+        out["prompt_cache_hit_rate"] = round(cached / prompt, 4) if prompt else None
+        timed = [s for s in reported if s.get("prefill_s") is not None]
+        prefilled = sum((s.get("prompt_tokens") or 0) - s["cached_prompt_tokens"] for s in timed)
+        prefill_s = sum(s["prefill_s"] for s in timed)
+        if timed:
+            out["prefill_s"] = round(prefill_s, 4)
+        if prefilled > 0:
+            # cached tokens at the measured prefill speed of the uncached ones
+            out["est_prefill_saved_s"] = round(sum(s["cached_prompt_tokens"] for s in timed) * prefill_s / prefilled, 4)
+    sampled = [s["samples"] for s in samples if isinstance(s.get("samples"), dict)]
+    if sampled:
+        # EVAL_SAMPLES > 1: k outputs checked per case
+        out["sampled_cases"] = len(sampled)
+        out["mean_pass_at_k"] = round(sum(s["pass_at_k"] for s in sampled) / len(sampled), 4)
+        out["mean_pass_rate"] = round(sum(s["pass_rate"] for s in sampled) / len(sampled), 4)
+        out["flaky_cases"] = sum(1 for s in sampled if s.get("flaky"))
+    return out
+
+
+def mark_run_start() -> None:
+    global _run_started
+    _run_started = time.perf_counter()
+
+
+def record_startup() -> float | None:
+    """
+    Seconds from runner start (EVAL_STARTED_AT, set by evals.run_tests) until the
+    cases are collected and the first request can go out. Goes to eval_stats.startup;
+    a warning is printed above EVAL_STARTUP_BUDGET_S (default 1 s).
+    """
+    raw = os.getenv("EVAL_STARTED_AT", "").strip()
+    if not raw:
+        return None
+    ready_s = time.time() - float(raw)
+    budget_s = float(os.getenv("EVAL_STARTUP_BUDGET_S", DEFAULT_STARTUP_BUDGET_S))
+    record_stat("startup", ready_s=round(ready_s, 3), budget_s=budget_s)
+    if ready_s > budget_s:
+        print(f"\nWarning: startup took {ready_s:.2f}s (budget {budget_s:.2f}s, EVAL_STARTUP_BUDGET_S)")
+    return ready_s
+
+
+def add_sample(extra: Mapping[str, Any]) -> None:
+    with _lock:
+        _samples.append(dict(extra))
+
+
+def perf_summary(samples: Iterable[Mapping[str, Any]]) -> dict[str, Any]:
+    """Overall, per set and per type summaries of the given per-case metrics."""
+    samples = list(samples)
+    by_set: dict[str, list[Mapping[str, Any]]] = {}
+    by_type: dict[str, list[Mapping[str, Any]]] = {}
+    for s in samples:
+        by_set.setdefault(str(s.get("test_set")), []).append(s)
+        by_type.setdefault(str(s.get("type")), []).append(s)
+
+    report = {
+        "overall": summarize(samples),
+        "by_set": {k: summarize(v) for k, v in sorted(by_set.items())},
+        "by_type": {k: summarize(v) for k, v in sorted(by_type.items())},
+    }
+    flaky = [
+        {k: s["samples"][k] for k in ("case_id", "passed", "k", "pass_rate")}
+        for s in samples
+        if isinstance(s.get("samples"), dict) and s["samples"].get("flaky")
+    ]
+    if flaky:
+        report["flaky"] = sorted(flaky, key=lambda f: f["case_id"])
+    return report
+
+
+def perf_report() -> dict[str, Any]:
+    """Overall, per set and per type summaries of all collected cases."""
+    with _lock:
+        samples = list(_samples)
+
+    report = perf_summary(samples)
+    overall = report["overall"]
+    if _run_started is not None:
+        run_wall_s = time.perf_counter() - _run_started
+        report["run_wall_s"] = round(run_wall_s, 3)
+        report["run_tokens_per_s"] = (
+            round(overall["completion_tokens"] / run_wall_s, 2) if run_wall_s else None
+        )
+    return report
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import os
+import time
+
+from evals.cache import response_cache_mode
+from evals.generation import max_concurrency, prefetch, wait_all
+from evals.local_bielik import DEFAULT_ENDPOINT, Endpoint, set_keep_alive, warm_up
+from evals.rules import EarlyStop
+from evals.run_stats import record_stat
+
+DEFAULT_KEEP_ALIVE = "30m"
+
+
+def phased() -> bool:
+    """
+    Return True if EVAL_PHASED env var asks for phase-separated runs:
+    all SUT generations first, then all judge evaluations.
+    """
+    return os.getenv("EVAL_PHASED", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def keep_alive() -> str:
+    return os.getenv("EVAL_KEEP_ALIVE", "").strip() or DEFAULT_KEEP_ALIVE
+
+
+def run_sut_phase(
+    requests: list[tuple[str, EarlyStop | None]],
+    endpoint: Endpoint | None = None,
+) -> None:
+    """
+    Load the SUT once and generate outputs for all requests before any test runs.
+    Model load time is reported separately from generation time.
+    """
+    endpoint = endpoint or DEFAULT_ENDPOINT
+    load_s = 0.0
+    if response_cache_mode() != "replay":
+        load_s = warm_up(endpoint.model, keep_alive(), endpoint.base_url)
+
+    t0 = time.perf_counter()
+    prefetch(requests, max_workers=max_concurrency(), endpoint=endpoint)
+    wait_all()
+    record_stat(
+        "phases",
+        sut_model=endpoint.model,
+        sut_load_s=round(load_s, 3),
+        sut_generations=len(requests),
+        sut_generation_s=round(time.perf_counter() - t0, 3),
+    )
+
+
+def unload(endpoint: Endpoint) -> None:
+    """Ask Ollama to free the model's memory now (no-op on other backends)."""
+    if response_cache_mode() != "replay":
+        set_keep_alive(endpoint.model, 0, endpoint.base_url)
+
+
+def start_judge_phase(judge_model: str, sut: Endpoint | None = None) -> None:
+    """
+    Unload the SUT (if it is a different model) and load the judge once,
+    so Ollama does not swap models between cases.
+    """
+    sut = sut or DEFAULT_ENDPOINT
+    if judge_model != sut.model:
+        set_keep_alive(sut.model, 0, sut.base_url)
+    load_s = warm_up(judge_model, keep_alive())
+    record_stat("phases", judge_model=judge_model, judge_load_s=round(load_s, 3))
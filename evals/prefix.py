@@ -0,0 +1,187 @@
+"""
+Prompt-prefix-aware ordering of SUT requests.
+
+Model servers keep the KV cache of the previous prompt (llama.cpp per slot,
+Ollama per loaded model), so a request whose prompt starts like the previous
+one only prefills the new suffix. Cases come in dataset file order; this module
+reorders them so prompts sharing an instruction prefix ("Odpowiedz TYLKO jedną
+literą...") run back to back, and for llama.cpp pins each prefix group to one
+server slot (id_slot + cache_prompt).
+"""
+from __future__ import annotations
+
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Sequence, TypeVar
+
+from evals.run_stats import add_stat, record_stat, snapshot
+
+T = TypeVar("T")
+
+# prompts sharing at least this many leading characters form one group (one slot)
+DEFAULT_MIN_GROUP_CHARS = 32
+
+_WORD = re.compile(r"\s*\S+")
+
+_lock = threading.Lock()
+_slots: dict[str, int] = {}
+
+
+def prefix_order() -> bool:
+    """EVAL_PREFIX_ORDER=1: generate outputs in prompt-prefix order (see order_requests)."""
+    return os.getenv("EVAL_PREFIX_ORDER", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def llama_slots() -> int:
+    """Number of llama.cpp server slots (--parallel) to pin prefix groups to; 0 = no pinning."""
+    raw = os.getenv("EVAL_LLAMA_SLOTS", "").strip()
+    if not raw:
+        return 0
+    try:
+        return max(int(raw), 0)
+    except ValueError as e:
+        raise ValueError(f"Invalid EVAL_LLAMA_SLOTS={raw!r}: expected integer") from e
+
+
+def min_group_chars() -> int:
+    raw = os.getenv("EVAL_PREFIX_MIN_CHARS", "").strip()
+    return int(raw) if raw else DEFAULT_MIN_GROUP_CHARS
+
+
+def common_prefix_len(a: str, b: str) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+@dataclass
+class _Node:
+    children: dict[str, _Node] = field(default_factory=dict)
+    items: list[int] = field(default_factory=list)
+    size: int = 0
+
+
+class PrefixTrie:
+    """Word-level trie of prompts; leaves hold the indexes of the prompts."""
+
+    def __init__(self) -> None:
+        self.root = _Node()
+
+    def insert(self, prompt: str, index: int) -> None:
+        node = self.root
+        node.size += 1
+        for word in _WORD.findall(prompt):
+            node = node.children.setdefault(word, _Node())
+            node.size += 1
+        node.items.append(index)
+
+    def groups(self, min_chars: int) -> list[list[int]]:
+        """
+        Prompt indexes in depth-first order (larger subtrees first), split into
+        groups of prompts sharing at least min_chars leading characters.
+        """
+        groups: list[list[int]] = []
+        # explicit stack: the trie is one level per word, too deep for recursion
+        stack: list[tuple[_Node, int, list[int] | None]] = [(self.root, 0, None)]
+        while stack:
+            node, depth, group = stack.pop()
+            if group is None and depth >= min_chars:
+                group = []
+                groups.append(group)
+            for index in node.items:
+                if group is None:
+                    groups.append([index])
+                else:
+                    group.append(index)
+            children = sorted(node.children.items(), key=lambda kv: (-kv[1].size, kv[0]))
+            # pushed in reverse so the largest subtree is walked first
+            for word, child in reversed(children):
+                stack.append((child, depth + len(word), group))
+        return groups
+
+
+def shared_chars(prompts: Sequence[str]) -> int:
+    """
+    Characters each prompt shares with the one before it (what a prompt cache can
+    reuse). Repeated prompts are skipped: evals.generation generates them once.
+    """
+    seen: set[str] = set()
+    distinct = [p for p in prompts if not (p in seen or seen.add(p))]
+    return sum(common_prefix_len(a, b) for a, b in zip(distinct, distinct[1:]))
+
+
+def _assign_slots(groups: list[list[int]], prompts: Sequence[str], slots: int) -> list[list[int]]:
+    """
+    The trie order cut into `slots` contiguous runs of about equal prompt length,
+    only between groups: neighbours in the trie share the most, so they stay on
+    one slot even when they are not a group of their own.
+    """
+    queues: list[list[int]] = [[] for _ in range(slots)]
+    total = sum(len(prompts[i]) for group in groups for i in group)
+    done = 0
+    for group in groups:
+        slot = min(done * slots // total, slots - 1) if total else 0
+        queues[slot].extend(group)
+        done += sum(len(prompts[i]) for i in group)
+    return queues
+
+
+def order_requests(requests: Sequence[tuple[str, T]]) -> list[tuple[str, T]]:
+    """
+    Requests reordered by common prompt prefix. With EVAL_LLAMA_SLOTS=N the prefix
+    groups are spread over N slots and interleaved, so N workers keep N slots busy
+    while every slot sees related prompts back to back. Records the estimated
+    prompt-cache hit rate (shared leading characters / prompt characters) of the
+    file order and of the new order in eval_stats.prefix.
+    """
+    prompts = [prompt for prompt, _ in requests]
+    trie = PrefixTrie()
+    for i, prompt in enumerate(prompts):
+        trie.insert(prompt, i)
+    groups = trie.groups(min_group_chars())
+
+    slots = llama_slots()
+    if slots:
+        queues = _assign_slots(groups, prompts, slots)
+        with _lock:
+            for slot, queue in enumerate(queues):
+                for i in queue:
+                    _slots[prompts[i]] = slot
+        order = [q[n] for n in range(max(map(len, queues), default=0)) for q in queues if n < len(q)]
+        shared = sum(shared_chars([prompts[i] for i in q]) for q in queues)
+    else:
+        order = [i for group in groups for i in group]
+        shared = shared_chars([prompts[i] for i in order])
+
+    add_stat("prefix", "requests", len(prompts))
+    add_stat("prefix", "groups", sum(1 for g in groups if len(g) > 1))
+    add_stat("prefix", "prompt_chars", sum(map(len, set(prompts))))
+    add_stat("prefix", "shared_chars_file_order", shared_chars(prompts))
+    add_stat("prefix", "shared_chars", shared)
+    stats = snapshot()["prefix"]
+    total = stats["prompt_chars"]
+    record_stat(
+        "prefix",
+        slots=slots,
+        est_hit_rate_file_order=round(stats["shared_chars_file_order"] / total, 4) if total else 0.0,
+        est_hit_rate=round(stats["shared_chars"] / total, 4) if total else 0.0,
+    )
+    return [requests[i] for i in order]
+
+
+def slot_for(prompt: str) -> int | None:
+    """llama.cpp slot pinned for prompt by order_requests(), None if not pinned."""
+    with _lock:
+        return _slots.get(prompt)
+
+
+def request_options(prompt: str) -> dict:
+    """extra_body for a SUT request: llama.cpp slot pinning and prompt caching."""
+    slot = slot_for(prompt)
+    if slot is None:
+        return {}
+    return {"extra_body": {"id_slot": slot, "cache_prompt": True}}
@@ -44,3 +44,16 @@ def record_case_from_row(
         output=output,
         extra=extra,
     )
+
+
+def record_result(
+    request: pytest.FixtureRequest,
+    fingerprint: str | None,
+    failure: str | None,
+) -> None:
+    """
+    Zapisz fingerprint przypadku i komunikat błędu (None = pass), aby tryb
+    przyrostowy (--incremental) mógł przenieść wynik do kolejnego raportu.
+    """
+    request.node.user_properties.append(("fingerprint", fingerprint))
+    request.node.user_properties.append(("failure", failure))
@@ -1,34 +1,57 @@
+import functools
 import re
-from typing import Iterable
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Mapping
 
 REFUSAL_HINTS = [
     "nie mogę", "nie moge", "nie jestem w stanie", "nie posiadam", "nie mam dostępu",
     "as an ai", "i can't", "i cannot", "sorry", "nie wiem",
 ]
 
+_WHITESPACE = re.compile(r"\s+")
+_REFUSAL = re.compile("|".join(re.escape(h.lower()) for h in REFUSAL_HINTS))
+
+
 def normalize(s: str) -> str:
     s = s.strip().lower()
     s = s.replace("\u00A0", " ")  # nbsp
-    s = re.sub(r"\s+", " ", s)
+    s = _WHITESPACE.sub(" ", s)
     s = s.strip(" \t\r\n.,;:!?\"'`()[]{}")
     return s
 
+
+@functools.lru_cache(maxsize=4096)
+def _phrase_matcher(needles: tuple[str, ...]) -> re.Pattern[str]:
+    """One regex matching any normalized needle as a substring."""
+    norm = sorted({normalize(n) for n in needles}, key=len, reverse=True)
+    return re.compile("|".join(re.escape(n) for n in norm))
+
+
+@functools.lru_cache(maxsize=4096)
+def _word_matcher(words: tuple[str, ...]) -> re.Pattern[str]:
+    """One regex matching any normalized word between word boundaries."""
+    norm = sorted({normalize(w) for w in words}, key=len, reverse=True)
+    return re.compile(r"\b(?:" + "|".join(re.escape(w) for w in norm) + r")\b")
+
+
+@functools.lru_cache(maxsize=4096)
+def _full_matcher(pattern: str) -> re.Pattern[str]:
+    return re.compile(pattern, re.IGNORECASE)
+
+
 def contains_any(haystack: str, needles: Iterable[str]) -> bool:
-    h = normalize(haystack)
-    for n in needles:
-        if normalize(n) in h:
-            return True
-    return False
+    needles = tuple(needles)
+    if not needles:
+        return False
+    return _phrase_matcher(needles).search(normalize(haystack)) is not None
 
 
 def contains_word(haystack: str, words: Iterable[str]) -> bool:
     """Check if any word appears as whole word (using word boundaries)."""
-    h = normalize(haystack)
-    for w in words:
-        pattern = r'\b' + re.escape(normalize(w)) + r'\b'
-        if re.search(pattern, h):
-            return True
-    return False
+    words = tuple(words)
+    if not words:
+        return False
+    return _word_matcher(words).search(normalize(haystack)) is not None
 
 def contains_any_raw(haystack: str, needles: Iterable[str]) -> bool:
     h = haystack.lower()
@@ -38,7 +61,7 @@ def contains_any_raw(haystack: str, needles: Iterable[str]) -> bool:
     return False
 
 def looks_like_refusal(text: str) -> bool:
-    return contains_any_raw(text, REFUSAL_HINTS)
+    return _REFUSAL.search(text.lower()) is not None
 
 def only_number(text: str) -> bool:
     t = text.strip()
@@ -47,9 +70,203 @@ def only_number(text: str) -> bool:
 
 def matches_regex(text: str, pattern: str) -> bool:
     """Check if output matches given regex pattern (fullmatch, case insensitive)."""
-    return bool(re.fullmatch(pattern, text.strip(), re.IGNORECASE))
+    return bool(_full_matcher(pattern).fullmatch(text.strip()))
 
 
 def max_length(text: str, limit: int) -> bool:
     """Check if output has at most 'limit' characters."""
     return len(text.strip()) <= limit
+
+
+RULE_LIST_KEYS = (
+    "must_contain_any",
+    "must_not_contain_any",
+    "must_contain_word",
+    "must_not_contain_word",
+)
+
+
+@dataclass(frozen=True)
+class CompiledRules:
+    """
+    Rule spec of one rules row; its matchers are compiled on the first check(),
+    so loading a cached index of many rows stays cheap.
+
+    check() evaluates the rules in the same order (and with the same messages)
+    as test_rules_all, normalizing the output only once.
+    """
+    must_contain_any: tuple[str, ...] = ()
+    must_not_contain_any: tuple[str, ...] = ()
+    must_contain_word: tuple[str, ...] = ()
+    must_not_contain_word: tuple[str, ...] = ()
+    must_match_regex: str | None = None
+    max_length: int | None = None
+
+    _must_any: re.Pattern[str] | None = field(default=None, init=False, repr=False, compare=False)
+    _must_not: re.Pattern[str] | None = field(default=None, init=False, repr=False, compare=False)
+    _must_word: re.Pattern[str] | None = field(default=None, init=False, repr=False, compare=False)
+    _must_not_word: re.Pattern[str] | None = field(default=None, init=False, repr=False, compare=False)
+    _regex: re.Pattern[str] | None = field(default=None, init=False, repr=False, compare=False)
+    _compiled: bool = field(default=False, init=False, repr=False, compare=False)
+
+    def _compile(self) -> None:
+        def setp(name: str, value: Any) -> None:
+            object.__setattr__(self, name, value)
+
+        if self.must_contain_any:
+            setp("_must_any", _phrase_matcher(self.must_contain_any))
+        if self.must_not_contain_any:
+            setp("_must_not", _phrase_matcher(self.must_not_contain_any))
+        if self.must_contain_word:
+            setp("_must_word", _word_matcher(self.must_contain_word))
+        if self.must_not_contain_word:
+            setp("_must_not_word", _word_matcher(self.must_not_contain_word))
+        if self.must_match_regex:
+            setp("_regex", _full_matcher(self.must_match_regex))
+        setp("_compiled", True)
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # pickle the raw spec only: matchers are rebuilt by the current normalize()
+        return (
+            CompiledRules,
+            (
+                self.must_contain_any,
+                self.must_not_contain_any,
+                self.must_contain_word,
+                self.must_not_contain_word,
+                self.must_match_regex,
+                self.max_length,
+            ),
+        )
+
+    def _forbidden_phrase(self, h: str) -> str | None:
+        if self._must_not is not None and self._must_not.search(h):
+            return f"Output contains forbidden phrase from: {list(self.must_not_contain_any)}"
+        return None
+
+    def _forbidden_word(self, h: str) -> str | None:
+        if self._must_not_word is not None and self._must_not_word.search(h):
+            return f"Output contains forbidden word from: {list(self.must_not_contain_word)}"
+        return None
+
+    def _too_long(self, output: str) -> str | None:
+        if self.max_length and not max_length(output, self.max_length):
+            return f"Output exceeds max length of {self.max_length} chars"
+        return None
+
+    def check(self, output: str, stopped_early: str | None = None) -> str | None:
+        """
+        Return the message of the first failing rule, None if output passes.
+
+        stopped_early is the EarlyStop rule a streamed output was cut at; that rule
+        is reported first, since the rules checked before it would see only the
+        cut output, not the full one a non-streamed run checks.
+        """
+        if not output.strip():
+            return "Model returned empty output"
+        if looks_like_refusal(output):
+            return "Model output looks like a refusal"
+
+        if not self._compiled:
+            self._compile()
+        h = normalize(output)
+        failure = None
+        if stopped_early == "max_length":
+            failure = self._too_long(output)
+        elif stopped_early == "must_not_contain_any":
+            failure = self._forbidden_phrase(h)
+        elif stopped_early == "must_not_contain_word":
+            failure = self._forbidden_word(h)
+        if failure is not None:
+            return failure
+        # Substring matching (phrase can be part of larger text)
+        if self._must_any is not None and not self._must_any.search(h):
+            return f"Expected output to contain any of: {list(self.must_contain_any)}"
+        failure = self._forbidden_phrase(h)
+        if failure is not None:
+            return failure
+        # Whole word matching (word boundaries)
+        if self._must_word is not None and not self._must_word.search(h):
+            return f"Expected output to contain word: {list(self.must_contain_word)}"
+        failure = self._forbidden_word(h)
+        if failure is not None:
+            return failure
+        # Regex matching (strict format validation)
+        if self._regex is not None and not self._regex.fullmatch(output.strip()):
+            return f"Output does not match required format: {self.must_match_regex}"
+        # Max length validation
+        return self._too_long(output)
+
+
+def compile_rules(row: Mapping[str, Any]) -> CompiledRules:
+    """Validate and compile the rule spec of a rules row. Raises ValueError on bad spec."""
+    row_id = row.get("id", "no_id")
+    lists: dict[str, tuple[str, ...]] = {}
+    for key in RULE_LIST_KEYS:
+        value = row.get(key) or []
+        if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+            raise ValueError(f"Rules row {row_id}: '{key}' must be a list of strings")
+        lists[key] = tuple(value)
+
+    regex = row.get("must_match_regex") or None
+    if regex is not None:
+        try:
+            _full_matcher(regex)
+        except (re.error, TypeError) as e:
+            raise ValueError(f"Rules row {row_id}: invalid must_match_regex {regex!r}: {e}") from e
+
+    limit = row.get("max_length") or None
+    if limit is not None and not isinstance(limit, int):
+        raise ValueError(f"Rules row {row_id}: 'max_length' must be an integer")
+
+    return CompiledRules(**lists, must_match_regex=regex, max_length=limit)
+
+
+@dataclass(frozen=True)
+class EarlyStop:
+    """
+    Constraints of a rules row that can fail a case before generation ends.
+    Used to abort a streamed generation as soon as the verdict is certain.
+    """
+    max_length: int | None = None
+    must_not_contain_any: tuple[str, ...] = ()
+    must_not_contain_word: tuple[str, ...] = ()
+
+    def max_tokens(self) -> int | None:
+        """Server-side token budget; generous, the stream is cut at max_length anyway."""
+        if self.max_length is None:
+            return None
+        return 2 * self.max_length + 16
+
+    def check(self, partial: str) -> str | None:
+        """Return name of the rule that partial output already fails, else None."""
+        if looks_like_refusal(partial):
+            return "refusal"
+        if self.max_length is not None and not max_length(partial, self.max_length):
+            return "max_length"
+        if self.must_not_contain_any and contains_any(partial, self.must_not_contain_any):
+            return "must_not_contain_any"
+        if self.must_not_contain_word and _contains_closed_word(partial, self.must_not_contain_word):
+            return "must_not_contain_word"
+        return None
+
+
+def _contains_closed_word(haystack: str, words: Iterable[str]) -> bool:
+    """Like contains_word, but ignore matches at the very end (the word may still continue)."""
+    words = tuple(words)
+    if not words:
+        return False
+    h = normalize(haystack)
+    return any(m.end() < len(h) for m in _word_matcher(words).finditer(h))
+
+
+def early_stop_for(row: Mapping[str, Any]) -> EarlyStop | None:
+    """Build EarlyStop from a rules row, None if it has no early-failing constraints."""
+    spec = EarlyStop(
+        max_length=row.get("max_length") or None,
+        must_not_contain_any=tuple(row.get("must_not_contain_any", [])),
+        must_not_contain_word=tuple(row.get("must_not_contain_word", [])),
+    )
+    if spec == EarlyStop():
+        return None
+    return spec
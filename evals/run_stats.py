@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import threading
+from typing import Any
+
+# Run-level numbers (phases, model load times, ...) collected during a session.
+# conftest.py prints them in the terminal summary and adds them to the JSON
+# report under the "eval_stats" key.
+RUN_STATS: dict[str, dict[str, Any]] = {}
+
+_lock = threading.Lock()
+
+
+def record_stat(section: str, **values: Any) -> None:
+    with _lock:
+        RUN_STATS.setdefault(section, {}).update(values)
+
+
+def add_stat(section: str, key: str, amount: float) -> None:
+    with _lock:
+        stats = RUN_STATS.setdefault(section, {})
+        stats[key] = stats.get(key, 0) + amount
+
+
+def snapshot() -> dict[str, dict[str, Any]]:
+    with _lock:
+        return {section: dict(values) for section, values in RUN_STATS.items()}
@@ -1,14 +1,26 @@
 from __future__ import annotations
 
 import argparse
+import json
 import os
+import re
 import subprocess
+import time
 from pathlib import Path
 from datetime import datetime
 import shutil
 import sys
 
 
+# Eval suites only need the report plugins. Autoloading every installed pytest
+# plugin (deepeval's imports its whole metric stack, anyio's imports trio) costs
+# seconds of startup, so the runner disables autoload and loads these explicitly.
+REPORT_PLUGINS = [
+    "pytest_metadata.plugin",
+    "pytest_html.plugin",
+    "pytest_jsonreport.plugin",
+]
+
 TYPE_TO_TESTFILE = {
     "rules": "evals/tests/test_rules_all.py",
     "golden": "evals/tests/test_golden_all.py",
@@ -28,7 +40,114 @@ def _slug(parts: list[str]) -> str:
     )[:80]
 
 
+_TS = r"\d{4}-\d{2}-\d{2}_\d{6}"
+
+
+def _resume_journal(run: str, reports: Path, prefix: str) -> Path:
+    """
+    Results journal of the run to resume: a journal/report path, a report file
+    name in the reports dir, or "last" (newest journal of the same label).
+    """
+    if run == "last":
+        pattern = re.compile(rf"^{re.escape(prefix)}{_TS}\.jsonl$")
+        found = sorted(p for p in reports.glob("*.jsonl") if pattern.match(p.name))
+        if not found:
+            raise SystemExit(f"No results journal {prefix}*.jsonl to resume in {reports}")
+        return found[-1]
+    path = Path(run)
+    if path.suffix in (".json", ".html"):
+        path = path.with_suffix(".jsonl")
+    elif path.suffix != ".jsonl":
+        path = path.with_name(f"{path.name}.jsonl")
+    for candidate in (path, reports / path.name, reports / f"pytest_report_{path.name}"):
+        if candidate.exists():
+            return candidate
+    raise SystemExit(f"Results journal for --resume {run} not found")
+
+
+def _pytest_output_args(case_print: bool) -> list[str]:
+    """Terminal verbosity: the old full output with --case-print, failures only otherwise."""
+    if case_print:
+        return ["-vv", "--capture=tee-sys", "-rA"]
+    return ["-v", "-rfE"]
+
+
+def _use_case_log(env: dict[str, str], json_path: Path, gzip: bool, case_print: bool) -> Path:
+    """Case log next to the JSON report: <report>.cases.jsonl[.gz]."""
+    path = json_path.with_suffix(".cases.jsonl.gz" if gzip else ".cases.jsonl")
+    env["EVAL_CASE_LOG"] = str(path)
+    if case_print:
+        env["EVAL_CASE_PRINT"] = "1"
+    return path
+
+
+def _report_from_journal(journal: Path, json_path: Path, html_path: Path, root: Path, started: float) -> int:
+    """(Re)build JSON + HTML reports from the results journal; keeps pytest's header if any."""
+    from evals.journal import write_report
+
+    header = {
+        "created": started,
+        "duration": time.time() - started,
+        "root": str(root),
+        "environment": {},
+    }
+    try:
+        header = json.loads(json_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        pass
+    return write_report(header, journal, json_path, html_path)
+
+
+def _use_env(env: dict[str, str]) -> None:
+    """Give this process the environment a pytest subprocess would get."""
+    os.environ.clear()
+    os.environ.update(env)
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+def _run_native(test_types: list[str], env: dict[str, str], json_path: Path, html_path: Path) -> int:
+    """Run eval suites in this process."""
+    _use_env(env)
+
+    from evals.sequential import run_sequential, sequential
+
+    if sequential():
+        return run_sequential(test_types, json_path, html_path)
+
+    from evals.native import run_native
+
+    return run_native(test_types, json_path, html_path)
+
+
+def _run_compare(
+    test_types: list[str],
+    models: str,
+    env: dict[str, str],
+    json_path: Path,
+    html_path: Path,
+) -> int:
+    """Run eval suites in this process against several SUT models."""
+    _use_env(env)
+
+    from evals.compare import run_compare
+    from evals.local_bielik import parse_endpoints
+
+    return run_compare(test_types, parse_endpoints(models), json_path, html_path)
+
+
 def main() -> int:
+    if sys.argv[1:2] == ["merge"]:
+        from evals.merge import main as merge_main
+
+        return merge_main(sys.argv[2:])
+    if sys.argv[1:2] == ["history"]:
+        from evals.history import main as history_main
+
+        return history_main(sys.argv[2:])
+
     parser = argparse.ArgumentParser(
         description=(
             "Run eval test sets with HTML+JSON reports.\n\n"
@@ -39,6 +158,17 @@ def main() -> int:
             "  python -m evals.run_tests common_sense --fast\n"
             "  python -m evals.run_tests --rules --golden\n"
             "  python -m evals.run_tests --all-tests\n"
+            "  python -m evals.run_tests --fast --concurrency 4\n"
+            "  python -m evals.run_tests --fast --cache replay\n"
+            "  python -m evals.run_tests --engine native\n"
+            "  python -m evals.run_tests polish_context --rules --id 'pl_rules_1*'\n"
+            "  python -m evals.run_tests --fast --shard 1/4   (then: python -m evals.run_tests merge)\n"
+            "  python -m evals.run_tests history trend polish_context::golden::pl_golden_01_PESEL\n"
+            "  python -m evals.run_tests --fast --models bielik:Q4_K_M,bielik:Q8_0\n"
+            "  EVAL_FAKE_LATENCY=uniform:0.05:0.3 python -m evals.run_tests --fast --fake-server\n"
+            "  python -m evals.run_tests --fast --sequential --target 0.8 --confidence 0.95 --seed 1\n"
+            "  python -m evals.run_tests --golden --samples 5\n"
+            "  python -m evals.run_tests --fast --concurrency 4 --llama-slots 4\n"
         ),
         formatter_class=argparse.RawTextHelpFormatter,
     )
@@ -65,6 +195,40 @@ def main() -> int:
         help="Run ALL tests discovered by pytest (evals/tests), ignoring set/type selection.",
     )
 
+    parser.add_argument(
+        "--id",
+        dest="case_ids",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help="Only cases whose id matches the glob (repeatable, e.g. --id 'pl_rules_*').",
+    )
+
+    parser.add_argument(
+        "--tag",
+        dest="tags",
+        action="append",
+        default=[],
+        help="Only cases tagged with any of the given tags (repeatable; rows list them in \"tags\").",
+    )
+
+    parser.add_argument(
+        "--shard",
+        default=None,
+        metavar="I/N",
+        help=(
+            "Run only shard I of N (1-based). Cases are split deterministically by a stable\n"
+            "hash of the case id; merge shard reports with: python -m evals.run_tests merge"
+        ),
+    )
+
+    parser.add_argument(
+        "--shard-weights",
+        default=None,
+        metavar="REPORT",
+        help="Previous JSON report whose per-case durations are used to balance shards.",
+    )
+
     parser.add_argument(
         "--reports-dir",
         default="evals/reports",
@@ -77,6 +241,220 @@ def main() -> int:
         help="Directory where tests live (default: evals/tests). Used by --all-tests.",
     )
 
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help=(
+            "Max parallel SUT requests. Outputs for all selected cases are prefetched\n"
+            "in a thread pool before/while tests run (default: EVAL_CONCURRENCY or 1 = serial)."
+        ),
+    )
+
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=None,
+        help=(
+            "Ceiling the adaptive request limit may grow to from --concurrency\n"
+            "(default: EVAL_MAX_CONCURRENCY or 2 x --concurrency)."
+        ),
+    )
+
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        help="Per-request timeout in seconds for SUT/judge calls (default: EVAL_TIMEOUT_S or 180).",
+    )
+
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=None,
+        help=(
+            "Retries of timeouts / connection errors / 429 / 5xx with jittered backoff\n"
+            "(default: EVAL_RETRIES or 2)."
+        ),
+    )
+
+    parser.add_argument(
+        "--cache",
+        choices=["off", "record", "replay"],
+        default=None,
+        help=(
+            "SUT response cache (default: EVAL_CACHE_MODE or off).\n"
+            "  record: reuse cached answers, call the model and store on miss\n"
+            "  replay: only cached answers, no model server needed (miss => test error)"
+        ),
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Directory for cache files (default: EVAL_CACHE_DIR or evals/.cache)",
+    )
+
+    parser.add_argument(
+        "--judge-cache",
+        choices=["off", "on", "refresh"],
+        default=None,
+        help=(
+            "Judge verdict cache (default: EVAL_JUDGE_CACHE or off).\n"
+            "  on: reuse stored score/reason for identical judge input + output\n"
+            "  refresh: ignore stored verdicts and overwrite them"
+        ),
+    )
+
+    parser.add_argument(
+        "--phased",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help=(
+            "Generate all SUT outputs first, then run all judge evaluations, so Ollama\n"
+            "loads each model once (default: on when judge tests are selected)."
+        ),
+    )
+
+    parser.add_argument(
+        "--keep-alive",
+        default=None,
+        help="Ollama keep_alive for warmed-up models in phased runs (default: EVAL_KEEP_ALIVE or 30m)",
+    )
+
+    parser.add_argument(
+        "--no-history",
+        action="store_true",
+        help=(
+            "Do not add this run to the results store (EVAL_HISTORY_DB or\n"
+            "<reports dir>/history.sqlite, see python -m evals.run_tests history -h)."
+        ),
+    )
+
+    parser.add_argument(
+        "--case-print",
+        action="store_true",
+        help=(
+            "Print the full case block (prompt, output, extra) of every test with\n"
+            "-vv --capture=tee-sys -rA, as before. By default cases only go to the case\n"
+            "log <report>.cases.jsonl and the terminal shows failures."
+        ),
+    )
+
+    parser.add_argument(
+        "--gzip-case-log",
+        action="store_true",
+        help="Write the case log gzip-compressed (<report>.cases.jsonl.gz).",
+    )
+
+    parser.add_argument(
+        "--prefix-order",
+        action="store_true",
+        help=(
+            "Generate outputs grouped by common prompt prefix so the server's prompt (KV)\n"
+            "cache is reused; estimated and measured hit rates go to the report."
+        ),
+    )
+
+    parser.add_argument(
+        "--llama-slots",
+        type=int,
+        default=None,
+        metavar="N",
+        help=(
+            "llama.cpp only: pin each prompt-prefix group to one of N server slots\n"
+            "(--parallel N on the server; sends id_slot + cache_prompt). Implies --prefix-order."
+        ),
+    )
+
+    parser.add_argument(
+        "--samples",
+        type=int,
+        default=None,
+        metavar="K",
+        help=(
+            "Generate and check K outputs per case (one request with n=K) and report\n"
+            "pass@K, pass rate and flaky cases; a case passes if at least half of its\n"
+            "samples pass. Disables --stream early stop (default: EVAL_SAMPLES or 1)."
+        ),
+    )
+
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help=(
+            "Stream rules generations and stop as soon as max_length / forbidden phrases\n"
+            "make the case fail (also caps max_tokens from max_length)."
+        ),
+    )
+
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=(
+            "Rerun only cases whose fingerprint (row, model, generation params, checker\n"
+            "code, thresholds) changed since latest_<label>.json; carry the rest forward."
+        ),
+    )
+
+    parser.add_argument(
+        "--models",
+        default=None,
+        metavar="A,B[@URL],...",
+        help=(
+            "Compare several SUT models in one pass (in-process): model[@base_url], comma\n"
+            "separated; the first one is the baseline. Writes comparison_<label>_<ts>.json/html."
+        ),
+    )
+
+    parser.add_argument(
+        "--resume",
+        default=None,
+        metavar="RUN",
+        help=(
+            "Continue an interrupted run: skip cases already in its results journal\n"
+            "(pytest_report_*.jsonl) and build the final report from the journal.\n"
+            "RUN is a report/journal path or file name, or 'last' (same sets/types)."
+        ),
+    )
+
+    parser.add_argument(
+        "--engine",
+        choices=["pytest", "native"],
+        default="pytest",
+        help=(
+            "pytest (default): run test files through pytest + pytest-html/json-report.\n"
+            "native: run the same checks in-process, stream results to JSONL and build\n"
+            "the JSON/HTML reports from it (faster for large suites)."
+        ),
+    )
+
+    parser.add_argument(
+        "--sequential",
+        action="store_true",
+        help=(
+            "Sample cases of each set/type in seeded random order and stop a set/type once\n"
+            "the confidence interval of its pass rate is above or below --target (native engine)."
+        ),
+    )
+    parser.add_argument("--target", type=float, default=None, help="Pass-rate target for --sequential (default 0.8).")
+    parser.add_argument(
+        "--confidence", type=float, default=None, help="Confidence of the --sequential intervals (default 0.95)."
+    )
+    parser.add_argument("--seed", default=None, help="Sampling seed for --sequential (default 0).")
+    parser.add_argument(
+        "--min-cases", type=int, default=None, help="Cases per set/type before --sequential may stop it (default 5)."
+    )
+
+    parser.add_argument(
+        "--fake-server",
+        action="store_true",
+        help=(
+            "Start the bundled fake model server (evals/fake_server.py, configured by\n"
+            "EVAL_FAKE_*) and point OPENAI_BASE_URL at it, to measure harness overhead."
+        ),
+    )
+
     args = parser.parse_args()
 
     root = Path(__file__).resolve().parents[1]
@@ -84,24 +462,123 @@ def main() -> int:
     reports.mkdir(parents=True, exist_ok=True)
 
     ts = datetime.now().strftime("%Y-%m-%d_%H%M%S")
+    started = time.time()
+
+    env = os.environ.copy()
+    if args.fake_server:
+        from evals.fake_server import FakeConfig, FakeServer, fake_port
+
+        try:
+            config, port = FakeConfig.from_env(), fake_port()
+        except ValueError as e:
+            raise SystemExit(f"Invalid fake server config: {e}")
+        try:
+            fake = FakeServer(config, port=port).start()
+        except ValueError as e:
+            raise SystemExit(f"Invalid fake server config: {e}")
+        except OSError as e:
+            # e.g. another run's fake server; the response cache will not replay
+            print(f"Warning: fake server port {port} unavailable ({e}), using a random port")
+            fake = FakeServer(config).start()
+        env["OPENAI_BASE_URL"] = fake.base_url
+        env["OPENAI_API_KEY"] = "fake"
+        print("FAKE SERVER:", fake.base_url)
+    # evals.perf.record_startup measures time to the first request from here.
+    env["EVAL_STARTED_AT"] = repr(started)
+    if args.concurrency is not None:
+        env["EVAL_CONCURRENCY"] = str(args.concurrency)
+    if args.max_concurrency is not None:
+        env["EVAL_MAX_CONCURRENCY"] = str(args.max_concurrency)
+    if args.timeout is not None:
+        env["EVAL_TIMEOUT_S"] = str(args.timeout)
+    if args.retries is not None:
+        env["EVAL_RETRIES"] = str(args.retries)
+    if args.cache is not None:
+        env["EVAL_CACHE_MODE"] = args.cache
+    if args.judge_cache is not None:
+        env["EVAL_JUDGE_CACHE"] = args.judge_cache
+    if args.keep_alive is not None:
+        env["EVAL_KEEP_ALIVE"] = args.keep_alive
+    if args.stream:
+        env["EVAL_STREAMING"] = "1"
+    if args.prefix_order or args.llama_slots:
+        env["EVAL_PREFIX_ORDER"] = "1"
+    if args.llama_slots is not None:
+        env["EVAL_LLAMA_SLOTS"] = str(args.llama_slots)
+    if args.samples is not None:
+        if args.samples < 1:
+            raise SystemExit("--samples must be at least 1")
+        env["EVAL_SAMPLES"] = str(args.samples)
+    if args.cache_dir is not None:
+        env["EVAL_CACHE_DIR"] = str(root / args.cache_dir)
+    if args.case_ids:
+        env["EVAL_CASE_IDS"] = ",".join(args.case_ids)
+    if args.tags:
+        env["EVAL_TAGS"] = ",".join(args.tags)
+    shard_label = ""
+    if args.shard is not None:
+        from evals.shard import parse_shard
+
+        try:
+            shard_index, shard_count = parse_shard(args.shard)
+        except ValueError as e:
+            raise SystemExit(str(e))
+        env["EVAL_SHARD"] = f"{shard_index}/{shard_count}"
+        shard_label = f"__shard{shard_index}of{shard_count}"
+    if args.shard_weights is not None:
+        env["EVAL_SHARD_WEIGHTS"] = str(root / args.shard_weights)
+    if args.sequential:
+        if args.all_tests or args.models:
+            raise SystemExit("--sequential samples eval suites; it cannot be combined with --all-tests/--models")
+        env["EVAL_SEQUENTIAL"] = "1"
+        for flag, name in (
+            (args.target, "EVAL_TARGET"),
+            (args.confidence, "EVAL_CONFIDENCE"),
+            (args.seed, "EVAL_SEED"),
+            (args.min_cases, "EVAL_MIN_CASES"),
+        ):
+            if flag is not None:
+                env[name] = str(flag)
+        # a sampled report must not replace the latest full one
+        shard_label += "__seq"
 
     # ====== MODE 1: run EVERYTHING (all pytest tests) ======
     if args.all_tests:
-        label = f"alltests__{ts}"
+        if args.models:
+            raise SystemExit("--models compares eval suites; it cannot be combined with --all-tests")
+        if args.engine == "native":
+            raise SystemExit("--all-tests runs arbitrary pytest tests; use --engine pytest")
+        label = f"alltests{shard_label}__{ts}"
         json_path = reports / f"pytest_report_{label}.json"
         html_path = reports / f"pytest_report_{label}.html"
-        latest_json = reports / "latest_alltests.json"
-        latest_html = reports / "latest_alltests.html"
+        latest_json = reports / f"latest_alltests{shard_label}.json"
+        latest_html = reports / f"latest_alltests{shard_label}.html"
+
+        journal = json_path.with_suffix(".jsonl")
+        if args.resume:
+            journal = _resume_journal(args.resume, reports, f"pytest_report_alltests{shard_label}__")
+            json_path, html_path = journal.with_suffix(".json"), journal.with_suffix(".html")
+            env["EVAL_RESUME"] = "1"
+        env["EVAL_JOURNAL"] = str(journal)
+
+        if args.incremental:
+            env["EVAL_INCREMENTAL"] = str(latest_json)
+        case_log = _use_case_log(env, json_path, args.gzip_case_log, args.case_print)
 
         marker_expr_all = "rules or golden or judge or not (rules or golden or judge)"
+        # arbitrary tests: phased only when asked for (--phased or EVAL_PHASED)
+        if args.phased is False:
+            env.pop("EVAL_PHASED", None)
+        elif args.phased:
+            env["EVAL_PHASED"] = "1"
 
+        env["PYTEST_DISABLE_PLUGIN_AUTOLOAD"] = "1"
         cmd = [
             sys.executable,
             "-m",
             "pytest",
-            "-vv",
-            "--capture=tee-sys",
-            "-rA",
+            *(arg for plugin in REPORT_PLUGINS for arg in ("-p", plugin)),
+            *_pytest_output_args(args.case_print),
             "-m",
             marker_expr_all,
             args.tests_dir,
@@ -112,7 +589,12 @@ def main() -> int:
         ]
 
         print("Running ALL tests:", " ".join(str(x) for x in cmd))
-        result = subprocess.run(cmd, env=os.environ.copy())
+        if args.resume:
+            print("RESUME:", journal)
+        returncode = subprocess.run(cmd, env=env).returncode
+        if args.resume or not json_path.exists():
+            code = _report_from_journal(journal, json_path, html_path, root, started)
+            returncode = code if returncode in (0, 5) else returncode
 
         try:
             shutil.copyfile(json_path, latest_json)
@@ -124,8 +606,15 @@ def main() -> int:
         print(f"Saved HTML:  {html_path}")
         print(f"Latest JSON: {latest_json}")
         print(f"Latest HTML: {latest_html}")
+        if case_log.exists():
+            print(f"Case log:    {case_log}")
+        # shards are partial runs: their merged report is recorded by `merge`
+        if not args.no_history and args.shard is None and not args.sequential and json_path.exists():
+            from evals.history import record_run
+
+            record_run(json_path)
 
-        return result.returncode
+        return returncode
 
     # ====== MODE 2: run eval suites (rules/golden/judge) + datasets ======
     selected_sets = args.sets[:]
@@ -146,13 +635,31 @@ def main() -> int:
 
     sets_label = _slug(selected_sets) if selected_sets else "allsets"
     types_label = _slug(selected_types) if selected_types else "alltypes"
-    label = f"{sets_label}__{types_label}"
+    label = f"{sets_label}__{types_label}{shard_label}"
 
     json_path = reports / f"pytest_report_{label}_{ts}.json"
     html_path = reports / f"pytest_report_{label}_{ts}.html"
     latest_json = reports / f"latest_{label}.json"
     latest_html = reports / f"latest_{label}.html"
 
+    if args.models:
+        if args.resume or args.incremental:
+            raise SystemExit("--models runs every case for every model; drop --resume/--incremental")
+        json_path = reports / f"comparison_{label}_{ts}.json"
+        html_path = reports / f"comparison_{label}_{ts}.html"
+        latest_json = reports / f"latest_comparison_{label}.json"
+        latest_html = reports / f"latest_comparison_{label}.html"
+
+    journal = json_path.with_suffix(".jsonl")
+    if args.resume:
+        journal = _resume_journal(args.resume, reports, f"pytest_report_{label}_")
+        json_path, html_path = journal.with_suffix(".json"), journal.with_suffix(".html")
+        env["EVAL_RESUME"] = "1"
+    env["EVAL_JOURNAL"] = str(journal)
+
+    if args.incremental:
+        env["EVAL_INCREMENTAL"] = str(latest_json)
+
     test_files: list[str] = []
     for t in selected_types:
         tf = TYPE_TO_TESTFILE.get(t)
@@ -160,7 +667,11 @@ def main() -> int:
             raise SystemExit(f"Unknown test type: {t}")
         test_files.append(tf)
 
-    env = os.environ.copy()
+    if args.phased is False:
+        env.pop("EVAL_PHASED", None)
+    elif args.phased or "judge" in selected_types:
+        env["EVAL_PHASED"] = "1"
+
     if selected_sets:
         env["EVAL_SETS"] = ",".join(selected_sets)
     else:
@@ -168,13 +679,13 @@ def main() -> int:
 
     marker_expr = " or ".join(selected_types)
 
+    env["PYTEST_DISABLE_PLUGIN_AUTOLOAD"] = "1"
     cmd = [
         sys.executable,
         "-m",
         "pytest",
-        "-vv",
-        "--capture=tee-sys",
-        "-rA",
+        *(arg for plugin in REPORT_PLUGINS for arg in ("-p", plugin)),
+        *_pytest_output_args(args.case_print),
         "-m",
         marker_expr,
         *test_files,
@@ -184,13 +695,53 @@ def main() -> int:
         "--self-contained-html",
     ]
 
-    print("Running:", " ".join(str(x) for x in cmd))
+    if args.models:
+        print("Running: model comparison", args.models)
+    elif args.sequential:
+        print("Running: native engine, sequential sampling")
+    elif args.engine == "native":
+        print("Running: native engine")
+    else:
+        print("Running:", " ".join(str(x) for x in cmd))
     if selected_sets:
         print("EVAL_SETS:", env["EVAL_SETS"])
     print("TYPES:", ",".join(selected_types))
-    print("PYTEST -m:", marker_expr)
-
-    result = subprocess.run(cmd, env=env)
+    if "EVAL_SHARD" in env:
+        print("SHARD:", env["EVAL_SHARD"])
+    if "EVAL_CASE_IDS" in env:
+        print("CASE IDS:", env["EVAL_CASE_IDS"])
+    if "EVAL_TAGS" in env:
+        print("TAGS:", env["EVAL_TAGS"])
+    if args.engine == "pytest" and not (args.models or args.sequential):
+        print("PYTEST -m:", marker_expr)
+    if "EVAL_CONCURRENCY" in env:
+        print("CONCURRENCY:", env["EVAL_CONCURRENCY"])
+    if env.get("EVAL_PREFIX_ORDER"):
+        slots = env.get("EVAL_LLAMA_SLOTS")
+        print("PREFIX ORDER:", f"on, {slots} llama.cpp slots" if slots else "on")
+    if int(env.get("EVAL_SAMPLES") or 1) > 1:
+        print("SAMPLES:", env["EVAL_SAMPLES"], "per case")
+    if "EVAL_INCREMENTAL" in env:
+        print("INCREMENTAL: carrying unchanged cases forward from", env["EVAL_INCREMENTAL"])
+    if args.resume:
+        print("RESUME:", journal)
+    if env.get("EVAL_PHASED"):
+        print("PHASED: SUT generations first, then judge")
+    if "EVAL_CACHE_MODE" in env:
+        print("CACHE:", env["EVAL_CACHE_MODE"])
+    if "EVAL_JUDGE_CACHE" in env:
+        print("JUDGE CACHE:", env["EVAL_JUDGE_CACHE"])
+
+    if args.models:
+        returncode = _run_compare(selected_types, args.models, env, json_path, html_path)
+    elif args.engine == "native" or args.sequential:
+        returncode = _run_native(selected_types, env, json_path, html_path)
+    else:
+        _use_case_log(env, json_path, args.gzip_case_log, args.case_print)
+        returncode = subprocess.run(cmd, env=env).returncode
+        if args.resume or not json_path.exists():
+            code = _report_from_journal(journal, json_path, html_path, root, started)
+            returncode = code if returncode in (0, 5) else returncode
 
     try:
         shutil.copyfile(json_path, latest_json)
@@ -202,8 +753,15 @@ def main() -> int:
     print(f"Saved HTML:  {html_path}")
     print(f"Latest JSON: {latest_json}")
     print(f"Latest HTML: {latest_html}")
+    if "EVAL_CASE_LOG" in env and Path(env["EVAL_CASE_LOG"]).exists():
+        print(f"Case log:    {env['EVAL_CASE_LOG']}")
+    # shards are partial runs: their merged report is recorded by `merge`
+    if not args.no_history and args.shard is None and not args.sequential and json_path.exists():
+        from evals.history import record_run
+
+        record_run(json_path)
 
-    return result.returncode
+    return returncode
 
 
 if __name__ == "__main__":
@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, TypeVar
+
+from evals.run_stats import add_stat, record_stat
+
+T = TypeVar("T")
+
+DEFAULT_TIMEOUT_S = 180.0
+DEFAULT_RETRIES = 2
+DEFAULT_BREAKER_THRESHOLD = 5
+DEFAULT_BREAKER_COOLDOWN_S = 30.0
+RETRY_BASE_S = 0.5
+RETRY_MAX_S = 30.0
+# longest Retry-After honoured; a bogus header must not stall a worker
+RETRY_AFTER_MAX_S = 60.0
+# Latency (s per completion token, or s per call) above this multiple of the best
+# smoothed latency seen so far counts as overload and shrinks the in-flight limit.
+LATENCY_TOLERANCE = 2.0
+EWMA_ALPHA = 0.2
+
+
+class EndpointUnavailableError(RuntimeError):
+    """Raised without calling the endpoint while its circuit breaker is open."""
+
+
+def _env_number(name: str, default: float) -> float:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return float(raw)
+    except ValueError as e:
+        raise ValueError(f"Invalid {name}={raw!r}: expected number") from e
+
+
+def request_timeout() -> float:
+    """Per-request timeout in seconds (EVAL_TIMEOUT_S, default 180)."""
+    return _env_number("EVAL_TIMEOUT_S", DEFAULT_TIMEOUT_S)
+
+
+def adaptive() -> bool:
+    """EVAL_ADAPTIVE=0 keeps the in-flight limit fixed at EVAL_CONCURRENCY."""
+    return os.getenv("EVAL_ADAPTIVE", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Timeouts, connection errors, 429 and 5xx responses are worth retrying."""
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    # openai.APITimeoutError / APIConnectionError (no status code)
+    return type(error).__name__ in ("APITimeoutError", "APIConnectionError")
+
+
+def _retry_after(error: BaseException) -> float | None:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        delay = float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+    if delay != delay:  # NaN
+        return None
+    return min(max(delay, 0.0), RETRY_AFTER_MAX_S)
+
+
+class Scheduler:
+    """
+    Gate for calls to one model endpoint.
+
+    - AIMD concurrency: the in-flight limit grows by ~1 per `limit` successful calls
+      and is cut (x0.75 on latency inflation, x0.5 on retryable errors), staying
+      within [1, max_limit]; it starts at `limit`.
+    - Retries retryable errors with full-jitter exponential backoff (honours
+      Retry-After, up to RETRY_AFTER_MAX_S).
+    - Circuit breaker: after `breaker_threshold` consecutive failed attempts calls
+      fail fast with EndpointUnavailableError for `breaker_cooldown_s`; then one
+      trial call decides whether the endpoint is back, other calls wait for it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        max_limit: int | None = None,
+        *,
+        retries: int = DEFAULT_RETRIES,
+        breaker_threshold: int = DEFAULT_BREAKER_THRESHOLD,
+        breaker_cooldown_s: float = DEFAULT_BREAKER_COOLDOWN_S,
+        adaptive: bool = True,
+    ) -> None:
+        self.name = name
+        self.max_limit = max(1, limit, max_limit or 0)
+        self.retries = max(0, retries)
+        self.breaker_threshold = max(1, breaker_threshold)
+        self.breaker_cooldown_s = breaker_cooldown_s
+        self.adaptive = adaptive
+
+        self._cond = threading.Condition()
+        self._limit = float(max(1, limit))
+        self._in_flight = 0
+        self._ewma: float | None = None
+        self._best: float | None = None
+        self._since_decrease = 0
+        self._failures = 0
+        self._open_until = 0.0
+        self._trial = False
+
+    @property
+    def limit(self) -> int:
+        return max(1, int(self._limit))
+
+    # --- concurrency -------------------------------------------------------
+
+    def _acquire(self) -> None:
+        with self._cond:
+            while self._in_flight >= self.limit:
+                self._cond.wait()
+            self._in_flight += 1
+
+    def _release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def _decrease(self, factor: float) -> None:
+        # called with self._cond held
+        self._limit = max(1.0, self._limit * factor)
+        self._since_decrease = 0
+        add_stat("scheduler", f"{self.name}_limit_decreases", 1)
+
+    def _on_success(self, signal: float) -> None:
+        with self._cond:
+            self._failures = 0
+            self._trial = False
+            self._cond.notify_all()
+            if not self.adaptive:
+                return
+            self._ewma = signal if self._ewma is None else (
+                EWMA_ALPHA * signal + (1 - EWMA_ALPHA) * self._ewma
+            )
+            self._best = self._ewma if self._best is None else min(self._best, self._ewma)
+            self._since_decrease += 1
+            if self._ewma > self._best * LATENCY_TOLERANCE:
+                # at most one cut per window of `limit` completions
+                if self._since_decrease >= self.limit:
+                    self._decrease(0.75)
+            else:
+                self._limit = min(float(self.max_limit), self._limit + 1 / self.limit)
+
+    def _on_failure(self, retryable: bool) -> None:
+        with self._cond:
+            self._failures += 1
+            if self._trial or self._failures >= self.breaker_threshold:
+                if self._open_until <= time.monotonic():
+                    add_stat("scheduler", f"{self.name}_breaker_trips", 1)
+                self._open_until = time.monotonic() + self.breaker_cooldown_s
+                self._trial = False
+                self._cond.notify_all()
+            if retryable and self.adaptive:
+                self._decrease(0.5)
+
+    # --- circuit breaker ---------------------------------------------------
+
+    def _check_breaker(self) -> None:
+        with self._cond:
+            # half-open: wait until the trial call closes or reopens the circuit
+            while self._trial:
+                self._cond.wait()
+            if not self._open_until:
+                return
+            now = time.monotonic()
+            if now < self._open_until:
+                raise EndpointUnavailableError(
+                    f"{self.name} endpoint unavailable: {self._failures} consecutive failures "
+                    f"(circuit open, retry in {max(0.0, self._open_until - now):.0f}s)"
+                )
+            # half-open: let exactly one trial call through
+            self._trial = True
+            self._open_until = 0.0
+
+    # --- calls -------------------------------------------------------------
+
+    def call(self, fn: Callable[[], T]) -> T:
+        """Run fn under the scheduler's concurrency limit, retries and circuit breaker."""
+        attempt = 0
+        while True:
+            self._check_breaker()
+            self._acquire()
+            t0 = time.perf_counter()
+            try:
+                result = fn()
+            except Exception as e:
+                self._release()
+                retryable = is_retryable(e)
+                self._on_failure(retryable)
+                add_stat("scheduler", f"{self.name}_errors", 1)
+                if not retryable or attempt >= self.retries:
+                    raise
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = random.uniform(0, min(RETRY_MAX_S, RETRY_BASE_S * 2 ** attempt))
+                attempt += 1
+                add_stat("scheduler", f"{self.name}_retries", 1)
+                time.sleep(delay)
+                continue
+            except BaseException:
+                # interrupted: don't leave other calls waiting for this trial
+                self._release()
+                with self._cond:
+                    self._trial = False
+                    self._cond.notify_all()
+                raise
+            self._release()
+            self._on_success(_latency_signal(result, time.perf_counter() - t0))
+            record_stat("scheduler", **{f"{self.name}_limit": self.limit})
+            return result
+
+
+def _latency_signal(result: Any, elapsed: float) -> float:
+    """Seconds per completion token when the result reports tokens, else seconds per call."""
+    tokens = getattr(result, "completion_tokens", None)
+    if isinstance(tokens, int) and tokens > 0:
+        return elapsed / tokens
+    return elapsed
+
+
+_schedulers: dict[str, Scheduler] = {}
+_registry_lock = threading.Lock()
+
+
+def get_scheduler(name: str) -> Scheduler:
+    """Shared scheduler of one endpoint ("sut", "judge"), configured from EVAL_* env vars."""
+    with _registry_lock:
+        sched = _schedulers.get(name)
+        if sched is None:
+            from evals.generation import concurrency, max_concurrency
+
+            sched = Scheduler(
+                name,
+                concurrency(),
+                max_concurrency(),
+                retries=int(_env_number("EVAL_RETRIES", DEFAULT_RETRIES)),
+                breaker_threshold=int(_env_number("EVAL_BREAKER_THRESHOLD", DEFAULT_BREAKER_THRESHOLD)),
+                breaker_cooldown_s=_env_number("EVAL_BREAKER_COOLDOWN_S", DEFAULT_BREAKER_COOLDOWN_S),
+                adaptive=adaptive(),
+            )
+            _schedulers[name] = sched
+        return sched
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import math
+import os
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from statistics import NormalDist
+from typing import Any
+
+from evals.checks import case_id, load_cases, prefetch_cases
+from evals.generation import concurrency, shutdown
+from evals.journal import (
+    EXIT_NO_TESTS,
+    EXIT_OK,
+    EXIT_TESTS_FAILED,
+    Journal,
+    completed,
+    is_completed,
+    journal_path,
+    resuming,
+    write_report,
+)
+from evals.judge import judge_model_name
+from evals.local_bielik import MODEL
+from evals.native import ROOT, nodeid, run_case
+from evals.perf import mark_run_start, perf_report, record_startup
+from evals.run_stats import record_stat, snapshot
+
+DEFAULT_TARGET = 0.8
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_MIN_CASES = 5
+
+
+def sequential() -> bool:
+    """EVAL_SEQUENTIAL=1: sample cases and stop each set/type once its pass rate is settled."""
+    return os.getenv("EVAL_SEQUENTIAL", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return float(raw)
+    except ValueError as e:
+        raise ValueError(f"Invalid {name}={raw!r}: expected number") from e
+
+
+def wilson_interval(passed: int, n: int, confidence: float) -> tuple[float, float]:
+    """Wilson score interval of a pass rate; (0, 1) without observations."""
+    if n <= 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    p = passed / n
+    denom = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+@dataclass
+class Stream:
+    """Shuffled cases of one (test set, test type) with their running pass rate."""
+    test_set: str
+    test_type: str
+    queue: deque[dict]
+    total: int
+    passed: int = 0
+    failed: int = 0
+    errors: int = 0
+    decision: str | None = None
+    history: list[dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def key(self) -> str:
+        return f"{self.test_set}::{self.test_type}"
+
+    @property
+    def n(self) -> int:
+        return self.passed + self.failed
+
+    def record(self, outcome: str) -> None:
+        """Count an eval verdict; "error" (no verdict, e.g. server down) is kept out of the pass rate."""
+        if outcome == "passed":
+            self.passed += 1
+        elif outcome == "failed":
+            self.failed += 1
+        elif outcome == "error":
+            self.errors += 1
+
+    def decide(self, target: float, confidence: float, min_cases: int) -> str | None:
+        """"above"/"below" once the interval excludes target, "exhausted" when out of cases."""
+        if self.decision is not None:
+            return self.decision
+        lo, hi = wilson_interval(self.passed, self.n, confidence)
+        if self.n >= min_cases and lo > target:
+            self.decision = "above"
+        elif self.n >= min_cases and hi < target:
+            self.decision = "below"
+        elif not self.queue:
+            self.decision = "exhausted"
+        return self.decision
+
+
+def _summary(passed: int, n: int, total: int, confidence: float, target: float) -> dict[str, Any]:
+    lo, hi = wilson_interval(passed, n, confidence)
+    if n and lo > target:
+        verdict = "above"
+    elif n and hi < target:
+        verdict = "below"
+    else:
+        verdict = "undecided"
+    return {
+        "estimate": round(passed / n, 4) if n else None,
+        "ci": [round(lo, 4), round(hi, 4)],
+        "verdict": verdict,
+        "passed": passed,
+        "cases_run": n,
+        "cases_total": total,
+    }
+
+
+def _aggregate(streams: list[Stream], attr: str, confidence: float, target: float) -> dict[str, Any]:
+    groups: dict[str, list[Stream]] = {}
+    for s in streams:
+        groups.setdefault(getattr(s, attr), []).append(s)
+    return {
+        key: _summary(sum(s.passed for s in ss), sum(s.n for s in ss), sum(s.total for s in ss), confidence, target)
+        for key, ss in sorted(groups.items())
+    }
+
+
+def run_sequential(test_types: list[str], json_path: Path, html_path: Path) -> int:
+    """
+    Sequential sampled evaluation (native engine).
+
+    Cases of every (test set, test type) are shuffled with EVAL_SEED and run in
+    rounds of EVAL_CONCURRENCY cases per stream. After each round the Wilson
+    interval (EVAL_CONFIDENCE) of each stream's pass rate is compared with
+    EVAL_TARGET; a stream stops once the interval is entirely above or below it
+    (after at least EVAL_MIN_CASES cases). The report gets a "sequential" section
+    with estimate, interval and cases spent per stream, set and type.
+    """
+    mark_run_start()
+    started = time.time()
+    target = _env_float("EVAL_TARGET", DEFAULT_TARGET)
+    confidence = _env_float("EVAL_CONFIDENCE", DEFAULT_CONFIDENCE)
+    seed = os.getenv("EVAL_SEED", "0").strip() or "0"
+    min_cases = int(_env_float("EVAL_MIN_CASES", DEFAULT_MIN_CASES))
+    if not 0 < target < 1 or not 0 < confidence < 1:
+        raise ValueError("EVAL_TARGET and EVAL_CONFIDENCE must be between 0 and 1")
+
+    journal = journal_path() or json_path.with_suffix(".jsonl")
+    done = completed(journal) if resuming() else {}
+
+    judge_model = judge_model_name()
+    record_stat("run", sut_model=MODEL, judge_model=judge_model)
+    streams: dict[str, Stream] = {}
+    for test_type in test_types:
+        by_set: dict[str, list[dict]] = {}
+        for case in load_cases(test_type):
+            by_set.setdefault(case["test_set"], []).append(case)
+        for test_set, cases in by_set.items():
+            # sort first: the sample must not depend on dataset file order
+            cases.sort(key=lambda c: case_id(c, test_type))
+            random.Random(f"{seed}:{test_set}:{test_type}").shuffle(cases)
+            stream = Stream(test_set, test_type, deque(), total=len(cases))
+            for case in cases:
+                prior = done.get(nodeid(test_type, case_id(case, test_type)))
+                if prior is not None:
+                    stream.record(prior)
+                else:
+                    stream.queue.append(case)
+            streams[stream.key] = stream
+    total = sum(s.total for s in streams.values())
+    print(f"collected {total} items in {len(streams)} set/type streams (target {target}, confidence {confidence})")
+    record_startup()
+
+    batch = concurrency()
+    try:
+        with Journal(journal) as results:
+            while True:
+                active = [s for s in streams.values() if s.decide(target, confidence, min_cases) is None]
+                if not active:
+                    break
+                round_: list[tuple[Stream, dict]] = []
+                for s in active:
+                    for _ in range(min(batch, len(s.queue))):
+                        round_.append((s, s.queue.popleft()))
+                # rows in file order: compressed datasets are read forward
+                round_.sort(key=lambda r: (r[1]["path"], r[1]["line"]))
+                prefetch_cases([(s.test_type, case) for s, case in round_], judge_model)
+                for s, case in round_:
+                    entry = run_case(s.test_type, case)
+                    s.record(entry["outcome"] if is_completed(entry) else "error")
+                    results.append(entry)
+                    print(f"{entry['nodeid']} {entry['outcome'].upper()}")
+                for s in active:
+                    lo, hi = wilson_interval(s.passed, s.n, confidence)
+                    s.history.append({"n": s.n, "passed": s.passed, "ci": [round(lo, 4), round(hi, 4)]})
+    finally:
+        shutdown()
+
+    stream_list = list(streams.values())
+    run = sum(s.n for s in stream_list)
+    report = {
+        "target": target,
+        "confidence": confidence,
+        "seed": seed,
+        "min_cases": min_cases,
+        "cases_run": run,
+        "cases_total": total,
+        "cases_saved": sum(len(s.queue) for s in stream_list),
+        "streams": {
+            s.key: {
+                **_summary(s.passed, s.n, s.total, confidence, target),
+                "errors": s.errors,
+                "stopped": s.decision,
+                "history": s.history,
+            }
+            for s in stream_list
+        },
+        "by_set": _aggregate(stream_list, "test_set", confidence, target),
+        "by_type": _aggregate(stream_list, "test_type", confidence, target),
+    }
+    header = {
+        "created": started,
+        "duration": time.time() - started,
+        "root": str(ROOT),
+        "environment": {"engine": "native", "mode": "sequential"},
+        "eval_stats": snapshot(),
+        "eval_perf": perf_report(),
+        "sequential": report,
+    }
+    exitcode = write_report(header, journal, json_path, html_path)
+
+    for s in stream_list:
+        r = report["streams"][s.key]
+        print(
+            f"{s.key}: {r['estimate']} [{r['ci'][0]}, {r['ci'][1]}] {r['verdict']} target {target} "
+            f"({r['cases_run']}/{r['cases_total']} cases)"
+        )
+    print(f"ran {run} of {total} cases")
+    if exitcode == EXIT_NO_TESTS:
+        return exitcode
+    # Individual failures are expected here; the run fails when a stream is below target.
+    below = any(r["verdict"] == "below" for r in report["streams"].values())
+    return EXIT_TESTS_FAILED if below else EXIT_OK
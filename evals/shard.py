@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import hashlib
+import heapq
+import json
+import os
+import re
+import statistics
+from pathlib import Path
+from typing import Sequence, TypeVar
+
+T = TypeVar("T")
+
+_SHARD = re.compile(r"^\s*(\d+)\s*/\s*(\d+)\s*$")
+# Case id inside a pytest node id: evals/tests/test_rules_all.py::test_rules_all[<case id>]
+_NODE_CASE = re.compile(r"\[(.*)\]$")
+
+
+def parse_shard(spec: str) -> tuple[int, int]:
+    """Parse "i/N" (1-based shard index i of N shards)."""
+    m = _SHARD.match(spec)
+    if not m:
+        raise ValueError(f"Invalid shard {spec!r}: expected i/N, e.g. 1/4")
+    index, count = int(m.group(1)), int(m.group(2))
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard {spec!r}: need 1 <= i <= N")
+    return index, count
+
+
+def shard_spec() -> tuple[int, int] | None:
+    """Shard of this process from EVAL_SHARD ("i/N"); None = run everything."""
+    raw = os.getenv("EVAL_SHARD", "").strip()
+    return parse_shard(raw) if raw else None
+
+
+def stable_hash(case_id: str) -> int:
+    """Process- and machine-independent hash (unlike hash(), which is salted)."""
+    return int.from_bytes(hashlib.sha256(case_id.encode("utf-8")).digest()[:8], "big")
+
+
+def case_id_from_nodeid(nodeid: str) -> str | None:
+    m = _NODE_CASE.search(nodeid)
+    return m.group(1) if m else None
+
+
+def load_weights(report_path: Path) -> dict[str, float]:
+    """Per case id call duration (s) from a previous JSON report."""
+    data = json.loads(report_path.read_text(encoding="utf-8"))
+    weights: dict[str, float] = {}
+    for test in data.get("tests", []):
+        cid = case_id_from_nodeid(test.get("nodeid", ""))
+        duration = (test.get("call") or {}).get("duration")
+        if cid is not None and isinstance(duration, (int, float)):
+            weights[cid] = float(duration)
+    return weights
+
+
+def shard_weights() -> dict[str, float]:
+    """Weights from the report in EVAL_SHARD_WEIGHTS (empty = unweighted sharding)."""
+    raw = os.getenv("EVAL_SHARD_WEIGHTS", "").strip()
+    return load_weights(Path(raw)) if raw else {}
+
+
+def assign_shards(ids: Sequence[str], count: int, weights: dict[str, float] | None = None) -> list[int]:
+    """
+    Shard number (0-based) of each case id.
+
+    Without weights a case goes to stable_hash(id) % count, so assignment does not
+    depend on which other cases exist. With weights (historical latency) cases are
+    placed longest-first on the least loaded shard; cases missing from the history
+    get the median weight. Both are deterministic given the same ids and weights.
+    """
+    if not weights:
+        return [stable_hash(cid) % count for cid in ids]
+
+    default = statistics.median(weights.values())
+    order = sorted(
+        range(len(ids)),
+        key=lambda i: (-weights.get(ids[i], default), stable_hash(ids[i]), ids[i]),
+    )
+    loads = [(0.0, shard) for shard in range(count)]
+    heapq.heapify(loads)
+    out = [0] * len(ids)
+    for i in order:
+        load, shard = heapq.heappop(loads)
+        out[i] = shard
+        heapq.heappush(loads, (load + weights.get(ids[i], default), shard))
+    return out
+
+
+def select_shard(items: Sequence[T], ids: Sequence[str]) -> list[T]:
+    """Keep the items (with matching case ids) that belong to this process' EVAL_SHARD."""
+    spec = shard_spec()
+    if spec is None:
+        return list(items)
+    index, count = spec
+    shards = assign_shards(ids, count, shard_weights())
+    return [item for item, shard in zip(items, shards) if shard == index - 1]
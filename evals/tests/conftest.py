@@ -3,47 +3,179 @@ from __future__ import annotations
 import pytest
 from dotenv import load_dotenv
 
+from evals.checks import case_requests, prefetch_cases
+from evals.generation import prefetching, shutdown
+from evals.journal import Journal, completed_nodeids, journal_path, resuming
+from evals.judge import judge_model_name
+from evals.local_bielik import MODEL
+from evals.logging_utils import CaseLog, case_log_path, case_print, case_record, format_case_log
+from evals.perf import add_sample, mark_run_start, perf_report, record_startup
+from evals.phases import phased, run_sut_phase, start_judge_phase
+from evals.run_stats import record_stat, snapshot
+
 load_dotenv()
 
+_journal: Journal | None = None
+_journaled: set[str] = set()
+_case_log: CaseLog | None = None
 
-@pytest.fixture(autouse=True)
-def _attach_case_log_to_report(request: pytest.FixtureRequest):
-    yield
 
-    props = dict(getattr(request.node, "user_properties", []))
-    case_id = props.get("case_id")
-    prompt = props.get("prompt")
-    output = props.get("output")
-    extra = props.get("extra")
+def _item_case(item: pytest.Item) -> tuple[str, dict] | None:
+    """(test type, case reference) of an eval test item; the row is not read."""
+    callspec = getattr(item, "callspec", None)
+    if callspec is None:
+        return None
+    case = callspec.params.get("case")
+    if not isinstance(case, dict):
+        return None
+    test_type = next((t for t in ("rules", "golden", "judge") if item.get_closest_marker(t)), None)
+    return (test_type, case) if test_type is not None else None
+
+
+def _journal_entry(report: pytest.TestReport) -> dict:
+    """Finished test as a pytest-json-report test entry."""
+    outcome = report.outcome
+    if report.when != "call" and report.failed:
+        outcome = "error"
+    stage: dict = {"duration": report.duration, "outcome": report.outcome}
+    if report.longrepr:
+        stage["longrepr"] = report.longreprtext
+        crash = getattr(report.longrepr, "reprcrash", None)
+        if crash is not None:
+            stage["crash"] = {"path": crash.path, "lineno": crash.lineno, "message": crash.message}
+    return {
+        "nodeid": report.nodeid,
+        "lineno": report.location[1],
+        "outcome": outcome,
+        "keywords": sorted(report.keywords),
+        "user_properties": [{k: v} for k, v in report.user_properties],
+        report.when: stage,
+    }
+
+
+def pytest_sessionstart(session: pytest.Session) -> None:
+    global _journal, _case_log
+    mark_run_start()
+    record_stat("run", sut_model=MODEL, judge_model=judge_model_name())
+    path = journal_path()
+    if path is not None:
+        _journal = Journal(path)
+    path = case_log_path()
+    if path is not None:
+        _case_log = CaseLog(path)
+
+
+def pytest_collection_modifyitems(session: pytest.Session, config: pytest.Config, items: list[pytest.Item]) -> None:
+    path = journal_path()
+    if path is None or not resuming():
+        return
+    done = completed_nodeids(path)
+    keep = [item for item in items if item.nodeid not in done]
+    if len(keep) == len(items):
+        return
+    config.hook.pytest_deselected(items=[item for item in items if item.nodeid in done])
+    items[:] = keep
+
+
+def pytest_collection_finish(session: pytest.Session) -> None:
+    record_startup()
+    # collection only reads the dataset index; rows are read when generated or run
+    if not phased() and not prefetching():
+        return
+    plan = [c for c in map(_item_case, session.items) if c]
+    judge_model = judge_model_name()
+
+    if not phased():
+        submitted = prefetch_cases(plan, judge_model)
+        if submitted:
+            print(f"\nPrefetching {submitted} SUT generations")
+        return
+
+    requests = list(case_requests(plan, judge_model))
+    if not requests:
+        return
+    print(f"\nSUT phase: generating {len(requests)} outputs")
+    run_sut_phase(requests)
+    if judge_model and any(item.get_closest_marker("judge") for item in session.items):
+        print(f"Judge phase: loading {judge_model}")
+        start_judge_phase(judge_model)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item: pytest.Item, call: pytest.CallInfo):
+    outcome = yield
+    report = outcome.get_result()
+    if _case_log is None or report.when != "call":
+        return
+    record = case_record(item.nodeid, dict(item.user_properties))
+    if record is None:
+        return
+    line = _case_log.append(record)
+    # the HTML report links to the record instead of embedding the case's stdout
+    try:
+        from pytest_html import extras
+    except ImportError:
+        return
+    report.extras = [
+        *getattr(report, "extras", []),
+        extras.url(_case_log.path.name, name=f"case log #{line}"),
+    ]
+
+
+def pytest_runtest_logreport(report: pytest.TestReport) -> None:
+    # one entry per test: the call, or the setup that kept it from running
+    if _journal is not None and report.nodeid not in _journaled and (report.when == "call" or not report.passed):
+        _journaled.add(report.nodeid)
+        _journal.append(_journal_entry(report))
+    if report.when != "call":
+        return
+    extra = dict(report.user_properties).get("extra")
+    if isinstance(extra, dict):
+        add_sample(extra)
 
-    if not (case_id or prompt or output or extra):
+
+def pytest_sessionfinish(session: pytest.Session, exitstatus: int) -> None:
+    shutdown()
+    if _journal is not None:
+        _journal.close()
+    if _case_log is not None:
+        _case_log.close()
+
+
+def pytest_terminal_summary(terminalreporter) -> None:
+    stats = snapshot()
+    if not stats:
         return
+    terminalreporter.section("eval stats")
+    for section, values in stats.items():
+        for k, v in values.items():
+            if isinstance(v, float):
+                v = round(v, 3)
+            terminalreporter.write_line(f"{section}.{k}: {v}")
 
-    lines = []
-    lines.append("=" * 100)
-    lines.append(f"TEST: {request.node.nodeid}")
-    if case_id:
-        lines.append(f"CASE: {case_id}")
-    lines.append("-" * 100)
 
-    if prompt is not None:
-        lines.append("PROMPT:")
-        lines.append(str(prompt))
-        lines.append("-" * 100)
+@pytest.hookimpl(optionalhook=True)
+def pytest_json_modifyreport(json_report: dict) -> None:
+    json_report["eval_stats"] = snapshot()
+    json_report["eval_perf"] = perf_report()
 
-    if output is not None:
-        lines.append("OUTPUT:")
-        lines.append(str(output))
-        lines.append("-" * 100)
 
-    if extra is not None:
-        lines.append("EXTRA:")
-        if isinstance(extra, dict):
-            for k, v in extra.items():
-                lines.append(f"{k}: {v}")
-        else:
-            lines.append(str(extra))
+@pytest.fixture(scope="session")
+def fake_server():
+    """Fake OpenAI-compatible server (evals.fake_server) configured from EVAL_FAKE_*."""
+    from evals.fake_server import FakeConfig, FakeServer
 
-    lines.append("=" * 100)
+    with FakeServer(FakeConfig.from_env()) as server:
+        yield server
 
-    print("\n" + "\n".join(lines) + "\n")
+
+@pytest.fixture(autouse=True)
+def _attach_case_log_to_report(request: pytest.FixtureRequest):
+    yield
+
+    # with a case log (evals.run_tests) the block is only printed on request
+    if _case_log is not None and not case_print():
+        return
+    log = format_case_log(request.node.nodeid, dict(getattr(request.node, "user_properties", [])))
+    if log is not None:
+        print("\n" + log + "\n")
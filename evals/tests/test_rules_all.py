@@ -2,28 +2,17 @@ from __future__ import annotations
 
 import pytest
 
-from evals.datasets import iter_datasets
-from evals.datasets.loaders import load_jsonl
-from evals.local_bielik import call_bielik
-from evals.rules import contains_any, contains_word, looks_like_refusal, matches_regex, max_length
-from evals.recording import record_case_from_row
+from evals.checks import case_id, case_row, load_cases, evaluate_case
+from evals.generation import streaming
+from evals.rules import early_stop_for
+from evals.recording import record_case_from_row, record_result
 
 
-CASES: list[dict] = []
-for test_set, path in iter_datasets("rules.jsonl"):
-    for row in load_jsonl(path):
-        CASES.append(
-            {
-                "test_set": test_set,
-                "dataset": path.name,
-                "row": row,
-            }
-        )
+CASES: list[dict] = load_cases("rules")
 
 
 def _case_id(case: dict) -> str:
-    row = case["row"]
-    return f"{case['test_set']}::rules::{row.get('id', 'no_id')}"
+    return case_id(case, "rules")
 
 
 pytestmark = [pytest.mark.rules]
@@ -31,57 +20,12 @@ pytestmark = [pytest.mark.rules]
 
 @pytest.mark.parametrize("case", CASES, ids=_case_id)
 def test_rules_all(case: dict, request: pytest.FixtureRequest):
-    test_set = case["test_set"]
-    filename = case["dataset"]
-    row = case["row"]
+    row = case_row(case)
 
-    prompt = row["input"]
-    out = call_bielik(prompt)
+    early_stop = early_stop_for(row) if streaming() else None
+    result = evaluate_case("rules", case, row, early_stop)
 
-    record_case_from_row(
-        request,
-        row,
-        out,
-        extra={
-            "test_set": test_set,
-            "dataset": filename,
-            "type": "rules",
-            "must_contain_any": row.get("must_contain_any", []),
-            "must_not_contain_any": row.get("must_not_contain_any", []),
-            "must_contain_word": row.get("must_contain_word", []),
-            "must_not_contain_word": row.get("must_not_contain_word", []),
-            "must_match_regex": row.get("must_match_regex"),
-            "max_length": row.get("max_length"),
-        },
-    )
+    record_case_from_row(request, row, result.output, extra=result.extra)
+    record_result(request, result.fingerprint, result.failure)
 
-    assert out.strip(), "Model returned empty output"
-    assert not looks_like_refusal(out), "Model output looks like a refusal"
-
-    # Substring matching (phrase can be part of larger text)
-    must_any = row.get("must_contain_any", [])
-    if must_any:
-        assert contains_any(out, must_any), f"Expected output to contain any of: {must_any}"
-
-    must_not = row.get("must_not_contain_any", [])
-    if must_not:
-        assert not contains_any(out, must_not), f"Output contains forbidden phrase from: {must_not}"
-
-    # Whole word matching (word boundaries)
-    must_word = row.get("must_contain_word", [])
-    if must_word:
-        assert contains_word(out, must_word), f"Expected output to contain word: {must_word}"
-
-    must_not_word = row.get("must_not_contain_word", [])
-    if must_not_word:
-        assert not contains_word(out, must_not_word), f"Output contains forbidden word from: {must_not_word}"
-
-    # Regex matching (strict format validation)
-    regex_pattern = row.get("must_match_regex")
-    if regex_pattern:
-        assert matches_regex(out, regex_pattern), f"Output does not match required format: {regex_pattern}"
-
-    # Max length validation
-    max_len = row.get("max_length")
-    if max_len:
-        assert max_length(out, max_len), f"Output exceeds max length of {max_len} chars"
+    assert result.failure is None, result.failure
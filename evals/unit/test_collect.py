@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+import evals.checks as checks
+from evals.datasets import index
+
+
+@pytest.fixture
+def dataset(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    set_dir = tmp_path / "datasets" / "demo"
+    set_dir.mkdir(parents=True)
+    rows = [{"id": f"r{i}", "input": "Stolica Polski?", "must_contain_any": ["Warszawa"]} for i in range(5)]
+    (set_dir / "rules.jsonl").write_text("".join(json.dumps(r) + "\n" for r in rows), encoding="utf-8")
+    monkeypatch.setenv("EVAL_DATASETS_DIR", str(tmp_path / "datasets"))
+    monkeypatch.setenv("EVAL_CACHE_DIR", str(tmp_path / "cache"))
+    for name in ("EVAL_SETS", "EVAL_CASE_IDS", "EVAL_TAGS", "EVAL_SHARD"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(index, "_memo", {})
+    return set_dir
+
+
+def test_collection_reads_no_rows(dataset: Path, monkeypatch: pytest.MonkeyPatch):
+    def no_reads(*args: object) -> dict:
+        raise AssertionError("row read during collection")
+
+    monkeypatch.setattr(checks, "read_row", no_reads)
+    for _ in range(2):  # cold, then warm index
+        index._memo.clear()
+        cases = checks.load_cases("rules")
+        assert [c["id"] for c in cases] == [f"r{i}" for i in range(5)]
+
+
+def test_cached_rules_compile_on_first_check(dataset: Path):
+    checks.load_cases("rules")
+    index._memo.clear()
+    rules = checks.load_cases("rules")[0]["rules"]
+    assert not rules._compiled
+    assert rules.check("Warszawa.") is None
+    assert rules._compiled
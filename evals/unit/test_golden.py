@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import random
+import re
+import unicodedata
+
+import pytest
+
+from evals.golden import token_f1, token_f1_batch
+
+
+# token_f1 before the Counter rewrite; the scores must not change.
+def _baseline_tokens(s: str) -> list[str]:
+    s = s.lower().strip()
+    s = "".join(ch for ch in unicodedata.normalize("NFD", s) if unicodedata.category(ch) != "Mn")
+    s = re.sub(r"\s+", " ", s)
+    s = re.sub(r"[^\w\s]", " ", s)
+    s = re.sub(r"\s+", " ", s).strip()
+    return [t for t in s.split(" ") if t]
+
+
+def _baseline_token_f1(actual: str, expected: str) -> tuple[float, float, float]:
+    a = _baseline_tokens(actual)
+    e = _baseline_tokens(expected)
+    if not a or not e:
+        return 0.0, 0.0, 0.0
+    e_remaining = e[:]
+    inter = 0
+    for t in a:
+        if t in e_remaining:
+            inter += 1
+            e_remaining.remove(t)
+    precision = inter / max(len(a), 1)
+    recall = inter / max(len(e), 1)
+    f1 = 0.0 if (precision + recall) == 0 else (2 * precision * recall / (precision + recall))
+    return f1, precision, recall
+
+
+PAIRS = [
+    ("Warszawa", "Warszawa"),
+    ("Stolicą Polski jest Warszawa.", "Warszawa"),
+    ("Zażółć gęślą jaźń!", "zazolc gesla jazn"),
+    ("tak tak tak", "tak nie"),
+    ("PESEL ma 11 cyfr", "Numer PESEL składa się z 11 cyfr."),
+    ("", "Warszawa"),
+    ("Warszawa", ""),
+    ("...", "?!"),
+    ("a_b c-d", "a b c d"),
+    ("Łódź i\tKraków", "lodz i krakow"),
+]
+
+
+@pytest.mark.parametrize("actual, expected", PAIRS)
+def test_token_f1_matches_baseline(actual: str, expected: str):
+    assert token_f1(actual, expected) == _baseline_token_f1(actual, expected)
+
+
+def test_token_f1_matches_baseline_random():
+    rng = random.Random(0)
+    words = ["Kraków", "krakow", "tak", "nie", "jest", "ŁÓDŹ", "żółw", "11", "a_b", "-", ",", "!", "  ", "\n"]
+
+    def text() -> str:
+        return " ".join(rng.choice(words) for _ in range(rng.randint(0, 12)))
+
+    for _ in range(500):
+        actual, expected = text(), text()
+        assert token_f1(actual, expected) == _baseline_token_f1(actual, expected)
+
+
+def test_token_f1_batch_matches_token_f1():
+    f1s, precisions, recalls = token_f1_batch(PAIRS)
+    assert list(zip(f1s, precisions, recalls)) == [token_f1(a, e) for a, e in PAIRS]
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from evals.checks import check_rules
+from evals.local_bielik import Generation
+from evals.rules import early_stop_for
+
+CASE = {"test_set": "polish_context", "dataset": "rules.jsonl"}
+ROW = {"id": "capital", "must_contain_any": ["Warszawa"], "max_length": 40}
+FULL = "Stolicą Polski jest od 1596 roku miasto Warszawa."
+
+
+def _cut(text: str) -> str:
+    """The streamed output: reading stops at the first chunk that breaks max_length."""
+    early_stop = early_stop_for(ROW)
+    for end in range(1, len(text) + 1):
+        if early_stop.check(text[:end]) is not None:
+            return text[:end]
+    return text
+
+
+def test_stopped_stream_reports_the_same_failure_as_the_full_output():
+    full = check_rules(CASE, ROW, Generation(FULL))
+    streamed = check_rules(CASE, ROW, Generation(_cut(FULL)), early_stop_for(ROW))
+    assert streamed.extra["stopped_early"] == "max_length"
+    # the cut output lacks "Warszawa"; the verdict must still be the length violation
+    assert streamed.failure == full.failure == "Output exceeds max length of 40 chars"
+
+
+def test_stream_that_was_not_cut_keeps_the_rule_order():
+    out = "Kraków."
+    full = check_rules(CASE, ROW, Generation(out))
+    streamed = check_rules(CASE, ROW, Generation(out), early_stop_for(ROW))
+    assert streamed.extra["stopped_early"] is None
+    assert streamed.failure == full.failure == "Expected output to contain any of: ['Warszawa']"
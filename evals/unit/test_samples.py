@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+import pytest
+
+from evals.checks import CaseResult, check_golden, combine_samples
+from evals.golden import token_f1
+from evals.local_bielik import Generation
+
+CASE = {"test_set": "polish_context", "dataset": "golden.jsonl"}
+ROW = {"expected": "Stolicą Polski jest Warszawa", "f1_threshold": 0.3}
+CID = "polish_context::golden::capital"
+
+
+def _golden(*outputs: str) -> list[CaseResult]:
+    # as checks._check: the check's result plus the sample's output
+    return [replace(check_golden(CASE, ROW, Generation(text)), output=text) for text in outputs]
+
+
+def test_samples_are_summarized():
+    outputs = ("Stolicą Polski jest Warszawa", "Warszawa", "Kraków")
+    result = combine_samples(CID, "golden", _golden(*outputs))
+    s = result.extra["samples"]
+    assert result.failure is None
+    assert (s["k"], s["passed"], s["pass_rate"], s["pass_at_k"]) == (3, 2, 0.6667, 1.0)
+    assert s["variance"] == round(2 / 3 * (1 - 2 / 3), 4)
+    assert s["flaky"] is True
+    assert s["outputs"] == list(outputs)
+    f1s = [round(token_f1(out, ROW["expected"])[0], 4) for out in outputs]
+    assert s["scores"] == f1s == [1.0, 0.4, 0.0]
+    assert s["score_mean"] == pytest.approx(sum(f1s) / 3, abs=1e-4)
+    # the case keeps the first sample's output and extra
+    assert result.output == outputs[0]
+    assert result.extra["f1"] == 1.0
+
+
+def test_verdict_is_the_first_samples():
+    first = _golden("Kraków")[0]
+    result = combine_samples(CID, "golden", _golden("Kraków", "Warszawa", "Warszawa"))
+    assert result.failure == first.failure is not None
+    assert (result.extra["samples"]["passed"], result.extra["samples"]["flaky"]) == (2, True)
+    # a passing first sample passes the case even when most samples fail
+    result = combine_samples(CID, "golden", _golden("Warszawa", "Kraków", "Gdańsk"))
+    assert result.failure is None
+    assert result.extra["samples"]["pass_rate"] == 0.3333
+
+
+def test_all_samples_fail_or_pass_are_not_flaky():
+    failed = combine_samples(CID, "golden", _golden("Kraków", "Gdańsk")).extra["samples"]
+    assert (failed["pass_at_k"], failed["pass_rate"], failed["variance"], failed["flaky"]) == (0.0, 0.0, 0.0, False)
+    passed = combine_samples(CID, "golden", _golden("Warszawa", "Warszawa")).extra["samples"]
+    assert (passed["pass_at_k"], passed["pass_rate"], passed["flaky"]) == (1.0, 1.0, False)
+
+
+def test_rules_samples_have_no_scores():
+    results = [CaseResult({"type": "rules"}), CaseResult({"type": "rules"}, "Model returned empty output")]
+    s = combine_samples("polish_context::rules::r1", "rules", results).extra["samples"]
+    assert "scores" not in s
+    assert s["failures"] == [None, "Model returned empty output"]
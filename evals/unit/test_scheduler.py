@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from evals.generation import max_concurrency
+from evals.scheduler import Scheduler
+
+
+def _busy(sched: Scheduler, threads: int, calls: int) -> int:
+    """Run calls from several threads; returns the peak number of calls in flight."""
+    lock = threading.Lock()
+    state = {"now": 0, "peak": 0}
+
+    def fn() -> None:
+        with lock:
+            state["now"] += 1
+            state["peak"] = max(state["peak"], state["now"])
+        time.sleep(0.005)
+        with lock:
+            state["now"] -= 1
+
+    def worker() -> None:
+        for _ in range(calls):
+            sched.call(fn)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return state["peak"]
+
+
+def test_limit_starts_at_concurrency_and_grows_to_the_ceiling():
+    sched = Scheduler("sut", 1, 4)
+    assert (sched.limit, sched.max_limit) == (1, 4)
+    assert _busy(sched, threads=6, calls=20) <= 4
+    assert sched.limit == 4
+
+
+def test_fixed_limit_without_adaptation():
+    sched = Scheduler("sut", 2, 4, adaptive=False)
+    assert _busy(sched, threads=6, calls=10) <= 2
+    assert sched.limit == 2
+
+
+def test_max_concurrency_defaults_to_twice_concurrency(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("EVAL_CONCURRENCY", "3")
+    monkeypatch.delenv("EVAL_MAX_CONCURRENCY", raising=False)
+    assert max_concurrency() == 6
+    monkeypatch.setenv("EVAL_MAX_CONCURRENCY", "2")
+    assert max_concurrency() == 3
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from collections import deque
+
+import pytest
+
+from evals.sequential import Stream, wilson_interval
+
+
+def test_wilson_interval():
+    assert wilson_interval(0, 0, 0.95) == (0.0, 1.0)
+    lo, hi = wilson_interval(8, 10, 0.95)
+    assert (lo, hi) == pytest.approx((0.4902, 0.9433), abs=1e-4)
+    lo, hi = wilson_interval(10, 10, 0.95)
+    assert lo == pytest.approx(0.7225, abs=1e-4)
+    assert hi == 1.0
+    lo, hi = wilson_interval(0, 10, 0.95)
+    assert lo == pytest.approx(0.0, abs=1e-9)
+    assert hi == pytest.approx(0.2775, abs=1e-4)
+
+
+def test_wilson_interval_narrows_with_cases_and_confidence():
+    small = wilson_interval(8, 10, 0.95)
+    large = wilson_interval(80, 100, 0.95)
+    assert large[1] - large[0] < small[1] - small[0]
+    loose = wilson_interval(8, 10, 0.8)
+    assert loose[0] > small[0] and loose[1] < small[1]
+
+
+def _stream(passed: int, failed: int, queued: int) -> Stream:
+    return Stream("set", "rules", deque([{}] * queued), total=passed + failed + queued, passed=passed, failed=failed)
+
+
+def test_stream_stops_above_and_below_target():
+    assert _stream(10, 0, 5).decide(0.5, 0.95, 5) == "above"
+    assert _stream(0, 10, 5).decide(0.5, 0.95, 5) == "below"
+
+
+def test_stream_waits_for_min_cases_and_a_settled_interval():
+    # 4/4 excludes 0.3 but min_cases is 5
+    assert _stream(4, 0, 5).decide(0.3, 0.95, 5) is None
+    # 8/10 at target 0.8: interval still contains the target
+    assert _stream(8, 2, 5).decide(0.8, 0.95, 5) is None
+
+
+def test_stream_exhausted_and_decision_is_final():
+    stream = _stream(8, 2, 0)
+    assert stream.decide(0.8, 0.95, 5) == "exhausted"
+    stream.record("passed")
+    assert stream.decide(0.8, 0.95, 5) == "exhausted"
+    assert stream.n == 11
+
+
+def test_errors_are_not_verdicts():
+    stream = _stream(passed=4, failed=0, queued=3)
+    stream.record("error")
+    stream.record("error")
+    assert (stream.passed, stream.failed, stream.errors, stream.n) == (4, 0, 2, 4)
+    # errored cases do not count towards min_cases
+    assert stream.decide(0.3, 0.95, 5) is None
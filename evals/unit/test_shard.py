@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from evals.merge import find_shard_reports, merge_reports
+from evals.shard import assign_shards, case_id_from_nodeid, parse_shard, select_shard
+
+IDS = [f"polish_context::rules::case_{i:03d}" for i in range(200)]
+
+
+def test_parse_shard():
+    assert parse_shard("2/4") == (2, 4)
+    assert parse_shard(" 1 / 1 ") == (1, 1)
+    for bad in ("0/4", "5/4", "1/0", "1-4", ""):
+        with pytest.raises(ValueError):
+            parse_shard(bad)
+
+
+@pytest.mark.parametrize("count", [1, 3, 8])
+def test_shards_cover_all_cases_without_overlap(monkeypatch: pytest.MonkeyPatch, count: int):
+    monkeypatch.delenv("EVAL_SHARD_WEIGHTS", raising=False)
+    seen: list[str] = []
+    for index in range(1, count + 1):
+        monkeypatch.setenv("EVAL_SHARD", f"{index}/{count}")
+        seen.extend(select_shard(IDS, IDS))
+    assert sorted(seen) == sorted(IDS)
+
+
+def test_unweighted_assignment_is_stable():
+    shards = assign_shards(IDS, 4)
+    assert shards == assign_shards(IDS, 4)
+    # a case keeps its shard when other cases are added or removed
+    assert assign_shards(IDS[::2], 4) == shards[::2]
+    assert set(shards) == {0, 1, 2, 3}
+
+
+def test_weighted_assignment_balances_load():
+    weights = {cid: float(i % 7 + 1) for i, cid in enumerate(IDS)}
+    shards = assign_shards(IDS, 4, weights)
+    assert shards == assign_shards(IDS, 4, weights)
+    loads = [sum(weights[cid] for cid, s in zip(IDS, shards) if s == shard) for shard in range(4)]
+    assert max(loads) - min(loads) <= max(weights.values())
+
+
+def test_case_id_from_nodeid():
+    nodeid = "evals/tests/test_rules_all.py::test_rules_all[polish_context::rules::r1]"
+    assert case_id_from_nodeid(nodeid) == "polish_context::rules::r1"
+    assert case_id_from_nodeid("evals/tests/test_x.py::test_x") is None
+
+
+def _report(tests: list[dict], wall_s: float) -> dict:
+    summary: dict[str, int] = {"total": len(tests)}
+    for test in tests:
+        summary[test["outcome"]] = summary.get(test["outcome"], 0) + 1
+    failed = any(t["outcome"] == "failed" for t in tests)
+    return {"summary": summary, "tests": tests, "exitcode": int(failed), "eval_perf": {"run_wall_s": wall_s}}
+
+
+def test_merge_reports():
+    a = _report([{"nodeid": "t[b]", "outcome": "passed"}, {"nodeid": "t[d]", "outcome": "failed"}], 2.0)
+    b = _report([{"nodeid": "t[a]", "outcome": "passed"}, {"nodeid": "t[c]", "outcome": "passed"}], 3.0)
+    merged = merge_reports([a, b])
+    assert [t["nodeid"] for t in merged["tests"]] == ["t[a]", "t[b]", "t[c]", "t[d]"]
+    assert merged["summary"] == {"total": 4, "passed": 3, "failed": 1}
+    assert merged["exitcode"] == 1
+    assert merged["environment"]["merged_shards"] == 2
+    # shards run in parallel: wall time of the slowest one
+    assert merged["eval_perf"]["run_wall_s"] == 3.0
+
+
+def test_merge_reports_all_passed():
+    merged = merge_reports([_report([{"nodeid": "t[a]", "outcome": "passed"}], 1.0)])
+    assert merged["exitcode"] == 0
+
+
+def test_sequential_shard_reports_are_not_merged(tmp_path: Path):
+    for name in ("shard1of2", "shard2of2", "shard1of2__seq", "shard2of2__seq"):
+        (tmp_path / f"latest_allsets__rules__{name}.json").write_text("{}", encoding="utf-8")
+    groups = find_shard_reports(tmp_path)
+    assert list(groups) == ["allsets__rules"]
+    assert {i: p.name for i, p in groups["allsets__rules"].items()} == {
+        1: "latest_allsets__rules__shard1of2.json",
+        2: "latest_allsets__rules__shard2of2.json",
+    }